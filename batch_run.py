@@ -0,0 +1,78 @@
+"""Batch Run."""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from timeouts import Deadline
+
+# Items run at the same time when the caller does not say otherwise
+DEFAULT_MAX_PARALLEL = 4
+
+
+class DeadlineSkipped(Exception):
+    """Raised from an item's future when the batch deadline passed before it started"""
+
+
+class BatchRun:
+    """Runs task(index) for every item of a batch with at most max_parallel in flight
+
+    Items are submitted lazily and in order, so a large batch never has
+    more than max_parallel of them prepared at once. on_done(index, future)
+    is called on the calling thread as each item finishes; an item not
+    started before the deadline never runs and its future raises
+    DeadlineSkipped. Work started from on_done elsewhere (a process pool)
+    can be handed to follow so the run also waits for it and calls its
+    callback on the calling thread. spans holds (start_ns, end_ns) of every
+    item, for the trace.
+    """
+
+    def __init__(self, total: int, task: Callable[[int], Any], max_parallel: int = DEFAULT_MAX_PARALLEL,
+                 deadline: Optional[Deadline] = None):
+        self.total = total
+        self.task = task
+        self.max_parallel = max(1, max_parallel)
+        self.deadline = deadline
+        self.spans: List[Tuple[int, int]] = [(0, 0)] * total
+        self.wall_time = 0.0
+        self._followups: Dict[Future, Callable[[Future], None]] = {}
+
+    def _execute(self, index: int) -> Any:
+        start_ns = time.time_ns()
+        try:
+            if self.deadline is not None and self.deadline.expired():
+                raise DeadlineSkipped(f"Deadline of {self.deadline.seconds:.0f} s reached")
+            return self.task(index)
+        finally:
+            self.spans[index] = (start_ns, time.time_ns())
+
+    def follow(self, future: Future, callback: Callable[[Future], None]) -> None:
+        """Wait for future before the run ends and call callback with it once it is done"""
+        self._followups[future] = callback
+
+    def run(self, on_done: Callable[[int, Future], None],
+            on_round: Optional[Callable[[], None]] = None) -> None:
+        """Run every item; on_round is called after each batch of completions"""
+        run_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            pending = iter(range(self.total))
+            running: Dict[Future, int] = {}
+
+            def top_up():
+                for index in pending:
+                    running[executor.submit(self._execute, index)] = index
+                    if len(running) >= self.max_parallel:
+                        return
+
+            top_up()
+            while running or self._followups:
+                done, _ = wait(list(running) + list(self._followups), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in running:
+                        on_done(running.pop(future), future)
+                    else:
+                        self._followups.pop(future)(future)
+                if on_round is not None:
+                    on_round()
+                top_up()
+        self.wall_time = time.perf_counter() - run_start
@@ -0,0 +1,118 @@
+"""Harness."""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# A case is reported as a regression when its median is this much slower than the baseline
+DEFAULT_REGRESSION_THRESHOLD = 1.2
+
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _percentile(sorted_samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, int(round(percent / 100 * len(sorted_samples))))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def measure(name: str, func: Callable[[], Any], iterations: int = 50, number: int = 1,
+            warmup: int = 3) -> Dict[str, Any]:
+    """Time func and record its peak memory
+
+    Each of the `iterations` samples calls func `number` times, so very fast
+    functions can be measured above timer resolution. Peak memory comes from a
+    separate traced call, so tracing does not skew the timings. Anything the
+    code under test prints is swallowed.
+    """
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - start) / number)
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        "name": name,
+        "calls": iterations * number,
+        "ops_per_sec": round(len(samples) / total, 2) if total else None,
+        "mean_ms": round(total / len(samples) * 1000, 4),
+        "p50_ms": round(_percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 4),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def save_baseline(results: List[Dict[str, Any]], file_path: str = DEFAULT_BASELINE_FILE,
+                  params: Optional[Dict[str, Any]] = None) -> None:
+    """Write results to a baseline file for later comparison"""
+    baseline = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params or {},
+        "results": {result["name"]: result for result in results},
+    }
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def load_baseline(file_path: str = DEFAULT_BASELINE_FILE) -> Dict[str, Any]:
+    """Read a baseline file written by save_baseline"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                        threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """Add the median ratio against the baseline to each result and flag regressions"""
+    baseline_results = baseline.get("results", {})
+    for result in results:
+        previous = baseline_results.get(result["name"])
+        if not previous or not previous.get("p50_ms"):
+            result["vs_baseline"] = None
+            result["regression"] = False
+            continue
+        ratio = result["p50_ms"] / previous["p50_ms"]
+        result["vs_baseline"] = round(ratio, 2)
+        result["regression"] = ratio > threshold
+    return results
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """Plain-text table of benchmark results"""
+    columns = ["name", "ops_per_sec", "p50_ms", "p95_ms", "p99_ms", "peak_memory_kb"]
+    if any("vs_baseline" in result for result in results):
+        columns.append("vs_baseline")
+
+    rows = [[str(result.get(column, "")) for column in columns] for result in results]
+    for row, result in zip(rows, results):
+        if result.get("regression"):
+            row[-1] += "  REGRESSION"
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+    return "\n".join(lines)
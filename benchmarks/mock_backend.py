@@ -0,0 +1,367 @@
+"""Mock backend emulating the DEV* endpoints for offline load testing.
+
+An asyncio HTTP/1.1 server (keep-alive, Content-Length bodies) that answers
+every route in api_configs.json under both module prefixes, with configurable
+latency, error rate and payload size. Point an environment at it, e.g. add
+MOCK with base URL http://127.0.0.1:8800 in the admin panel, or use it
+directly from load-test scripts.
+
+Usage:
+    python -m benchmarks.mock_backend --port 8800 --latency lognormal:20:0.5 --error-rate 0.01
+    python -m benchmarks.mock_backend --route-config mock_routes.json
+
+Latency specs (milliseconds): fixed:MS, uniform:LO:HI, normal:MEAN:SD,
+lognormal:MEDIAN:SIGMA, exp:MEAN. The route config is a JSON object mapping
+route names (see MockBackend.routes) to {"latency": spec, "error_rate": float}.
+
+Request bodies sent with Content-Encoding gzip or zstd are decoded; other
+encodings, or any encoding when started with --request-encodings "", are
+answered with 415 so the client's fallback can be checked, and bodies that
+fail to decode with 400. Responses of at
+least 1 KiB are gzip- or zstd-encoded when the client accepts it.
+
+Successful GET responses carry an ETag of their body; a request whose
+If-None-Match matches it is answered with 304 and no body.
+
+GET /__mock/stats returns request counters per route.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.payloads import make_statistic_payload  # noqa: E402
+from content_encoding import DECODE_ERRORS, decode_body, encode_body, encoding_available  # noqa: E402
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional, the default event loop works fine
+    uvloop = None
+
+_MODULE_PREFIX = re.compile(r"^/api/(assessment|administration)/api/v1", re.IGNORECASE)
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 415: "Unsupported Media Type",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Responses smaller than this are never compressed
+_COMPRESS_MIN_BYTES = 1024
+
+Handler = Callable[[Dict[str, Any], str], Any]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec into a sampler returning seconds"""
+    kind, *args = spec.split(":")
+    values = [float(arg) for arg in args]
+    samplers = {
+        "fixed": (1, lambda rng: values[0]),
+        "uniform": (2, lambda rng: rng.uniform(values[0], values[1])),
+        "normal": (2, lambda rng: rng.gauss(values[0], values[1])),
+        "lognormal": (2, lambda rng: values[0] * rng.lognormvariate(0, values[1])),
+        "exp": (1, lambda rng: rng.expovariate(1 / values[0]) if values[0] else 0.0),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+    sample = samplers[kind][1]
+    return lambda rng: max(0.0, sample(rng)) / 1000
+
+
+def _ok(data: Any) -> Dict[str, Any]:
+    """Response envelope used by the DEV endpoints"""
+    return {"success": True, "message": "OK", "data": data}
+
+
+def _student_results(ids) -> Dict[str, Any]:
+    """One success row per student id"""
+    return _ok([{"studentId": student_id, "status": "Added"} for student_id in ids])
+
+
+class MockBackend:
+    """Route table and request handling, independent of the transport"""
+
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0, error_status: int = 500,
+                 statistic_students: int = 200, route_config: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None, request_encodings: Sequence[str] = ("gzip", "zstd"),
+                 timer_job_seconds: float = 5.0):
+        self.rng = random.Random(seed)
+        self.default_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.statistic_students = statistic_students
+        self.request_encodings = {encoding for encoding in request_encodings if encoding_available(encoding)}
+        self.stats: Counter = Counter()
+        self._statistic_bytes: Optional[bytes] = None
+        self.timer_job_seconds = timer_job_seconds
+        self._timer_jobs_started: Dict[str, float] = {}
+
+        self.routes: Dict[str, Tuple[str, Handler]] = {
+            # route name -> (method, handler); names are the lower-cased path after the module prefix
+            "/studentuserwrite/devexupdatestudentuser": ("POST", self._update_student_user),
+            "/assessmentstudentinfo/devcreatedatav2": ("POST", self._create_data),
+            "/assessmentstudentinfo/devaddstudent": ("POST", self._add_students),
+            "/assessmentstudentinfo/devaddstudentv2": ("POST", self._add_students),
+            "/assessmentsubjectstudent/devaddstudentv2": ("POST", self._add_subject_students),
+            "/assessmentsubjectstudent/devallocatestudent": ("POST", self._add_subject_students),
+            "/assessmentsubjectstudent/devcleardata": ("POST", self._clear_data),
+            "/assessmentstudentinfo/devcleardata": ("POST", self._clear_data),
+            "/cutofftimesetting/devupdatecutoffdatetimesetting": ("POST", self._updated),
+            "/cutofftimesetting/devupdatecutoffdatetimeextendsetting": ("POST", self._updated),
+            "/processingresult/devrandomacadstanding": ("POST", self._random_acad_standing),
+            "/assessmentmarkentry/devcreatedata": ("GET", self._updated),
+            "/subjectawarddistinction/syncpercentage": ("GET", self._updated),
+            "/devtimerjob/devtriggertimerjob": ("GET", self._trigger_timer_job),
+            "/devtimerjob/devgettimerjobstatus": ("GET", self._timer_job_status),
+            "/studentsubjectmark/automarkentry": ("POST", self._auto_mark_entry),
+            "/subjectassessmentsetting/bulkassessmentgradingschemechange": ("POST", self._grading_scheme),
+            "/assessmentstudentinfo/devenrollfake": ("POST", self._enroll_fake),
+            "/assessmentstudentinfo/devremovefake": ("POST", self._updated),
+            "/processingresult/statistic": ("POST", None),
+        }
+
+        self.overrides: Dict[str, Dict[str, Any]] = {}
+        for name, override in (route_config or {}).items():
+            route = name.lower()
+            if route not in self.routes:
+                raise ValueError(f"Unknown route '{name}' in route config")
+            self.overrides[route] = {
+                "latency": parse_latency(override["latency"]) if "latency" in override else self.default_latency,
+                "error_rate": override.get("error_rate", error_rate),
+            }
+
+    def resolve(self, path: str) -> Tuple[Optional[str], str]:
+        """Map a request path to (route name, trailing argument)"""
+        path = _MODULE_PREFIX.sub("", path.split("?", 1)[0]).rstrip("/")
+        if path.lower() in self.routes:
+            return path.lower(), ""
+        parent, _, argument = path.rpartition("/")
+        if parent.lower() in self.routes:
+            return parent.lower(), argument
+        return None, ""
+
+    async def handle(self, method: str, path: str, body: bytes, content_encoding: str = "") -> Tuple[int, bytes]:
+        """Answer one request, after the route's simulated latency"""
+        if path.startswith("/__mock/stats"):
+            return 200, json.dumps(dict(self.stats)).encode()
+
+        if content_encoding and content_encoding != "identity":
+            if content_encoding not in self.request_encodings:
+                self.stats["415"] += 1
+                return 415, json.dumps({"success": False, "message": f"Unsupported encoding {content_encoding}"}).encode()
+            self.stats[f"encoded_requests_{content_encoding}"] += 1
+            self.stats["request_wire_bytes"] += len(body)
+            try:
+                body = decode_body(body, content_encoding)
+            except DECODE_ERRORS:
+                self.stats["400"] += 1
+                return 400, json.dumps({"success": False, "message": f"Malformed {content_encoding} body"}).encode()
+            self.stats["request_decoded_bytes"] += len(body)
+
+        route, argument = self.resolve(path)
+        if route is None:
+            self.stats["404"] += 1
+            return 404, json.dumps({"success": False, "message": f"No mock route for {path}"}).encode()
+
+        override = self.overrides.get(route, {})
+        await asyncio.sleep(override.get("latency", self.default_latency)(self.rng))
+        self.stats[route] += 1
+
+        expected_method, handler = self.routes[route]
+        if method != expected_method:
+            return 400, json.dumps({"success": False, "message": f"Use {expected_method}"}).encode()
+        if self.rng.random() < override.get("error_rate", self.error_rate):
+            self.stats["errors"] += 1
+            return self.error_status, json.dumps({"success": False, "message": "Injected error"}).encode()
+
+        if route == "/processingresult/statistic":
+            # Generated once and served from bytes, it is by far the largest payload
+            if self._statistic_bytes is None:
+                self._statistic_bytes = json.dumps(make_statistic_payload(self.statistic_students)).encode()
+            return 200, self._statistic_bytes
+
+        try:
+            request = json.loads(body) if body else {}
+        except ValueError:
+            return 400, json.dumps({"success": False, "message": "Invalid JSON body"}).encode()
+        return 200, json.dumps(handler(request if isinstance(request, dict) else {}, argument)).encode()
+
+    def _new_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128)))
+
+    def _updated(self, request, argument):
+        return _ok({"updated": True})
+
+    def _update_student_user(self, request, argument):
+        return _student_results(student.get("studentId") for student in request.get("students", []))
+
+    def _create_data(self, request, argument):
+        return _ok({"created": request.get("studentSize", 0), "semesterId": request.get("semesterId")})
+
+    def _add_students(self, request, argument):
+        return _student_results(request.get("studentIds", []))
+
+    def _add_subject_students(self, request, argument):
+        return _student_results(info.get("studentId") for info in request.get("studentInfos", []))
+
+    def _clear_data(self, request, argument):
+        items = next((value for value in request.values() if isinstance(value, list)), [])
+        return _ok({"deleted": len(items)})
+
+    def _random_acad_standing(self, request, argument):
+        standings = ["Good", "Probation", "Dismissed"]
+        return _ok([
+            {"courseId": course.get("courseId"), "semesterId": course.get("semesterId"),
+             "acadStanding": self.rng.choice(standings)}
+            for course in request.get("courses", [])
+        ])
+
+    def _trigger_timer_job(self, request, argument):
+        self._timer_jobs_started[argument.lower()] = time.monotonic()
+        return _ok({"timerJobId": argument, "status": "Triggered"})
+
+    def _timer_job_status(self, request, argument):
+        """Running for timer_job_seconds after the last trigger, Completed after that"""
+        started = self._timer_jobs_started.get(argument.lower())
+        if started is None:
+            status = "NotStarted"
+        else:
+            status = "Running" if time.monotonic() - started < self.timer_job_seconds else "Completed"
+        return _ok({"timerJobId": argument, "status": status})
+
+    def _auto_mark_entry(self, request, argument):
+        student_ids = request.get("studentIds") or [self._new_id() for _ in range(30)]
+        low, high = request.get("minMark", 0), request.get("maxMark", 100)
+        return _ok([
+            {"studentId": student_id, "subjectCode": request.get("subjectCode"),
+             "mark": self.rng.randint(int(low), int(high))}
+            for student_id in student_ids
+        ])
+
+    def _grading_scheme(self, request, argument):
+        return _ok({"updated": len(request.get("ids", [])) + len(request.get("subjectCodes", []))})
+
+    def _enroll_fake(self, request, argument):
+        return _ok([
+            {"studentId": self._new_id(), "courseCode": request.get("courseCode"),
+             "studyStage": request.get("studyStage", 1)}
+            for _ in range(int(request.get("numberOfStudents", 0)))
+        ])
+
+
+def _response_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding this server can produce out of an Accept-Encoding header"""
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted and encoding_available(encoding):
+            return encoding
+    return None
+
+
+async def _serve_connection(backend: MockBackend, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve requests on one keep-alive connection"""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            method, path, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            body = await reader.readexactly(length) if length else b""
+
+            status, payload = await backend.handle(method.upper(), path, body,
+                                                   headers.get("content-encoding", "").lower())
+            etag_header = ""
+            if method.upper() == "GET" and status == 200:
+                etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"'
+                etag_header = f"ETag: {etag}\r\n"
+                if headers.get("if-none-match") == etag:
+                    backend.stats["304"] += 1
+                    status, payload = 304, b""
+            encoding_header = ""
+            encoding = _response_encoding(headers.get("accept-encoding", ""))
+            if encoding and len(payload) >= _COMPRESS_MIN_BYTES:
+                payload = encode_body(payload, encoding)
+                encoding_header = f"Content-Encoding: {encoding}\r\n"
+            keep_alive = headers.get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"{encoding_header}"
+                f"{etag_header}"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(backend: MockBackend, host: str = "127.0.0.1", port: int = 8800) -> None:
+    """Run the mock backend until cancelled"""
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(backend, reader, writer), host, port, backlog=1024
+    )
+    print(f"Mock backend listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Mock backend for the DEV* endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", default="fixed:0", help="Default latency spec in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=500, help="Status code of injected errors")
+    parser.add_argument("--statistic-students", type=int, default=200,
+                        help="Students in the ProcessingResult/statistic response")
+    parser.add_argument("--route-config", help="JSON file with per-route latency and error rate")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--request-encodings", default="gzip,zstd",
+                        help="Comma-separated request Content-Encodings to accept, others get 415")
+    parser.add_argument("--timer-job-seconds", type=float, default=5.0,
+                        help="Seconds a triggered timer job reports Running before Completed")
+    args = parser.parse_args(argv)
+
+    route_config = None
+    if args.route_config:
+        with open(args.route_config, "r", encoding="utf-8") as f:
+            route_config = json.load(f)
+
+    backend = MockBackend(args.latency, args.error_rate, args.error_status, args.statistic_students,
+                          route_config, args.seed,
+                          [encoding.strip() for encoding in args.request_encodings.split(",") if encoding.strip()],
+                          args.timer_job_seconds)
+    if uvloop is not None:
+        uvloop.install()
+    try:
+        asyncio.run(serve(backend, args.host, args.port))
+    except KeyboardInterrupt:
+        print(json.dumps(dict(backend.stats), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
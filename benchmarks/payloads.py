@@ -0,0 +1,89 @@
+"""Payloads."""
+
+import io
+import random
+import uuid
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# Seeded so every run benchmarks the same data
+_RANDOM_SEED = 1234
+
+
+def make_statistic_payload(students: int, subjects: int = 8) -> Dict[str, Any]:
+    """Synthetic ProcessingResult/statistic response in the SIT layout"""
+    rng = random.Random(_RANDOM_SEED)
+    semester_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    subject_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(subjects)]
+
+    settings = [
+        {
+            "subjectId": subject_id,
+            "semesterId": semester_id,
+            "creditUnit": rng.choice([2, 3, 4]),
+            "isGraded": True,
+            "subjectCategory": rng.choice(["Core", "Elective"]),
+            "diplomaCategory": rng.choice(["DipC", "DipO", "DipE"]),
+        }
+        for subject_id in subject_ids
+    ]
+
+    statistics: List[Dict[str, Any]] = []
+    for i in range(students):
+        statistics.append({
+            "courseCode": f"C{i % 20:03d}",
+            "courseName": f"Course {i % 20}",
+            "semesterName": "2025S1",
+            "studentId": str(uuid.UUID(int=rng.getrandbits(128))),
+            "studentName": f"Student {i:06d}",
+            "admissionNumber": f"A{i:07d}",
+            "courseVersion": 1,
+            "studentStatus": "Active",
+            "gpa": round(rng.uniform(1, 4), 2),
+            "cgpa": round(rng.uniform(1, 4), 2),
+            "semesterRank": rng.randint(1, students),
+            "failedCriteria": {
+                "failedItems": [{"failCriteria": rng.randint(7, 12), "value": rng.randint(0, 3)}]
+            },
+            "cummulativeAssessmentSettings": settings,
+            "currentAssessmentSettings": [],
+            "cummulativeSubjectMarks": [],
+            "currentSubjectMarks": [
+                {
+                    "id": f"{i}-{j}",
+                    "subjectId": subject_id,
+                    "semesterId": semester_id,
+                    "subjectCode": f"S{j:03d}",
+                    "subjectComputedMark": rng.randint(0, 100),
+                    "finalSubjectGrade": rng.choice(["A", "B", "C", "D", "F"]),
+                    "attemptNumber": 1,
+                }
+                for j, subject_id in enumerate(subject_ids)
+            ],
+        })
+    return {"success": True, "data": [{"studentStatistics": statistics}]}
+
+
+def make_marks_body(students: int) -> Dict[str, Any]:
+    """Synthetic batch mark-entry request body"""
+    rng = random.Random(_RANDOM_SEED)
+    return {
+        "semesterId": str(uuid.UUID(int=rng.getrandbits(128))),
+        "studentMarks": [
+            {"studentId": f"S{i:06d}", "mark": rng.randint(0, 100)} for i in range(students)
+        ],
+    }
+
+
+def make_student_excel(rows: int) -> bytes:
+    """Synthetic student upload workbook like the ones users upload to AD module APIs"""
+    rng = random.Random(_RANDOM_SEED)
+    df = pd.DataFrame({
+        "StudentId": [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(rows)],
+        "CourseCode": [f"COURSE{rng.randint(1, 50):03d}" for _ in range(rows)],
+        "SemesterId": [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(rows)],
+    })
+    output = io.BytesIO()
+    df.to_excel(output, index=False, engine="openpyxl")
+    return output.getvalue()
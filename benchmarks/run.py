@@ -0,0 +1,144 @@
+"""Benchmark runner for the request hot path.
+
+Usage:
+    python -m benchmarks.run                      # run everything and print a report
+    python -m benchmarks.run --save-baseline      # store results in benchmarks/baseline.json
+    python -m benchmarks.run --compare            # compare against the stored baseline
+    python -m benchmarks.run -k cookies --iterations 200
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import (  # noqa: E402
+    DEFAULT_BASELINE_FILE,
+    DEFAULT_REGRESSION_THRESHOLD,
+    compare_to_baseline,
+    format_report,
+    load_baseline,
+    measure,
+    save_baseline
+)
+from benchmarks.payloads import make_marks_body, make_statistic_payload, make_student_excel  # noqa: E402
+from benchmarks.stub_server import StubServer  # noqa: E402
+
+# (name, function, calls per sample, slow) - slow cases take a tenth of the samples
+Case = Tuple[str, Callable[[], Any], int, bool]
+
+
+def _request_cases(server: StubServer, body_size: int) -> List[Case]:
+    """HTTP hot path against the local stub server"""
+    import requests
+    from http_client import HTTPClient
+    from utils import make_http_request
+
+    session = requests.Session()
+    body = make_marks_body(body_size)
+    get_api = {"method": "GET", "url": f"{server.url}/api/assessment/api/v1/ping", "headers": {},
+               "params": {"page": 1}, "cookies": {"session": "x"}}
+    post_api = {"method": "POST", "url": f"{server.url}/api/assessment/api/v1/marks", "headers": {},
+                "params": {}, "cookies": {"session": "x"}, "body": body}
+    client = HTTPClient(base_url=server.url, cookies="session=x")
+
+    return [
+        ("make_http_request GET", lambda: make_http_request(get_api), 1, False),
+        ("make_http_request GET (shared session)", lambda: make_http_request(get_api, session), 1, False),
+        (f"make_http_request POST {body_size} marks", lambda: make_http_request(post_api, session), 1, False),
+        ("HTTPClient.request GET", lambda: client.request("GET", "/ping"), 1, False),
+        (f"HTTPClient.request POST {body_size} marks",
+         lambda: client.request("POST", "/marks", json_data=body), 1, False),
+    ]
+
+
+def _ui_cases(students: int, excel_rows: int) -> List[Case]:
+    """Pure helpers from utils/ui that run on every request or analysis"""
+    import streamlit as st
+    import ui
+    from statistic_analysis import (analyze_processing_result, analyze_statistic_bytes, export_dfs_to_excel_bytes,
+                                    export_statistic_excel)
+    from utils import get_current_base_url
+
+    st.session_state["current_env"] = "SIT"
+    st.session_state["cookie_choice"] = "Use Environment Cookies"
+    st.session_state["cookies_config"] = {"SIT": "ASP.NET_SessionId=abc; token=" + "x" * 400}
+
+    payload = make_statistic_payload(students)
+    df_marks, df_summary = analyze_processing_result(payload)
+    raw_payload = json.dumps(payload).encode("utf-8")
+    packed_marks, packed_summary = analyze_statistic_bytes(raw_payload)
+    excel_bytes = make_student_excel(excel_rows)
+
+    return [
+        ("get_current_base_url", lambda: get_current_base_url("SIT", "EX"), 200, False),
+        ("_load_dynamic_cookies_for_request", lambda: ui._load_dynamic_cookies_for_request({}), 200, False),
+        (f"analyze_processing_result {students} students", lambda: analyze_processing_result(payload), 1, True),
+        (f"analyze_statistic_bytes {students} students", lambda: analyze_statistic_bytes(raw_payload), 1, True),
+        (f"export_dfs_to_excel_bytes {len(df_marks)} rows",
+         lambda: export_dfs_to_excel_bytes(df_marks, df_summary), 1, True),
+        (f"export_statistic_excel {len(df_marks)} rows",
+         lambda: export_statistic_excel(packed_marks, packed_summary), 1, True),
+        (f"read_excel {excel_rows} rows", lambda: pd.read_excel(io.BytesIO(excel_bytes)), 1, True),
+    ]
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Build every case, keep those matching -k, and measure them"""
+    results = []
+    with StubServer(make_statistic_payload(args.response_students)) as server:
+        cases = _request_cases(server, args.body_size) + _ui_cases(args.students, args.excel_rows)
+        for name, func, number, slow in cases:
+            if args.k and args.k.lower() not in name.lower():
+                continue
+            # Slow cases get fewer samples so the whole suite stays quick
+            iterations = max(3, args.iterations // 10) if slow else args.iterations
+            results.append(measure(name, func, iterations=iterations, number=number))
+            print(f"  measured {name}", file=sys.stderr)
+    return results
+
+
+def main(argv=None) -> int:
+    """Command line entry point, returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Benchmark the API tester request hot path")
+    parser.add_argument("-k", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--iterations", type=int, default=50, help="Samples per fast case")
+    parser.add_argument("--students", type=int, default=1000, help="Students in the statistic payload")
+    parser.add_argument("--response-students", type=int, default=50,
+                        help="Students in the stub server's response")
+    parser.add_argument("--body-size", type=int, default=1000, help="Marks in the POST body")
+    parser.add_argument("--excel-rows", type=int, default=2000, help="Rows in the synthetic Excel file")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE_FILE, metavar="FILE",
+                        help="Store results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE_FILE, metavar="FILE",
+                        help="Compare results with a stored baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Median slowdown ratio reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when any case regresses")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if args.compare:
+        compare_to_baseline(results, load_baseline(args.compare), args.threshold)
+    print(format_report(results))
+
+    if args.save_baseline:
+        params = {key: value for key, value in vars(args).items()
+                  if key in ("iterations", "students", "response_students", "body_size", "excel_rows")}
+        save_baseline(results, args.save_baseline, params)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.fail_on_regression and any(result.get("regression") for result in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Stub Server."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answers every request with the server's canned JSON payload"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = self.server.payload_bytes
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _reply
+
+    def log_message(self, format, *args):
+        """Keep benchmark output clean"""
+        pass
+
+
+class StubServer:
+    """Local HTTP server returning a fixed JSON payload, used as a context manager
+
+    Example:
+        with StubServer({"data": []}) as server:
+            requests.get(server.url + "/anything")
+    """
+
+    def __init__(self, payload: Any = None, host: str = "127.0.0.1", port: int = 0):
+        self.payload = {"success": True, "data": []} if payload is None else payload
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.payload_bytes = json.dumps(self.payload).encode("utf-8")
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,56 @@
+"""Blob Index."""
+
+import shutil
+import sqlite3
+import threading
+from typing import Any, Iterable, List, Tuple
+
+from blob_store import BlobStore
+
+
+class BlobIndex:
+    """SQLite table whose rows reference payloads in a BlobStore by hash
+
+    Subclasses name the table and its hash columns. Rows and blob files are
+    only changed while holding _lock: a blob is written before the row that
+    references it, and removed only once no committed row references it,
+    before the lock is released. Otherwise an insert of the same payload
+    could find the file, skip writing it, and have it removed from under
+    its new row. Reads take _lock as well, since every query goes through
+    the one shared connection.
+    """
+
+    table = ""
+    hash_columns: Tuple[str, ...] = ()
+
+    def __init__(self, db_path: str, blob_dir: str):
+        self.db_path = db_path
+        self.blobs = BlobStore(blob_dir)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _delete_rows(self, where: str, params: Tuple[Any, ...]) -> List[str]:
+        """Delete rows and return the blob hashes no other row references, without committing"""
+        candidates = set()
+        for row in self._conn.execute(f"SELECT {', '.join(self.hash_columns)} FROM {self.table} WHERE {where}",
+                                      params):
+            candidates.update(digest for digest in row if digest)
+        self._conn.execute(f"DELETE FROM {self.table} WHERE {where}", params)
+        referenced = " OR ".join(f"{column} = ?" for column in self.hash_columns)
+        return [digest for digest in candidates if not self._conn.execute(
+            f"SELECT 1 FROM {self.table} WHERE {referenced} LIMIT 1", (digest,) * len(self.hash_columns)
+        ).fetchone()]
+
+    def _commit(self, orphans: Iterable[str] = ()) -> int:
+        """Commit, then remove the orphaned blob files, returning how many; call with _lock held"""
+        self._conn.commit()
+        # Files go only after the rows referencing them are committed away
+        return self.blobs.delete(orphans)
+
+    def _clear(self) -> None:
+        """Delete every row and the whole blob directory; call with _lock held"""
+        self._conn.execute(f"DELETE FROM {self.table}")
+        self._conn.commit()
+        shutil.rmtree(self.blobs.root, ignore_errors=True)
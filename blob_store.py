@@ -0,0 +1,110 @@
+"""Blob Store."""
+
+import hashlib
+import os
+import zlib
+from typing import Any, Iterable, Optional
+
+from utils import json_dumps_bytes, json_loads
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, blobs fall back to zlib
+    zstandard = None
+
+_ZSTD_SUFFIX = ".zst"
+_ZLIB_SUFFIX = ".zz"
+_RAW_SUFFIX = ""
+
+
+class BlobStore:
+    """Content-addressed store for request and response payloads.
+
+    Each payload is written once under blobs/<first 2 hex chars>/<sha256>,
+    zstd-compressed when the zstandard package is installed and zlib otherwise,
+    or as is when put with compress=False.
+    Identical payloads share a single file, so re-running the same request
+    stores its body only once.
+    """
+
+    def __init__(self, root: str):
+        """Use root as the blob directory, created on first write"""
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        """Path of a blob without its compression suffix"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _find(self, digest: str) -> Optional[str]:
+        """Path of an existing blob in either compression format"""
+        base = self._path(digest)
+        for suffix in (_ZSTD_SUFFIX, _ZLIB_SUFFIX, _RAW_SUFFIX):
+            if os.path.exists(base + suffix):
+                return base + suffix
+        return None
+
+    def put(self, data: bytes, compress: bool = True) -> str:
+        """Store bytes and return their sha256 hex digest
+
+        compress=False stores data as is, for payloads that are already compressed.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if self._find(digest):
+            return digest
+
+        base = self._path(digest)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        if not compress:
+            path, compressed = base + _RAW_SUFFIX, data
+        elif zstandard is not None:
+            path, compressed = base + _ZSTD_SUFFIX, zstandard.ZstdCompressor().compress(data)
+        else:
+            path, compressed = base + _ZLIB_SUFFIX, zlib.compress(data)
+
+        # Write to a temporary file first so a crash never leaves a truncated blob
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Read a blob back, None if it does not exist"""
+        path = self._find(digest)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            compressed = f.read()
+        if path.endswith(_ZSTD_SUFFIX):
+            if zstandard is None:
+                raise RuntimeError("Reading this blob requires the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(compressed)
+        if path.endswith(_ZLIB_SUFFIX):
+            return zlib.decompress(compressed)
+        return compressed
+
+    def put_json(self, data: Any) -> str:
+        """Store a JSON-serializable value"""
+        return self.put(json_dumps_bytes(data))
+
+    def get_json(self, digest: Optional[str]) -> Any:
+        """Read a JSON value back, None if the digest is empty or missing"""
+        if not digest:
+            return None
+        data = self.get(digest)
+        return None if data is None else json_loads(data)
+
+    def delete(self, digests: Iterable[str]) -> int:
+        """Remove blobs, returning how many files were deleted"""
+        removed = 0
+        for digest in digests:
+            path = self._find(digest)
+            if path:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def stored_size(self, digest: str) -> int:
+        """Bytes a blob takes on disk, 0 if it does not exist"""
+        path = self._find(digest)
+        return os.path.getsize(path) if path else 0
@@ -0,0 +1,50 @@
+"""Body Document."""
+
+from typing import Any, Optional
+
+from utils import json_dumps_pretty, json_loads
+
+
+class BodyDocument:
+    """Request body with cached JSON text.
+
+    The pretty-printed text is only rebuilt when the body object is replaced
+    or the version counter is bumped with touch(), and text coming back from
+    the editor is only parsed when it differs from the last text seen.
+    """
+
+    def __init__(self):
+        """Initialize an empty document"""
+        self.version = 0
+        self._body: Any = None
+        self._body_version = -1
+        self._text: Optional[str] = None
+        self._parsed_text: Optional[str] = None
+        self._parsed: Any = None
+
+    def touch(self):
+        """Mark the body as mutated in place so the next text() re-serializes"""
+        self.version += 1
+        self._parsed_text = None
+        self._parsed = None
+
+    def text(self, body: Any) -> str:
+        """Return the pretty-printed JSON for body, serializing only on change"""
+        if self._text is None or body is not self._body or self._body_version != self.version:
+            self._body = body
+            self._body_version = self.version
+            self._text = json_dumps_pretty(body)
+            if body is not self._parsed:
+                # The freshly serialized text parses back to the body itself
+                self._parsed_text = self._text
+                self._parsed = body
+        return self._text
+
+    def parse(self, text: str) -> Any:
+        """Parse editor text, reusing the last result when the text is unchanged"""
+        if self._parsed_text is not None and text == self._parsed_text:
+            return self._parsed
+        parsed = json_loads(text)
+        self._parsed_text = text
+        self._parsed = parsed
+        return parsed
@@ -0,0 +1,187 @@
+"""Circuit Breaker."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Open after this many failures in a row
+FAILURE_THRESHOLD = 5
+
+# ... or when at least this share of the recent calls failed
+ERROR_RATE_THRESHOLD = 0.5
+ERROR_RATE_WINDOW = 20
+ERROR_RATE_MIN_CALLS = 10
+
+# Seconds to fail fast before letting a probe request through
+OPEN_SECONDS = 30.0
+
+# Responses with these status codes count as failures, 4xx are the caller's problem
+FAILURE_STATUS_MIN = 500
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending while a circuit is open"""
+
+    def __init__(self, key: Tuple[str, str], retry_in: float):
+        self.key = key
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {key[0]} {key[1]}, "
+                         f"failing fast for another {retry_in:.0f} s")
+
+
+class CircuitBreaker:
+    """Fails requests fast while an endpoint keeps failing
+
+    Closed: requests pass and outcomes are counted. Open: requests raise
+    CircuitOpenError without being sent. After OPEN_SECONDS one probe
+    request is let through (half-open); its outcome closes or reopens the
+    circuit.
+    """
+
+    def __init__(self, key: Tuple[str, str]):
+        self.key = key
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self.times_opened = 0
+        self._recent: Deque[bool] = deque(maxlen=ERROR_RATE_WINDOW)
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self) -> float:
+        return self._recent.count(False) / len(self._recent) if self._recent else 0.0
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError unless a request may be sent now; True when it is the half-open probe"""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            retry_in = self.opened_at + OPEN_SECONDS - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            # A probe that never reported back (e.g. the script run was stopped) is given up on
+            probe_lost = time.monotonic() - self._probe_started > OPEN_SECONDS
+            if self.state == HALF_OPEN and (not self._probe_in_flight or probe_lost):
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+                return True
+            raise CircuitOpenError(self.key, max(retry_in, 0.0))
+
+    def release_probe(self) -> None:
+        """Let another request probe when the probe ended without recording an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    @contextmanager
+    def attempt(self) -> Iterator[None]:
+        """before_request for the enclosed send, releasing the probe however the block ends
+
+        Enter it right before sending, once any waiting is over, and record
+        the outcome inside; an error that is not recorded leaves the circuit
+        as it was instead of blocking it until the probe is given up on.
+        """
+        probe = self.before_request()
+        try:
+            yield
+        finally:
+            if probe:
+                self.release_probe()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._recent.append(True)
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._probe_in_flight = False
+                self._recent.clear()
+
+    def record_failure(self, error: str) -> None:
+        with self._lock:
+            self._recent.append(False)
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open()
+            elif self.state == CLOSED and (
+                self.consecutive_failures >= FAILURE_THRESHOLD
+                or (len(self._recent) >= ERROR_RATE_MIN_CALLS and self.error_rate >= ERROR_RATE_THRESHOLD)
+            ):
+                self._open()
+
+    def record_response(self, status_code: int) -> None:
+        """Count a received response by its status code"""
+        if status_code >= FAILURE_STATUS_MIN:
+            self.record_failure(f"HTTP {status_code}")
+        else:
+            self.record_success()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state, for display"""
+        with self._lock:
+            retry_in = self.opened_at + OPEN_SECONDS - time.monotonic() if self.state == OPEN else 0.0
+            return {
+                "Environment": self.key[0],
+                "Endpoint": self.key[1],
+                "State": self.state,
+                "Consecutive Failures": self.consecutive_failures,
+                "Error Rate": f"{self.error_rate:.0%}",
+                "Times Opened": self.times_opened,
+                "Retry In (s)": round(max(retry_in, 0.0), 1),
+                "Last Error": self.last_error,
+            }
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(env: str, path_template: str) -> CircuitBreaker:
+    """Process-wide breaker for an environment and an unformatted API path"""
+    key = (env, path_template.split("?", 1)[0])
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(key)
+        return breaker
+
+
+def circuit_breaker_stats(env: Optional[str] = None) -> List[Dict[str, Any]]:
+    """One row per breaker, open circuits first"""
+    with _breakers_lock:
+        breakers = [b for key, b in _breakers.items() if env is None or key[0] == env]
+    rows = [breaker.stats() for breaker in breakers]
+    order = {OPEN: 0, HALF_OPEN: 1, CLOSED: 2}
+    rows.sort(key=lambda row: (order[row["State"]], row["Environment"], row["Endpoint"]))
+    return rows
+
+
+def reset_circuit_breakers() -> None:
+    """Close every circuit"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
@@ -0,0 +1,80 @@
+"""Content Encoding."""
+
+import gzip
+import threading
+import zlib
+from typing import Any, Dict, Optional, Set, Tuple
+
+from urllib3.util.request import ACCEPT_ENCODING as _URLLIB3_ACCEPT_ENCODING
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, zstd bodies are only used when it is installed
+    zstandard = None
+
+# Encodings urllib3 can decode here; br and zstd are included when brotli / zstandard are installed
+ACCEPT_ENCODING = ", ".join(_URLLIB3_ACCEPT_ENCODING.split(","))
+
+# Request bodies smaller than this are sent as plain JSON, compressing them costs more than it saves
+DEFAULT_COMPRESSION_MIN_BYTES = 16 * 1024
+
+REQUEST_ENCODINGS = ("gzip", "zstd")
+
+# What decode_body raises for a body that is truncated, corrupt or in an encoding it cannot decode
+DECODE_ERRORS: Tuple[type, ...] = (OSError, EOFError, zlib.error, ValueError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+# Environments that answered 415 to an encoded body, they get plain JSON from then on
+_rejected: Set[Tuple[str, str]] = set()
+_rejected_lock = threading.Lock()
+
+
+def encoding_available(encoding: str) -> bool:
+    """True if request bodies can be encoded with this Content-Encoding here"""
+    return encoding == "gzip" or (encoding == "zstd" and zstandard is not None)
+
+
+def encode_body(data: bytes, encoding: str) -> bytes:
+    """Compress a request body for the given Content-Encoding"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"Unsupported request encoding '{encoding}'")
+
+
+def decode_body(data: bytes, encoding: str) -> bytes:
+    """Decompress a body sent with the given Content-Encoding"""
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=max(len(data) * 64, 1 << 20))
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def request_encoding_for(env: str, env_config: Optional[Dict[str, Any]], body_size: int) -> Optional[str]:
+    """Content-Encoding to send a body of body_size bytes to env with, None for plain JSON
+
+    Environments opt in with "request_encoding": "gzip" or "zstd" in
+    environments_config.json, and may set "request_compression_min_bytes".
+    """
+    config = env_config or {}
+    encoding = config.get("request_encoding")
+    if encoding not in REQUEST_ENCODINGS or not encoding_available(encoding):
+        return None
+    min_bytes = config.get("request_compression_min_bytes") or DEFAULT_COMPRESSION_MIN_BYTES
+    if body_size < min_bytes:
+        return None
+    with _rejected_lock:
+        if (env, encoding) in _rejected:
+            return None
+    return encoding
+
+
+def mark_encoding_rejected(env: str, encoding: str) -> None:
+    """Remember that env does not accept request bodies with this encoding"""
+    with _rejected_lock:
+        _rejected.add((env, encoding))
@@ -0,0 +1,318 @@
+"""Data Sweep."""
+
+import copy
+import io
+import json
+import math
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+
+from batch_run import DEFAULT_MAX_PARALLEL, BatchRun, DeadlineSkipped
+from response_viewer import PathPart, get_node, parse_json_path
+from scenario import FAILED, PASSED, SKIPPED
+from timeouts import Deadline
+
+# Where a column's value can be put in the request
+BINDING_LOCATIONS = ("body", "params", "path", "headers")
+
+# How cell values are converted before they are bound; auto follows the value already at the target
+VALUE_TYPES = ("auto", "string", "number", "boolean", "list", "json")
+
+# Characters of the response kept per row in the results table
+RESPONSE_PREVIEW_CHARS = 300
+
+_TRUE_TEXT = {"true", "yes", "y", "1", "x"}
+_FALSE_TEXT = {"false", "no", "n", "0", ""}
+
+
+class SweepError(ValueError):
+    """A data set or binding that cannot be run"""
+
+
+class Binding(NamedTuple):
+    """One data set column bound to a field of the request"""
+
+    column: str
+    location: str
+    parts: List[PathPart]
+    value_type: str = "auto"
+
+    @property
+    def target(self) -> str:
+        if self.location == "body" and not self.parts:
+            return "body"
+        if self.location == "body":
+            return "body" + format_body_path(self.parts)
+        return f"{self.location}.{self.parts[0]}"
+
+
+def format_body_path(parts: List[PathPart]) -> str:
+    """Body path parts as written in a target, e.g. .studentInfos[0].id"""
+    text = ""
+    for part in parts:
+        text += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return text
+
+
+def parse_target(target: str) -> Dict[str, Any]:
+    """Split a target like body.items[0].code, params.subjectId or path.timer_job_id"""
+    target = (target or "").strip()
+    location, sep, rest = target.partition(".")
+    if "[" in location:
+        location, rest = location.split("[", 1)
+        rest = "[" + rest
+        sep = "."
+    if location not in BINDING_LOCATIONS:
+        raise SweepError(f"Target '{target}' must start with one of: {', '.join(BINDING_LOCATIONS)}")
+    if location == "body":
+        try:
+            parts = parse_json_path(rest) if sep else []
+        except ValueError as e:
+            raise SweepError(f"Target '{target}': {e}")
+        return {"location": location, "parts": parts}
+    if not rest:
+        raise SweepError(f"Target '{target}' needs a name after '{location}.'")
+    return {"location": location, "parts": [rest]}
+
+
+def make_binding(column: str, target: str, value_type: str = "auto") -> Binding:
+    """Validated binding of a column to a target"""
+    if value_type not in VALUE_TYPES:
+        raise SweepError(f"Unknown type '{value_type}' for column '{column}'")
+    parsed = parse_target(target)
+    return Binding(column, parsed["location"], parsed["parts"], value_type)
+
+
+def suggest_bindings(columns: List[str], api: Dict[str, Any]) -> Dict[str, str]:
+    """Guess targets for columns named like a top-level body key, query parameter or path placeholder"""
+    body = api.get("body") if isinstance(api.get("body"), dict) else {}
+    params = api.get("params") or {}
+    path = api.get("path") or api.get("url_path") or ""
+    suggestions = {}
+    for column in columns:
+        name = str(column).strip()
+        if "{" + name + "}" in path:
+            suggestions[column] = f"path.{name}"
+        elif name in body:
+            suggestions[column] = f"body.{name}"
+        elif name in params:
+            suggestions[column] = f"params.{name}"
+    return suggestions
+
+
+def read_data_set(data: bytes, filename: str) -> pd.DataFrame:
+    """Parameter rows from an uploaded CSV or Excel file, every cell read as text"""
+    try:
+        if filename.lower().endswith(".csv"):
+            df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        else:
+            df = pd.read_excel(io.BytesIO(data), dtype=str, keep_default_na=False)
+    except Exception as e:
+        raise SweepError(f"Could not read {filename}: {e}")
+    df.columns = [str(column).strip() for column in df.columns]
+    if df.empty:
+        raise SweepError(f"{filename} has no data rows")
+    return df
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value)) or (isinstance(value, str) and not value.strip())
+
+
+def convert_value(value: Any, value_type: str = "auto") -> Any:
+    """Convert a cell to the value bound into the request"""
+    if hasattr(value, "item"):
+        value = value.item()  # numpy scalars from Excel sheets
+    if _is_blank(value) and value_type != "string":
+        return None
+    text = value.strip() if isinstance(value, str) else value
+
+    if value_type == "string":
+        return "" if value is None else str(value)
+    if value_type == "number":
+        if isinstance(text, (int, float)):
+            return text
+        try:
+            number = float(text)
+        except ValueError:
+            raise SweepError(f"'{value}' is not a number")
+        return int(number) if number.is_integer() and "." not in str(text) else number
+    if value_type == "boolean":
+        if isinstance(text, bool):
+            return text
+        if str(text).lower() in _TRUE_TEXT:
+            return True
+        if str(text).lower() in _FALSE_TEXT:
+            return False
+        raise SweepError(f"'{value}' is not a boolean")
+    if value_type == "list":
+        if isinstance(text, list):
+            return text
+        separator = ";" if ";" in str(text) else ","
+        return [item.strip() for item in str(text).replace("\n", separator).split(separator) if item.strip()]
+    if value_type == "json":
+        try:
+            return json.loads(text) if isinstance(text, str) else text
+        except ValueError as e:
+            raise SweepError(f"Invalid JSON '{value}': {e}")
+    return text
+
+
+def infer_value_type(current: Any) -> str:
+    """Type matching the value a binding replaces, so text cells keep the API's JSON types"""
+    if isinstance(current, bool):
+        return "boolean"
+    if isinstance(current, (int, float)):
+        return "number"
+    if isinstance(current, list):
+        return "list"
+    if isinstance(current, dict):
+        return "json"
+    return "auto"
+
+
+def _current_value(request: Dict[str, Any], binding: Binding) -> Any:
+    """Value at a binding's target in the prepared request, None when there is none"""
+    if binding.location == "body":
+        try:
+            return get_node(request.get("body"), binding.parts)
+        except KeyError:
+            return None
+    if binding.location == "params":
+        return (request.get("params") or {}).get(binding.parts[0])
+    return None
+
+
+def _set_path(container: Any, parts: List[PathPart], value: Any) -> Any:
+    """Set value at parts inside container, creating missing objects and list slots"""
+    if not parts:
+        return value
+    node = container
+    for part, next_part in zip(parts, parts[1:] + [None]):
+        if isinstance(part, int):
+            if not isinstance(node, list):
+                raise SweepError(f"Index [{part}] used on a non-list value")
+            while len(node) <= part:
+                node.append(None)
+        elif not isinstance(node, dict):
+            raise SweepError(f"Key '{part}' used on a non-object value")
+        if next_part is None:
+            node[part] = value
+        else:
+            if not isinstance(node[part] if isinstance(node, list) else node.get(part), (dict, list)):
+                node[part] = [] if isinstance(next_part, int) else {}
+            node = node[part]
+    return container
+
+
+def bind_row(request: Dict[str, Any], bindings: List[Binding], row: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a prepared request with one data set row filled in
+
+    Blank cells leave the request's own value in place. An auto binding is
+    converted to the type of the value it replaces (read_data_set reads
+    every cell as text), and stays text where there is none. Path bindings
+    replace {name} in the URL, so the request must already have its URL.
+    """
+    bound = dict(request)
+    copied = set()
+    for binding in bindings:
+        value_type = binding.value_type
+        if value_type == "auto":
+            value_type = infer_value_type(_current_value(request, binding))
+        value = convert_value(row.get(binding.column), value_type)
+        if value is None:
+            continue
+        if binding.location == "path":
+            placeholder = "{" + str(binding.parts[0]) + "}"
+            if placeholder not in bound.get("url", ""):
+                raise SweepError(f"The URL has no {placeholder} placeholder")
+            bound["url"] = bound["url"].replace(placeholder, quote(str(value), safe=""))
+            continue
+        if binding.location not in copied:
+            current = bound.get(binding.location)
+            bound[binding.location] = copy.deepcopy(current) if current not in (None, "") else {}
+            copied.add(binding.location)
+        if binding.location == "body":
+            bound["body"] = _set_path(bound["body"], binding.parts, value)
+        else:
+            bound[binding.location][binding.parts[0]] = value if binding.location == "params" else str(value)
+    return bound
+
+
+def _response_preview(content: Any) -> str:
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False, default=str)
+    if len(text) > RESPONSE_PREVIEW_CHARS:
+        text = text[:RESPONSE_PREVIEW_CHARS - 3] + "..."
+    return text
+
+
+class SweepResult:
+    """Outcome of every row of a sweep, in data set order"""
+
+    def __init__(self, rows: List[Dict[str, Any]], spans: List[Tuple[int, int]], wall_time: float):
+        self.rows = rows
+        self.spans = spans  # (start_ns, end_ns) of each row, for the trace
+        self.wall_time = wall_time
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts by outcome and the average time of the rows that were sent"""
+        times = [row["Time (ms)"] for row in self.rows if row["Time (ms)"] is not None]
+        return {
+            "total": len(self.rows),
+            PASSED: sum(row["Status"] == PASSED for row in self.rows),
+            FAILED: sum(row["Status"] == FAILED for row in self.rows),
+            SKIPPED: sum(row["Status"] == SKIPPED for row in self.rows),
+            "avg_ms": round(sum(times) / len(times), 1) if times else 0.0,
+            "wall_ms": round(self.wall_time * 1000, 1),
+        }
+
+
+def run_sweep(request: Dict[str, Any], bindings: List[Binding], rows: List[Dict[str, Any]],
+              send: Callable[[Dict[str, Any]], Dict[str, Any]],
+              max_parallel: int = DEFAULT_MAX_PARALLEL,
+              deadline: Optional[Deadline] = None,
+              on_row_done: Optional[Callable[[Dict[str, Any]], None]] = None) -> SweepResult:
+    """Send the request once per data set row with at most max_parallel in flight
+
+    request is prepared once (URL, cookies) on the calling thread; each row
+    is bound onto a copy of it and sent with send from a worker thread.
+    Rows are submitted lazily, so a large data set never has more than
+    max_parallel bound requests in memory. Rows not started before the
+    deadline are skipped. A row fails on a non-2xx status or a value that
+    cannot be bound.
+    """
+    columns = list(dict.fromkeys(binding.column for binding in bindings))
+    results: List[Dict[str, Any]] = [{
+        "Row": index + 1, **{column: row.get(column) for column in columns},
+        "Status": FAILED, "HTTP": None, "Time (ms)": None, "Message": "", "Response": ""
+    } for index, row in enumerate(rows)]
+
+    def on_done(index: int, future: Future) -> None:
+        result = results[index]
+        try:
+            response = future.result()
+        except DeadlineSkipped as e:
+            result["Status"] = SKIPPED
+            result["Message"] = str(e)
+        except Exception as e:
+            result["Message"] = str(e)
+        else:
+            status_code = response.get("status_code")
+            content = response.get("content")
+            result["HTTP"] = status_code
+            result["Time (ms)"] = response.get("time")
+            result["Response"] = _response_preview(content)
+            if 200 <= (status_code or 0) < 300:
+                result["Status"] = PASSED
+            else:
+                message = content.get("error") or content.get("message") if isinstance(content, dict) else None
+                result["Message"] = str(message or f"HTTP {status_code}")
+        if on_row_done is not None:
+            on_row_done(result)
+
+    batch = BatchRun(len(rows), lambda index: send(bind_row(request, bindings, rows[index])), max_parallel, deadline)
+    batch.run(on_done)
+    return SweepResult(results, batch.spans, batch.wall_time)
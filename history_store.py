@@ -0,0 +1,299 @@
+"""History Store."""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from blob_index import BlobIndex
+
+# Number of history rows shown per page in the sidebar
+HISTORY_PAGE_SIZE = 20
+
+# Oldest entries beyond this count are pruned on insert
+HISTORY_MAX_ENTRIES = 100_000
+
+# Status filter choices mapped to status_code ranges (inclusive)
+STATUS_FILTERS = {
+    "All": None,
+    "2xx": (200, 299),
+    "3xx": (300, 399),
+    "4xx": (400, 499),
+    "5xx": (500, 599),
+    "Failed (0)": (0, 0),
+}
+
+# Stored in PRAGMA user_version once the legacy JSON history has been imported
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    environment TEXT,
+    path TEXT,
+    method TEXT,
+    status_code INTEGER,
+    time_ms REAL,
+    config_hash TEXT NOT NULL,
+    body_hash TEXT,
+    response_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_name ON history (name);
+CREATE INDEX IF NOT EXISTS idx_history_environment ON history (environment);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history (status_code);
+CREATE INDEX IF NOT EXISTS idx_history_config_hash ON history (config_hash);
+CREATE INDEX IF NOT EXISTS idx_history_body_hash ON history (body_hash);
+CREATE INDEX IF NOT EXISTS idx_history_response_hash ON history (response_hash);
+CREATE TABLE IF NOT EXISTS bodies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT NOT NULL UNIQUE
+);
+"""
+
+# Bodies are indexed once per distinct hash; the text itself lives only in the blob store
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5 (
+    path, content='history', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, path) VALUES (new.id, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, path) VALUES ('delete', old.id, old.path);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS body_fts USING fts5 (body, content='');
+"""
+
+_LIST_COLUMNS = "id, timestamp, name, environment, path, method, status_code, time_ms"
+_HASH_COLUMNS = ("config_hash", "body_hash", "response_hash")
+
+_stores: Dict[str, "HistoryStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def _body_text(body: Any) -> str:
+    """Searchable text of the request body"""
+    if body is None or body == {}:
+        return ""
+    if isinstance(body, str):
+        return body
+    try:
+        return json.dumps(body, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return str(body)
+
+
+def _fts_query(search: str) -> str:
+    """Turn free text into an FTS5 query, each word matched as a quoted prefix"""
+    terms = [term.replace('"', '""') for term in search.split()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class HistoryStore(BlobIndex):
+    """Per-user API call history backed by SQLite.
+
+    Rows hold the listing columns and the hashes of the request config, request
+    body and response content, which live in a content-addressed BlobStore so
+    repeated calls share one copy. Blobs no longer referenced by any row are
+    deleted when entries are pruned. Free text search over path and request body
+    uses FTS5 when the SQLite build provides it, otherwise only path is matched
+    with LIKE.
+    """
+
+    table = "history"
+    hash_columns = _HASH_COLUMNS
+
+    def __init__(self, db_path: str, blob_dir: str):
+        """Open (and create if needed) the history database"""
+        super().__init__(db_path, blob_dir)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Create tables, indexes and (when available) FTS tables"""
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self._conn.commit()
+
+    @property
+    def schema_version(self) -> int:
+        """Version stored in PRAGMA user_version, 0 before the JSON import"""
+        return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def import_json_history(self, json_path: str) -> int:
+        """One-time import of the legacy api_history.json, oldest entry first"""
+        if self.schema_version >= _SCHEMA_VERSION:
+            return 0
+        entries: List[Dict[str, Any]] = []
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = data if isinstance(data, list) else []
+        except (OSError, ValueError):
+            entries = []
+        with self._lock:
+            # The JSON file is newest first
+            for entry in reversed(entries):
+                self._insert(entry)
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.commit()
+        return len(entries)
+
+    def _insert(self, entry: Dict[str, Any]) -> None:
+        """Write payloads to the blob store and insert the row, without committing"""
+        config = dict(entry.get("config", {}))
+        has_body = "body" in config
+        body = config.pop("body", None)
+
+        config_hash = self.blobs.put_json(config)
+        body_hash = self.blobs.put_json(body) if has_body else None
+        response = entry.get("response")
+        response_hash = self.blobs.put_json(response) if response is not None else None
+
+        if body_hash and self.has_fts:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO bodies (hash) VALUES (?)", (body_hash,))
+            if cursor.rowcount:
+                self._conn.execute(
+                    "INSERT INTO body_fts (rowid, body) VALUES (?, ?)", (cursor.lastrowid, _body_text(body))
+                )
+
+        self._conn.execute(
+            "INSERT INTO history (timestamp, name, environment, path, method, status_code, time_ms, "
+            "config_hash, body_hash, response_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.get("timestamp", ""),
+                entry.get("name", ""),
+                entry.get("environment"),
+                entry.get("path", ""),
+                entry.get("method"),
+                entry.get("status_code"),
+                entry.get("time_ms"),
+                config_hash,
+                body_hash,
+                response_hash,
+            )
+        )
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """Append a history entry and prune the oldest beyond HISTORY_MAX_ENTRIES"""
+        with self._lock:
+            self._insert(entry)
+            cutoff = self._conn.execute(
+                "SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?", (HISTORY_MAX_ENTRIES,)
+            ).fetchone()
+            orphans = self._delete_rows("id <= ?", (cutoff[0],)) if cutoff else []
+            self._commit(orphans)
+
+    def _delete_rows(self, where: str, params: Tuple[Any, ...]) -> List[str]:
+        """Delete rows and their orphaned bodies from the FTS index, returning the orphaned hashes"""
+        orphans = super()._delete_rows(where, params)
+        for digest in orphans:
+            body_row = self._conn.execute("SELECT id FROM bodies WHERE hash = ?", (digest,)).fetchone()
+            if body_row:
+                # Contentless FTS needs the original text to remove it from the index
+                self._conn.execute(
+                    "INSERT INTO body_fts (body_fts, rowid, body) VALUES ('delete', ?, ?)",
+                    (body_row[0], _body_text(self.blobs.get_json(digest)))
+                )
+                self._conn.execute("DELETE FROM bodies WHERE id = ?", (body_row[0],))
+        return orphans
+
+    def _where(self, search: str = "", name: Optional[str] = None, environment: Optional[str] = None,
+               status: Optional[Tuple[int, int]] = None) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause shared by query() and count()"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if name:
+            clauses.append("name = ?")
+            params.append(name)
+        if environment:
+            clauses.append("environment = ?")
+            params.append(environment)
+        if status:
+            clauses.append("status_code BETWEEN ? AND ?")
+            params.extend(status)
+        search = (search or "").strip()
+        if search:
+            if self.has_fts:
+                clauses.append(
+                    "(id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?) OR body_hash IN "
+                    "(SELECT hash FROM bodies WHERE id IN (SELECT rowid FROM body_fts WHERE body_fts MATCH ?)))"
+                )
+                params.extend([_fts_query(search)] * 2)
+            else:
+                clauses.append("path LIKE ?")
+                params.append(f"%{search}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, search: str = "", name: Optional[str] = None, environment: Optional[str] = None,
+              status: Optional[Tuple[int, int]] = None, limit: int = HISTORY_PAGE_SIZE,
+              offset: int = 0) -> List[Dict[str, Any]]:
+        """One page of history entries, newest first, without the stored config"""
+        where, params = self._where(search, name, environment, status)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_LIST_COLUMNS} FROM history{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, search: str = "", name: Optional[str] = None, environment: Optional[str] = None,
+              status: Optional[Tuple[int, int]] = None) -> int:
+        """Number of entries matching the filters"""
+        where, params = self._where(search, name, environment, status)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def distinct(self, column: str) -> List[str]:
+        """Distinct values of an indexed column, for filter choices"""
+        if column not in ("name", "environment"):
+            raise ValueError(f"Unsupported column '{column}'")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {column} FROM history WHERE {column} IS NOT NULL ORDER BY {column}"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Full history entry with the request config and response content read back from blobs"""
+        # Blobs are read under the lock too, so pruning cannot remove them in between
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_LIST_COLUMNS}, {', '.join(_HASH_COLUMNS)} FROM history WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = dict(row)
+            entry["config"] = self.blobs.get_json(entry.pop("config_hash")) or {}
+            body_hash = entry.pop("body_hash")
+            if body_hash:
+                entry["config"]["body"] = self.blobs.get_json(body_hash)
+            entry["response"] = self.blobs.get_json(entry.pop("response_hash"))
+        return entry
+
+    def clear(self) -> None:
+        """Delete every history entry and all stored payloads"""
+        with self._lock:
+            self._conn.execute("DELETE FROM bodies")
+            if self.has_fts:
+                self._conn.execute("INSERT INTO body_fts (body_fts) VALUES ('delete-all')")
+            # The blob directory only holds history payloads
+            self._clear()
+
+
+def get_history_store(db_path: str, blob_dir: str, legacy_json_path: Optional[str] = None) -> HistoryStore:
+    """Shared HistoryStore per database file, importing legacy JSON history on first open"""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = HistoryStore(db_path, blob_dir)
+            if legacy_json_path:
+                store.import_json_history(legacy_json_path)
+            _stores[db_path] = store
+        return store
@@ -0,0 +1,218 @@
+"""HTTP Cache."""
+
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Seconds a response is used without asking the server, unless the API sets cache_ttl
+DEFAULT_CACHE_TTL = 30.0
+
+# Bodies kept across all cacheable APIs before the least recently used are dropped
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Outcomes counted per URL: served from memory, confirmed by a 304, or fetched in full
+HIT, REVALIDATED, MISS = "hit", "revalidated", "miss"
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def cache_ttl(api: Dict[str, Any]) -> float:
+    """Freshness lifetime from the API's cache_ttl, DEFAULT_CACHE_TTL otherwise"""
+    value = api.get("cache_ttl")
+    if isinstance(value, (int, float)) and value >= 0:
+        return float(value)
+    return DEFAULT_CACHE_TTL
+
+
+def _freshness(headers: Dict[str, str], ttl: float) -> Optional[float]:
+    """Seconds the response may be reused without revalidation, None when it must not be stored"""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return min(ttl, float(match.group(1)))
+    return ttl
+
+
+class CacheEntry:
+    """A stored 200 response and the validators used to revalidate it"""
+
+    def __init__(self, response: requests.Response, fresh_for: float):
+        self.url = response.url
+        self.status_code = response.status_code
+        self.headers = dict(response.headers)
+        self.content = response.content
+        self.encoding = response.encoding
+        self.size = len(self.content)
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.expires_at = time.monotonic() + fresh_for
+
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for the validators the server sent"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, outcome: str) -> requests.Response:
+        """A requests.Response with the stored body, marked with the cache outcome"""
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response._content_consumed = True
+        response.encoding = self.encoding
+        response.url = self.url
+        response.elapsed = datetime.timedelta(0)
+        response.request_wire_size = 0
+        response.wire_size = 0
+        response.cache_status = outcome
+        return response
+
+
+class HTTPCache:
+    """LRU cache of GET responses bounded by the total size of their bodies
+
+    Entries are keyed by everything that can change the answer: URL, query
+    parameters, headers and cookies, so users with different cookies never
+    share an entry. A fresh entry is served without a request. A stale one
+    is revalidated with its ETag or Last-Modified, and a 304 renews it
+    without downloading the body again. Cache-Control no-store and max-age
+    from the server are honored.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    @staticmethod
+    def key(api: Dict[str, Any]) -> str:
+        parts = [api.get("method", "GET"), api["url"], api.get("params") or {}, api.get("headers") or {},
+                 api.get("cookies") or {}]
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _count(self, url: str, outcome: str) -> None:
+        # Counted per endpoint, whatever the query parameters were
+        counts = self._counts.setdefault(url.split("?", 1)[0], {HIT: 0, REVALIDATED: 0, MISS: 0})
+        counts[outcome] += 1
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """The entry for key, fresh or stale, marked as most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def fresh_response(self, api: Dict[str, Any]) -> Optional[requests.Response]:
+        """The stored response when it can be used without asking the server"""
+        key = self.key(api)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.fresh():
+                return None
+            self._entries.move_to_end(key)
+            self._count(api["url"], HIT)
+        return entry.to_response(HIT)
+
+    def update(self, key: str, entry: Optional[CacheEntry], response: requests.Response,
+               ttl: float = DEFAULT_CACHE_TTL) -> requests.Response:
+        """Record the server's answer to a (possibly conditional) request and return what to use
+
+        A 304 to a revalidation renews entry and returns it, storing it again
+        if it was evicted while the request was in flight; a 200 is stored if
+        allowed. Anything else is passed through and leaves a stored entry as
+        it is.
+        """
+        fresh_for = _freshness(response.headers, ttl)
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                if fresh_for is not None:
+                    entry.expires_at = time.monotonic() + fresh_for
+                entry.etag = response.headers.get("ETag") or entry.etag
+                entry.last_modified = response.headers.get("Last-Modified") or entry.last_modified
+                if key not in self._entries and fresh_for is not None:
+                    self._store(key, entry)
+                self._count(entry.url, REVALIDATED)
+                revalidated = entry.to_response(REVALIDATED)
+                revalidated.wire_size = response.wire_size
+                revalidated.request_wire_size = response.request_wire_size
+                revalidated.elapsed = response.elapsed
+                return revalidated
+            self._count(response.url, MISS)
+            if response.status_code == 200 and fresh_for is not None and len(response.content) <= self.max_bytes:
+                self._store(key, CacheEntry(response, fresh_for))
+        response.cache_status = MISS
+        return response
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def counts(self, url: str) -> Dict[str, int]:
+        """Hits, revalidations and misses for one URL"""
+        with self._lock:
+            return dict(self._counts.get(url.split("?", 1)[0], {HIT: 0, REVALIDATED: 0, MISS: 0}))
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, stored bytes and outcome totals across all URLs"""
+        with self._lock:
+            totals = {outcome: sum(counts[outcome] for counts in self._counts.values())
+                      for outcome in (HIT, REVALIDATED, MISS)}
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "evictions": self.evictions, **totals}
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """One row per stored response, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            return [{"URL": entry.url, "Size": entry.size, "ETag": entry.etag or "",
+                     "Last-Modified": entry.last_modified or "",
+                     "Fresh For (s)": round(max(0.0, entry.expires_at - now), 1)}
+                    for entry in self._entries.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache: Optional[HTTPCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Process-wide cache shared by every session; entries stay per user through the cookies in the key"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache()
+        return _cache
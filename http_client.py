@@ -4,6 +4,8 @@ import json
 import requests
 from typing import Dict, Any, Optional, Union
 
+from timeouts import DEFAULT_TIMEOUTS, Timeouts
+
 
 class HTTPClient:
     """HTTP Client."""
@@ -13,7 +15,7 @@ class HTTPClient:
         base_url: str = "",
         headers: Optional[Dict[str, str]] = None, 
         cookies: Optional[Union[Dict[str, str], str]] = None,
-        timeout: int = 30
+        timeout: Union[float, Timeouts] = DEFAULT_TIMEOUTS
     ):
         """
         Initialize the HTTP client
@@ -22,7 +24,7 @@ class HTTPClient:
             base_url: Base URL for all requests
             headers: Default headers to include in all requests
             cookies: Cookies to include in all requests (dict or cookie string)
-            timeout: Request timeout in seconds
+            timeout: Seconds for each connect and read, or Timeouts for separate limits
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
@@ -63,7 +65,7 @@ class HTTPClient:
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
         files: Optional[Dict[str, Any]] = None,
-        timeout: Optional[int] = 60
+        timeout: Optional[Union[float, Timeouts]] = None
     ) -> Dict[str, Any]:
         """
         Make HTTP request with specified method
@@ -84,6 +86,8 @@ class HTTPClient:
         method = method.upper()
         url = self._build_url(endpoint)
         request_timeout = timeout or self.timeout
+        if isinstance(request_timeout, Timeouts):
+            request_timeout = request_timeout.for_requests()
         
         # Prepare request arguments
         kwargs = {
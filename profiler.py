@@ -0,0 +1,209 @@
+"""Profiler."""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_MODES = ("cProfile", "Sampling")
+
+# Number of functions shown in the summary table
+PROFILE_TOP_N = 30
+
+# Interval between stack samples in sampling mode
+SAMPLE_INTERVAL_S = 0.001
+
+# Only the newest profiles are kept per user
+PROFILE_KEEP_FILES = 20
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """Periodically records the call stack of one thread
+
+    Sampling from a background thread adds almost no overhead to the profiled
+    code and keeps full stacks, which cProfile does not, so the result can be
+    viewed as a flame graph in speedscope.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: List[Tuple[Tuple[Frame, ...], float]] = []
+        self.duration = 0.0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        """Sampler thread loop"""
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            # Root first, weighted by the time since the previous sample
+            self.samples.append((tuple(reversed(stack)), now - last))
+            last = now
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def top_functions(self, limit: int = PROFILE_TOP_N) -> List[Dict[str, Any]]:
+        """Functions by cumulative time, counting each function once per sample"""
+        cumulative: Dict[Frame, float] = {}
+        own: Dict[Frame, float] = {}
+        hits: Dict[Frame, int] = {}
+        for stack, weight in self.samples:
+            for frame in set(stack):
+                cumulative[frame] = cumulative.get(frame, 0.0) + weight
+                hits[frame] = hits.get(frame, 0) + 1
+            if stack:
+                own[stack[-1]] = own.get(stack[-1], 0.0) + weight
+        ranked = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{
+            "Function": _format_frame(frame),
+            "Samples": hits[frame],
+            "Self (ms)": round(own.get(frame, 0.0) * 1000, 2),
+            "Cumulative (ms)": round(seconds * 1000, 2),
+        } for frame, seconds in ranked]
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples in speedscope's sampled-profile JSON format"""
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, weight in self.samples:
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            samples.append(indexes)
+            weights.append(round(weight * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "api-tester",
+        }
+
+
+def _format_frame(frame: Frame) -> str:
+    """function (file:line) with the path shortened to the file name"""
+    name, filename, line = frame
+    if filename == "~":
+        return name  # built-in functions in cProfile output
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def cprofile_top_functions(profile: cProfile.Profile, limit: int = PROFILE_TOP_N) -> List[Dict[str, Any]]:
+    """Functions by cumulative time from a cProfile run"""
+    stats = pstats.Stats(profile).stats  # type: ignore[attr-defined]
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        "Function": _format_frame((func[2], func[0], func[1])),
+        "Calls": calls,
+        "Self (ms)": round(own * 1000, 2),
+        "Cumulative (ms)": round(cumulative * 1000, 2),
+    } for func, (_, calls, own, cumulative, _) in ranked]
+
+
+def _prune_profiles(profiles_dir: str, keep: int = PROFILE_KEEP_FILES):
+    """Delete the oldest profile files beyond the newest `keep`"""
+    files = sorted(
+        (os.path.join(profiles_dir, name) for name in os.listdir(profiles_dir)),
+        key=os.path.getmtime, reverse=True
+    )
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def profile_call(func: Callable[[], Any], mode: str, profiles_dir: str,
+                 label: str = "run") -> Tuple[Dict[str, Any], Optional[BaseException]]:
+    """Run func under the chosen profiler and save the result to profiles_dir
+
+    Returns a summary (mode, duration, top functions, saved file) and the
+    exception func raised, if any. BaseExceptions such as Streamlit's rerun
+    signal are captured too, so the caller can re-raise them after handling
+    the summary.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'")
+
+    os.makedirs(profiles_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    error: Optional[BaseException] = None
+    start = time.perf_counter()
+
+    if mode == "cProfile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            func()
+        except BaseException as e:
+            error = e
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        file_path = os.path.join(profiles_dir, f"{label}_{stamp}.prof")
+        profiler.dump_stats(file_path)
+        rows = cprofile_top_functions(profiler)
+    else:
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            func()
+        except BaseException as e:
+            error = e
+        finally:
+            sampler.stop()
+        duration = sampler.duration
+        file_path = os.path.join(profiles_dir, f"{label}_{stamp}.speedscope.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(sampler.to_speedscope(f"{label} {stamp}"), f)
+        rows = sampler.top_functions()
+
+    _prune_profiles(profiles_dir)
+    summary = {
+        "mode": mode,
+        "duration_ms": round(duration * 1000, 2),
+        "rows": rows,
+        "file_path": file_path,
+        "created": stamp,
+    }
+    return summary, error
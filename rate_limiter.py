@@ -0,0 +1,158 @@
+"""Rate Limiter."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from utils import load_shared_environments_config
+
+# Used for environments without max_rps / max_concurrent in environments_config.json
+DEFAULT_MAX_RPS = 10.0
+DEFAULT_MAX_CONCURRENT = 6
+
+
+class RateLimitTimeout(Exception):
+    """A request waited longer than its timeout for a rate limit slot"""
+
+
+class RateLimiter:
+    """Token bucket plus concurrency cap, shared by every user of one environment
+
+    Waiting requests are queued per user and served round-robin, so one user's
+    large batch cannot starve a single request from someone else while the
+    aggregate rate still uses the whole budget.
+    """
+
+    def __init__(self, max_rps: float = DEFAULT_MAX_RPS, max_concurrent: int = DEFAULT_MAX_CONCURRENT):
+        self._cond = threading.Condition()
+        self.configure(max_rps, max_concurrent)
+        self._tokens = self.capacity
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._queues: Dict[str, Deque[object]] = {}
+        self._turns: Deque[str] = deque()  # users with waiters, next to be served first
+        self.granted = 0
+        self.total_wait = 0.0
+
+    def configure(self, max_rps: float, max_concurrent: int) -> None:
+        """Change the limits in place; waiting requests pick them up immediately"""
+        with self._cond:
+            self.max_rps = max(0.1, float(max_rps))
+            self.max_concurrent = max(1, int(max_concurrent))
+            # Allow a burst of up to one second's worth of requests
+            self.capacity = max(1.0, self.max_rps)
+            self._cond.notify_all()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled) * self.max_rps)
+        self._refilled = now
+
+    def _leave_queue(self, user: str, ticket: object) -> None:
+        """Remove a ticket, dropping the user's turn once their queue is empty"""
+        queue = self._queues[user]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[user]
+            self._turns.remove(user)
+
+    def acquire(self, user: str = "", timeout: Optional[float] = None) -> float:
+        """Block until a request may be sent, returning the seconds spent waiting"""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = object()
+        with self._cond:
+            if user not in self._queues:
+                self._queues[user] = deque()
+                self._turns.append(user)
+            self._queues[user].append(ticket)
+
+            while True:
+                now = time.monotonic()
+                wait: Optional[float] = None
+                if self._turns[0] == user and self._queues[user][0] is ticket and self._in_flight < self.max_concurrent:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._in_flight += 1
+                        self._leave_queue(user, ticket)
+                        if user in self._queues:
+                            # More requests from this user go to the back of the line
+                            self._turns.remove(user)
+                            self._turns.append(user)
+                        waited = now - start
+                        self.granted += 1
+                        self.total_wait += waited
+                        self._cond.notify_all()
+                        return waited
+                    wait = (1 - self._tokens) / self.max_rps
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._leave_queue(user, ticket)
+                        self._cond.notify_all()
+                        raise RateLimitTimeout(f"No rate limit slot within {timeout} s")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, user: str = "", timeout: Optional[float] = None) -> Iterator[float]:
+        """Hold a slot for the enclosed request, yielding the time waited for it"""
+        waited = self.acquire(user, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load, for display"""
+        with self._cond:
+            return {
+                "Max RPS": self.max_rps,
+                "Max Concurrent": self.max_concurrent,
+                "In Flight": self._in_flight,
+                "Waiting": sum(len(queue) for queue in self._queues.values()),
+                "Waiting Users": len(self._turns),
+                "Granted": self.granted,
+                "Avg Wait (ms)": round(self.total_wait / self.granted * 1000, 1) if self.granted else 0.0,
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def environment_limits(env: str) -> Dict[str, float]:
+    """max_rps and max_concurrent configured for an environment, with defaults"""
+    config = load_shared_environments_config().get(env, {})
+    return {
+        "max_rps": float(config.get("max_rps") or DEFAULT_MAX_RPS),
+        "max_concurrent": int(config.get("max_concurrent") or DEFAULT_MAX_CONCURRENT),
+    }
+
+
+def get_rate_limiter(env: str) -> RateLimiter:
+    """Process-wide limiter for an environment, kept in sync with environments_config.json"""
+    limits = environment_limits(env)
+    with _limiters_lock:
+        limiter = _limiters.get(env)
+        if limiter is None:
+            limiter = _limiters[env] = RateLimiter(limits["max_rps"], limits["max_concurrent"])
+            return limiter
+    if limiter.max_rps != limits["max_rps"] or limiter.max_concurrent != limits["max_concurrent"]:
+        limiter.configure(limits["max_rps"], limits["max_concurrent"])
+    return limiter
+
+
+def rate_limiter_stats() -> List[Dict[str, Any]]:
+    """One row per environment that has sent requests"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return [{"Environment": env, **limiter.stats()} for env, limiter in sorted(limiters.items())]
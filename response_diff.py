@@ -0,0 +1,129 @@
+"""Response Diff."""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from response_viewer import format_json_path, preview_value, type_name
+
+# Array items are matched on the first of these fields that is a unique key on both sides
+DEFAULT_KEY_FIELDS = ("id", "studentId")
+
+# Maximum number of differences kept for display, the total is still counted
+DIFF_ROW_LIMIT = 1000
+
+
+def _child_path(path: str, key: Any) -> str:
+    """Append an object key or array index to a path"""
+    suffix = format_json_path([key])[1:]
+    return path + suffix
+
+
+def _keyed_path(path: str, field: str, value: Any) -> str:
+    """Path of an array item matched by key, in the JSONPath filter form"""
+    if isinstance(value, str):
+        literal = "'" + value.replace("'", "\\'") + "'"
+    elif isinstance(value, bool):
+        literal = "true" if value else "false"
+    else:
+        literal = value
+    return f"{path}[?(@.{field} == {literal})]"
+
+
+def _array_key(left: list, right: list, key_fields: Sequence[str]) -> Optional[str]:
+    """Pick the first key field that uniquely identifies items on both sides"""
+    if not left or not right:
+        return None
+    if not isinstance(left[0], dict) or not isinstance(right[0], dict):
+        return None
+    for field in key_fields:
+        usable = True
+        for items in (left, right):
+            seen = set()
+            for item in items:
+                if not isinstance(item, dict) or field not in item:
+                    usable = False
+                    break
+                value = item[field]
+                if not isinstance(value, (str, int, float, bool)) or value in seen:
+                    usable = False
+                    break
+                seen.add(value)
+            if not usable:
+                break
+        if usable:
+            return field
+    return None
+
+
+def diff_json(left: Any, right: Any, key_fields: Sequence[str] = DEFAULT_KEY_FIELDS,
+              limit: Optional[int] = DIFF_ROW_LIMIT) -> Tuple[List[Dict[str, Any]], int]:
+    """Structural diff of two JSON values
+
+    Objects are compared key by key, arrays of objects are matched on the
+    first usable key field (falling back to position), and equal subtrees are
+    skipped with a single == comparison. Returns (rows, total difference count);
+    at most `limit` rows are kept.
+    """
+    rows: List[Dict[str, Any]] = []
+    total = 0
+
+    def record(path: str, change: str, left_value: Any, right_value: Any):
+        nonlocal total
+        total += 1
+        if limit is None or len(rows) < limit:
+            rows.append({
+                "Path": path,
+                "Change": change,
+                "Left": preview_value(left_value) if change != "added" else "",
+                "Right": preview_value(right_value) if change != "removed" else "",
+            })
+
+    stack: List[Tuple[str, Any, Any]] = [("$", left, right)]
+    while stack:
+        path, l_node, r_node = stack.pop()
+        if l_node == r_node and type(l_node) is type(r_node):
+            continue
+
+        if isinstance(l_node, dict) and isinstance(r_node, dict):
+            children = []
+            for key, l_value in l_node.items():
+                if key in r_node:
+                    children.append((_child_path(path, key), l_value, r_node[key]))
+                else:
+                    record(_child_path(path, key), "removed", l_value, None)
+            for key, r_value in r_node.items():
+                if key not in l_node:
+                    record(_child_path(path, key), "added", None, r_value)
+            stack.extend(reversed(children))
+
+        elif isinstance(l_node, list) and isinstance(r_node, list):
+            field = _array_key(l_node, r_node, key_fields)
+            children = []
+            if field:
+                r_by_key = {item[field]: item for item in r_node}
+                l_keys = set()
+                for item in l_node:
+                    value = item[field]
+                    l_keys.add(value)
+                    if value in r_by_key:
+                        children.append((_keyed_path(path, field, value), item, r_by_key[value]))
+                    else:
+                        record(_keyed_path(path, field, value), "removed", item, None)
+                for item in r_node:
+                    if item[field] not in l_keys:
+                        record(_keyed_path(path, field, item[field]), "added", None, item)
+            else:
+                common = min(len(l_node), len(r_node))
+                for i in range(common):
+                    children.append((_child_path(path, i), l_node[i], r_node[i]))
+                for i in range(common, len(l_node)):
+                    record(_child_path(path, i), "removed", l_node[i], None)
+                for i in range(common, len(r_node)):
+                    record(_child_path(path, i), "added", None, r_node[i])
+            stack.extend(reversed(children))
+
+        elif type_name(l_node) != type_name(r_node):
+            record(path, "type changed", l_node, r_node)
+        else:
+            record(path, "changed", l_node, r_node)
+
+    return rows, total
@@ -0,0 +1,267 @@
+"""Response Query."""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from response_viewer import PathPart, format_json_path, preview_value
+
+try:
+    import jmespath
+except ImportError:  # jmespath is optional, JSONPath is always available
+    jmespath = None
+
+# Maximum number of result rows rendered in the results table
+QUERY_RESULT_ROW_LIMIT = 1000
+
+Match = Tuple[Tuple[PathPart, ...], Any]
+
+_COMPARATORS = {
+    "==": lambda a, b: _value_key(a) == _value_key(b),
+    "!=": lambda a, b: _value_key(a) != _value_key(b),
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+_STEP = re.compile(
+    r"\.\.(?P<descend>[A-Za-z_$][\w$-]*|\*)"
+    r"|\.(?P<key>[A-Za-z_$][\w$-]*)"
+    r"|\.(?P<dot_wild>\*)"
+    r"|\[(?P<bracket_wild>\*)\]"
+    r"|\[(?P<index>-?\d+)\]"
+    r"|\[(?P<slice>-?\d*:-?\d*)\]"
+    r"|\['(?P<quoted>(?:[^'\\]|\\.)*)'\]"
+    r"|\[\?\(@(?P<field>(?:\.[A-Za-z_$][\w$-]*)*)\s*(?P<op>==|!=|<=|>=|<|>)\s*(?P<literal>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|[^)\s]+)\s*\)\]"
+)
+
+
+class ResponseIndex:
+    """Index over a response, built once per response.
+
+    Records the length of every array and, for every key, the paths where it
+    occurs so recursive descent does not re-walk the tree. Equality filters on
+    array fields build a value -> indices map on first use.
+    """
+
+    def __init__(self, content: Any):
+        """Walk content once and record array lengths and key paths"""
+        self.content = content
+        self.array_lengths: Dict[str, int] = {}
+        self.key_paths: Dict[str, List[Match]] = {}
+        self.node_count = 0
+        self._field_indexes: Dict[Tuple[Tuple[PathPart, ...], Tuple[str, ...]], Dict[Any, List[int]]] = {}
+
+        stack: List[Match] = [((), content)]
+        while stack:
+            parts, node = stack.pop()
+            self.node_count += 1
+            children: List[Match] = []
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    child = parts + (key,)
+                    self.key_paths.setdefault(key, []).append((child, value))
+                    if isinstance(value, (dict, list)):
+                        children.append((child, value))
+            elif isinstance(node, list):
+                self.array_lengths[format_json_path(list(parts))] = len(node)
+                for i, value in enumerate(node):
+                    if isinstance(value, (dict, list)):
+                        children.append((parts + (i,), value))
+            # Reversed so nodes are visited, and key paths recorded, in document order
+            stack.extend(reversed(children))
+
+    def largest_arrays(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """The longest arrays in the response as (path, length)"""
+        return sorted(self.array_lengths.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def field_index(self, parts: Tuple[PathPart, ...], array: list, field: Tuple[str, ...]) -> Dict[Any, List[int]]:
+        """Map _value_key(field value) -> item indices for an array, built on first use"""
+        cache_key = (parts, field)
+        if cache_key not in self._field_indexes:
+            index: Dict[Any, List[int]] = {}
+            for i, item in enumerate(array):
+                found, value = _resolve_field(item, field)
+                if found and _is_hashable(value):
+                    index.setdefault(_value_key(value), []).append(i)
+            self._field_indexes[cache_key] = index
+        return self._field_indexes[cache_key]
+
+
+def _value_key(value: Any) -> Tuple[bool, Any]:
+    """Value tagged with whether it is a bool, so true never equals 1 as it does in Python"""
+    return isinstance(value, bool), value
+
+
+def _is_hashable(value: Any) -> bool:
+    """Only JSON scalars are used as index keys"""
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _resolve_field(item: Any, field: Tuple[str, ...]) -> Tuple[bool, Any]:
+    """Follow a dotted field path inside an array item"""
+    value = item
+    for key in field:
+        if not isinstance(value, dict) or key not in value:
+            return False, None
+        value = value[key]
+    return True, value
+
+
+def _parse_literal(text: str) -> Any:
+    """Parse a filter literal: quoted string, number, true/false/null"""
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in ("'", '"'):
+        return text[1:-1].replace("\\" + text[0], text[0])
+    if text in ("true", "false"):
+        return text == "true"
+    if text == "null":
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid filter value '{text}'")
+
+
+@lru_cache(maxsize=256)
+def compile_jsonpath(expression: str) -> Tuple[Tuple[str, Any], ...]:
+    """Compile a JSONPath expression into a tuple of (step kind, argument)"""
+    expression = expression.strip()
+    if not expression.startswith("$"):
+        raise ValueError("JSONPath expressions must start with '$'")
+
+    steps = []
+    pos = 1
+    while pos < len(expression):
+        match = _STEP.match(expression, pos)
+        if not match:
+            raise ValueError(f"Invalid JSONPath near '{expression[pos:]}'")
+        groups = match.groupdict()
+        if groups["descend"] is not None:
+            steps.append(("descend", groups["descend"]))
+        elif groups["key"] is not None:
+            steps.append(("key", groups["key"]))
+        elif groups["quoted"] is not None:
+            steps.append(("key", groups["quoted"].replace("\\'", "'")))
+        elif groups["dot_wild"] is not None or groups["bracket_wild"] is not None:
+            steps.append(("wildcard", None))
+        elif groups["index"] is not None:
+            steps.append(("index", int(groups["index"])))
+        elif groups["slice"] is not None:
+            start, _, stop = groups["slice"].partition(":")
+            steps.append(("slice", (int(start) if start else None, int(stop) if stop else None)))
+        else:
+            field = tuple(key for key in groups["field"].split(".") if key)
+            steps.append(("filter", (field, groups["op"], _parse_literal(groups["literal"]))))
+        pos = match.end()
+    return tuple(steps)
+
+
+@lru_cache(maxsize=256)
+def compile_jmespath(expression: str) -> Any:
+    """Compile a JMESPath expression (requires the jmespath package)"""
+    if jmespath is None:
+        raise ValueError("JMESPath support requires the 'jmespath' package")
+    try:
+        return jmespath.compile(expression)
+    except jmespath.exceptions.ParseError as e:
+        raise ValueError(f"Invalid JMESPath: {e}")
+
+
+def _apply_step(index: ResponseIndex, matches: List[Match], kind: str, arg: Any) -> List[Match]:
+    """Apply one compiled JSONPath step to the current matches"""
+    result: List[Match] = []
+    if kind == "key":
+        for parts, node in matches:
+            if isinstance(node, dict) and arg in node:
+                result.append((parts + (arg,), node[arg]))
+    elif kind == "index":
+        for parts, node in matches:
+            if isinstance(node, list) and -len(node) <= arg < len(node):
+                i = arg % len(node)
+                result.append((parts + (i,), node[i]))
+    elif kind == "slice":
+        start, stop = arg
+        for parts, node in matches:
+            if isinstance(node, list):
+                for i in range(*slice(start, stop).indices(len(node))):
+                    result.append((parts + (i,), node[i]))
+    elif kind == "wildcard":
+        for parts, node in matches:
+            if isinstance(node, dict):
+                result.extend((parts + (k,), v) for k, v in node.items())
+            elif isinstance(node, list):
+                result.extend((parts + (i,), v) for i, v in enumerate(node))
+    elif kind == "filter":
+        field, op, literal = arg
+        compare = _COMPARATORS[op]
+        for parts, node in matches:
+            if not isinstance(node, list):
+                continue
+            if op == "==" and _is_hashable(literal):
+                # Indexed lookup, the map is reused by every later query
+                for i in index.field_index(parts, node, field).get(_value_key(literal), []):
+                    result.append((parts + (i,), node[i]))
+                continue
+            for i, item in enumerate(node):
+                found, value = _resolve_field(item, field)
+                try:
+                    if found and compare(value, literal):
+                        result.append((parts + (i,), item))
+                except TypeError:
+                    pass
+    elif kind == "descend":
+        if arg == "*":
+            for parts, node in matches:
+                stack = [(parts, node)]
+                while stack:
+                    current_parts, current = stack.pop()
+                    children = current.items() if isinstance(current, dict) else enumerate(current) if isinstance(current, list) else ()
+                    for k, v in children:
+                        result.append((current_parts + (k,), v))
+                        stack.append((current_parts + (k,), v))
+        else:
+            candidates = index.key_paths.get(arg, [])
+            roots = [parts for parts, _ in matches]
+            if roots == [()]:
+                result.extend(candidates)
+            else:
+                for candidate_parts, value in candidates:
+                    if any(len(candidate_parts) > len(root) and candidate_parts[:len(root)] == root
+                           for root in roots):
+                        result.append((candidate_parts, value))
+    return result
+
+
+def run_query(index: ResponseIndex, expression: str, language: str = "JSONPath") -> List[Match]:
+    """Evaluate an expression against an indexed response and return (path, value) matches"""
+    if language == "JMESPath":
+        value = compile_jmespath(expression).search(index.content)
+        if isinstance(value, list):
+            return [((i,), v) for i, v in enumerate(value)]
+        return [] if value is None else [((), value)]
+
+    matches: List[Match] = [((), index.content)]
+    for kind, arg in compile_jsonpath(expression):
+        matches = _apply_step(index, matches, kind, arg)
+        if not matches:
+            break
+    return matches
+
+
+def matches_to_rows(matches: List[Match], limit: Optional[int] = QUERY_RESULT_ROW_LIMIT) -> List[Dict[str, Any]]:
+    """Flatten matches into table rows, one column per scalar field of object results"""
+    rows = []
+    for parts, value in matches[:limit]:
+        row: Dict[str, Any] = {"Path": format_json_path(list(parts))}
+        if isinstance(value, dict):
+            for key, field_value in value.items():
+                row[str(key)] = preview_value(field_value) if isinstance(field_value, (dict, list)) else field_value
+        else:
+            row["Value"] = preview_value(value) if isinstance(value, (dict, list)) else value
+        rows.append(row)
+    return rows
@@ -0,0 +1,145 @@
+"""Response Viewer."""
+
+import re
+from typing import Any, Dict, List, Union
+
+# Responses up to this size are rendered in full with st.json
+RESPONSE_INLINE_LIMIT_BYTES = 200 * 1024
+
+# Number of array items shown per page in the tree browser
+ARRAY_PAGE_SIZE = 50
+
+# Scalar previews are cut to this many characters
+PREVIEW_MAX_CHARS = 80
+
+PathPart = Union[str, int]
+
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_$][\w$-]*)|\[(\d+)\]|\['((?:[^'\\]|\\.)*)'\]")
+_SIMPLE_KEY = re.compile(r"^[A-Za-z_$][\w$-]*$")
+
+
+def parse_json_path(path: str) -> List[PathPart]:
+    """Parse a simple JSON path like $.data[0]['some key'] into its parts"""
+    path = (path or "").strip()
+    if path in ("", "$"):
+        return []
+    if path.startswith("$"):
+        path = path[1:]
+    elif not path.startswith((".", "[")):
+        path = "." + path
+
+    parts: List[PathPart] = []
+    pos = 0
+    while pos < len(path):
+        match = _PATH_TOKEN.match(path, pos)
+        if not match:
+            raise ValueError(f"Invalid JSON path near '{path[pos:]}'")
+        key, index, quoted = match.groups()
+        if key is not None:
+            parts.append(key)
+        elif index is not None:
+            parts.append(int(index))
+        else:
+            parts.append(quoted.replace("\\'", "'"))
+        pos = match.end()
+    return parts
+
+
+def format_json_path(parts: List[PathPart]) -> str:
+    """Format path parts back into $.data[0]['some key'] form"""
+    path = "$"
+    for part in parts:
+        if isinstance(part, int):
+            path += f"[{part}]"
+        elif _SIMPLE_KEY.match(part):
+            path += f".{part}"
+        else:
+            escaped = part.replace("'", "\\'")
+            path += f"['{escaped}']"
+    return path
+
+
+def get_node(content: Any, parts: List[PathPart]) -> Any:
+    """Walk content along path parts, raising KeyError if the path does not exist"""
+    node = content
+    for part in parts:
+        if isinstance(node, list) and isinstance(part, int) and 0 <= part < len(node):
+            node = node[part]
+        elif isinstance(node, dict) and str(part) in node:
+            node = node[str(part)]
+        else:
+            raise KeyError(f"Path not found at '{part}'")
+    return node
+
+
+def type_name(value: Any) -> str:
+    """Return the JSON type name of a value"""
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def preview_value(value: Any) -> str:
+    """Short one-line preview of a value without serializing containers"""
+    if isinstance(value, dict):
+        keys = list(value.keys())
+        shown = ", ".join(str(k) for k in keys[:5])
+        return "{" + shown + (", ..." if len(keys) > 5 else "") + "}"
+    if isinstance(value, list):
+        return f"[{len(value)} items]"
+    text = "null" if value is None else str(value)
+    if len(text) > PREVIEW_MAX_CHARS:
+        text = text[:PREVIEW_MAX_CHARS - 3] + "..."
+    return text
+
+
+def summarize_children(node: Any, parts: List[PathPart], page: int = 0,
+                       page_size: int = ARRAY_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Summarize the direct children of a node, one row per child
+
+    Arrays are paged so only page_size rows are built regardless of length.
+    """
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        start = page * page_size
+        items = ((i, node[i]) for i in range(start, min(start + page_size, len(node))))
+    else:
+        return []
+
+    rows = []
+    for key, value in items:
+        rows.append({
+            "Key": key,
+            "Type": type_name(value),
+            "Size": len(value) if isinstance(value, (dict, list, str)) else None,
+            "Preview": preview_value(value),
+            "Path": format_json_path(parts + [key]),
+        })
+    return rows
+
+
+def page_count(node: Any, page_size: int = ARRAY_PAGE_SIZE) -> int:
+    """Number of pages needed to show an array node"""
+    if not isinstance(node, list) or not node:
+        return 1
+    return (len(node) + page_size - 1) // page_size
+
+
+def format_size(num_bytes: int) -> str:
+    """Human readable byte size"""
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    if num_bytes < 1024 * 1024:
+        return f"{num_bytes / 1024:.1f} KB"
+    return f"{num_bytes / (1024 * 1024):.2f} MB"
@@ -0,0 +1,380 @@
+"""Scenario."""
+
+import copy
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from response_query import ResponseIndex, compile_jsonpath, run_query
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, scenarios can always be written as JSON
+    yaml = None
+
+SCENARIOS_DIR = os.path.join(os.path.dirname(__file__), "scenarios")
+
+# Steps sent at the same time when the caller does not say otherwise
+DEFAULT_MAX_PARALLEL = 4
+
+# ${name} placeholders in step bodies, params, paths and headers
+_VARIABLE = re.compile(r"\$\{([A-Za-z_]\w*)\}")
+
+# Keys of a step that override the referenced API configuration
+_OVERRIDE_KEYS = ("method", "path", "body", "params", "headers")
+
+PENDING = "pending"
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class ScenarioError(ValueError):
+    """A scenario definition that cannot be run"""
+
+
+def parse_scenario(text: str, filename: str = "") -> Dict[str, Any]:
+    """Parse a JSON or YAML scenario definition"""
+    if filename.endswith((".yaml", ".yml")) or not text.lstrip().startswith("{"):
+        if yaml is None:
+            raise ScenarioError("YAML scenarios require the 'pyyaml' package, use JSON instead")
+        try:
+            definition = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ScenarioError(f"Invalid YAML: {e}")
+    else:
+        try:
+            definition = json.loads(text)
+        except ValueError as e:
+            raise ScenarioError(f"Invalid JSON: {e}")
+    if not isinstance(definition, dict):
+        raise ScenarioError("A scenario must be an object with a 'steps' list")
+    return definition
+
+
+def list_scenario_files(directory: str = SCENARIOS_DIR) -> List[str]:
+    """Scenario file names in a directory"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith((".json", ".yaml", ".yml")))
+
+
+def template_variables(value: Any) -> Set[str]:
+    """Names of all ${name} placeholders inside a value"""
+    names: Set[str] = set()
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            names.update(_VARIABLE.findall(node))
+        elif isinstance(node, dict):
+            stack.extend(node.keys())
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return names
+
+
+def render_template(value: Any, variables: Dict[str, Any]) -> Any:
+    """Fill in ${name} placeholders
+
+    A string that is exactly one placeholder takes the variable's value as
+    is, so lists and objects extracted from earlier responses can be passed
+    on; placeholders inside longer strings are replaced by their text.
+    """
+    if isinstance(value, str):
+        match = _VARIABLE.fullmatch(value)
+        if match:
+            return variables[match.group(1)]
+        return _VARIABLE.sub(lambda m: str(variables[m.group(1)]), value)
+    if isinstance(value, dict):
+        return {render_template(key, variables): render_template(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render_template(item, variables) for item in value]
+    return value
+
+
+def extract_value(content: Any, expression: str) -> Any:
+    """Evaluate a JSONPath extraction against a response
+
+    Paths made only of keys and indexes yield a single value and fail when
+    nothing matches; wildcards, slices, filters and recursive descent yield
+    the list of all matched values.
+    """
+    steps = compile_jsonpath(expression)
+    matches = run_query(ResponseIndex(content), expression)
+    if all(kind in ("key", "index") for kind, _ in steps):
+        if not matches:
+            raise ScenarioError(f"Nothing matched {expression}")
+        return matches[0][1]
+    return [value for _, value in matches]
+
+
+class ScenarioStep:
+    """One API call of a scenario"""
+
+    def __init__(self, definition: Dict[str, Any], api_configs: Dict[str, Any]):
+        self.id = str(definition.get("id") or "")
+        if not self.id:
+            raise ScenarioError("Every step needs an 'id'")
+        self.api_name = definition.get("api")
+        if self.api_name not in api_configs:
+            raise ScenarioError(f"Step '{self.id}' uses unknown API '{self.api_name}'")
+        self.depends_on: Set[str] = set(definition.get("depends_on") or [])
+        self.extract: Dict[str, str] = dict(definition.get("extract") or {})
+        for name, expression in self.extract.items():
+            try:
+                compile_jsonpath(expression)
+            except ValueError as e:
+                raise ScenarioError(f"Step '{self.id}' extract '{name}': {e}")
+
+        self.api = copy.deepcopy(api_configs[self.api_name])
+        for key in _OVERRIDE_KEYS:
+            if key not in definition:
+                continue
+            override = definition[key]
+            if key == "path":
+                self.api.pop("url_path", None)
+            if isinstance(override, dict) and isinstance(self.api.get(key), dict):
+                # Objects are merged key by key so a step only lists what it changes
+                self.api[key] = {**self.api[key], **override}
+            else:
+                self.api[key] = override
+
+    @property
+    def variables(self) -> Set[str]:
+        """Variables the step's request needs"""
+        return template_variables({key: self.api.get(key) for key in _OVERRIDE_KEYS + ("url_path",)})
+
+
+class Scenario:
+    """A validated scenario: steps, initial variables and the dependency graph
+
+    Dependencies come from each step's depends_on plus, implicitly, the step
+    that extracts every ${variable} the step uses.
+    """
+
+    def __init__(self, definition: Dict[str, Any], api_configs: Dict[str, Any]):
+        self.name = definition.get("name") or "Scenario"
+        self.description = definition.get("description") or ""
+        self.variables: Dict[str, Any] = dict(definition.get("variables") or {})
+        self.max_parallel = int(definition.get("max_parallel") or DEFAULT_MAX_PARALLEL)
+
+        step_definitions = definition.get("steps")
+        if not isinstance(step_definitions, list) or not step_definitions:
+            raise ScenarioError("A scenario needs a non-empty 'steps' list")
+        self.steps: Dict[str, ScenarioStep] = {}
+        for step_definition in step_definitions:
+            step = ScenarioStep(step_definition, api_configs)
+            if step.id in self.steps:
+                raise ScenarioError(f"Duplicate step id '{step.id}'")
+            self.steps[step.id] = step
+
+        producers: Dict[str, str] = {}
+        for step in self.steps.values():
+            for name in step.extract:
+                if name in producers:
+                    raise ScenarioError(f"Variable '{name}' is extracted by both '{producers[name]}' and '{step.id}'")
+                producers[name] = step.id
+
+        for step in self.steps.values():
+            unknown = step.depends_on - self.steps.keys()
+            if unknown:
+                raise ScenarioError(f"Step '{step.id}' depends on unknown step(s) {', '.join(sorted(unknown))}")
+            for name in step.variables:
+                if name in producers:
+                    if producers[name] != step.id:
+                        step.depends_on.add(producers[name])
+                elif name not in self.variables:
+                    raise ScenarioError(f"Step '{step.id}' uses undefined variable '{name}'")
+
+        self.dependents: Dict[str, List[str]] = {step_id: [] for step_id in self.steps}
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                self.dependents[dependency].append(step.id)
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Step ids with every step after its dependencies, raising on cycles"""
+        remaining = {step_id: len(step.depends_on) for step_id, step in self.steps.items()}
+        ready = [step_id for step_id, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            step_id = ready.pop(0)
+            order.append(step_id)
+            for dependent in self.dependents[step_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.steps):
+            cycle = sorted(step_id for step_id, count in remaining.items() if count > 0)
+            raise ScenarioError(f"Dependency cycle between steps {', '.join(cycle)}")
+        return order
+
+    def plan_rows(self) -> List[Dict[str, Any]]:
+        """One row per step, in execution order"""
+        return [{
+            "Step": step_id,
+            "API": self.steps[step_id].api_name,
+            "Depends On": ", ".join(sorted(self.steps[step_id].depends_on)),
+            "Extracts": ", ".join(self.steps[step_id].extract),
+        } for step_id in self.order]
+
+
+class StepResult:
+    """Outcome and timing of one step"""
+
+    def __init__(self, step_id: str):
+        self.step_id = step_id
+        self.status = PENDING
+        self.status_code: Optional[int] = None
+        self.error = ""
+        self.start = 0.0
+        self.end = 0.0
+        self.start_ns = 0
+        self.end_ns = 0
+        self.extracted: Dict[str, Any] = {}
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class ScenarioResult:
+    """Per-step results of a run and its critical path"""
+
+    def __init__(self, scenario: Scenario, results: Dict[str, StepResult], variables: Dict[str, Any],
+                 wall_time: float):
+        self.scenario = scenario
+        self.results = results
+        self.variables = variables
+        self.wall_time = wall_time
+
+    @property
+    def passed(self) -> bool:
+        return all(result.status == PASSED for result in self.results.values())
+
+    def critical_path(self) -> List[str]:
+        """Chain of steps that determined the total run time
+
+        Starts at the step that finished last and repeatedly follows the
+        dependency that finished last before it.
+        """
+        ran = [result for result in self.results.values() if result.status in (PASSED, FAILED)]
+        if not ran:
+            return []
+        current = max(ran, key=lambda result: result.end)
+        path = [current.step_id]
+        while True:
+            dependencies = [self.results[step_id] for step_id in self.scenario.steps[current.step_id].depends_on]
+            if not dependencies:
+                break
+            current = max(dependencies, key=lambda result: result.end)
+            path.append(current.step_id)
+        return list(reversed(path))
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One row per step, in execution order, times in ms from the run start"""
+        critical = set(self.critical_path())
+        rows = []
+        for step_id in self.scenario.order:
+            result = self.results[step_id]
+            ran = result.status in (PASSED, FAILED)
+            rows.append({
+                "Step": step_id,
+                "Status": result.status,
+                "HTTP": result.status_code if result.status_code is not None else "",
+                "Start (ms)": round(result.start * 1000, 1) if ran else None,
+                "Duration (ms)": round(result.duration * 1000, 1) if ran else None,
+                "Critical": "★" if step_id in critical else "",
+                "Extracted": ", ".join(result.extracted),
+                "Error": result.error,
+            })
+        return rows
+
+
+def run_scenario(scenario: Scenario, prepare: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 send: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 max_parallel: Optional[int] = None,
+                 on_step_done: Optional[Callable[[StepResult], None]] = None) -> ScenarioResult:
+    """Run a scenario's steps as a DAG, independent steps concurrently
+
+    prepare turns a step's API configuration into a request (URL, cookies)
+    and runs on the calling thread before anything is sent. send performs a
+    prepared request from a worker thread and returns it in the api_responses
+    format. Variables are only read and written on the calling thread, which
+    fills in each step's placeholders right before submitting it. A step fails
+    on a non-2xx status or a failed extraction, and every step depending on
+    it is skipped.
+    """
+    prepared = {step_id: prepare(step.api) for step_id, step in scenario.steps.items()}
+    variables = dict(scenario.variables)
+    results = {step_id: StepResult(step_id) for step_id in scenario.steps}
+    waiting = {step_id: len(step.depends_on) for step_id, step in scenario.steps.items()}
+    run_start = time.perf_counter()
+
+    def execute(step: ScenarioStep, request: Dict[str, Any]) -> StepResult:
+        result = results[step.id]
+        result.start = time.perf_counter() - run_start
+        result.start_ns = time.time_ns()
+        try:
+            response = send(request)
+            result.status_code = response.get("status_code")
+            if not 200 <= (result.status_code or 0) < 300:
+                content = response.get("content")
+                message = content.get("error") or content.get("message") if isinstance(content, dict) else None
+                raise ScenarioError(message or f"HTTP {result.status_code}")
+            for name, expression in step.extract.items():
+                result.extracted[name] = extract_value(response.get("content"), expression)
+            result.status = PASSED
+        except Exception as e:
+            result.status = FAILED
+            result.error = str(e)
+        result.end = time.perf_counter() - run_start
+        result.end_ns = time.time_ns()
+        return result
+
+    def skip_dependents(step_id: str):
+        stack = list(scenario.dependents[step_id])
+        while stack:
+            dependent = stack.pop()
+            if results[dependent].status == PENDING:
+                results[dependent].status = SKIPPED
+                results[dependent].error = f"Dependency '{step_id}' did not pass"
+                stack.extend(scenario.dependents[dependent])
+
+    with ThreadPoolExecutor(max_workers=max_parallel or scenario.max_parallel) as executor:
+        running = {}
+
+        def submit(step_id: str):
+            step = scenario.steps[step_id]
+            request = copy.deepcopy(prepared[step_id])
+            for key in _OVERRIDE_KEYS + ("url",):
+                if key in request:
+                    request[key] = render_template(request[key], variables)
+            running[executor.submit(execute, step, request)] = step_id
+
+        for step_id in scenario.order:
+            if waiting[step_id] == 0:
+                submit(step_id)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                result = future.result()
+                if on_step_done is not None:
+                    on_step_done(result)
+                if result.status != PASSED:
+                    skip_dependents(step_id)
+                    continue
+                variables.update(result.extracted)
+                for dependent in scenario.dependents[step_id]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0 and results[dependent].status == PENDING:
+                        submit(dependent)
+
+    return ScenarioResult(scenario, results, variables, time.perf_counter() - run_start)
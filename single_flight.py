@@ -0,0 +1,90 @@
+"""Single Flight."""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils import json_dumps_bytes
+
+
+def request_fingerprint(method: str, url: str, params: Any = None, body: Any = None) -> str:
+    """Hash of what a request sends, equal for requests the backend cannot tell apart"""
+    digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+    digest.update(json_dumps_bytes(params or {}))
+    digest.update(b"\n")
+    if body not in (None, ""):
+        digest.update(body if isinstance(body, bytes) else json_dumps_bytes(body))
+    return digest.hexdigest()
+
+
+class _Call:
+    """One in-flight call and the callers waiting for its outcome"""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, sharing its outcome with duplicates
+
+    A caller asking for a key that is already in flight does not start
+    another call; it waits for the running one and gets the same result,
+    or the same exception. The key is forgotten as soon as the call
+    finishes, so a later request with the same key is sent again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Result of fn for key and whether it came from a call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(key)
+                self.started += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> List[Dict[str, Any]]:
+        """Keys currently being sent and how many duplicates wait on each"""
+        with self._lock:
+            return [{"key": call.key, "waiters": call.waiters} for call in self._calls.values()]
+
+
+_send_flights: Optional[SingleFlight] = None
+_send_flights_lock = threading.Lock()
+
+
+def get_send_flights() -> SingleFlight:
+    """Process-wide registry of in-flight sends, shared by every session"""
+    global _send_flights
+    with _send_flights_lock:
+        if _send_flights is None:
+            _send_flights = SingleFlight()
+        return _send_flights
@@ -0,0 +1,290 @@
+"""Statistic Analysis."""
+
+import io
+import multiprocessing
+import os
+import pickle
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from utils import json_loads
+
+# First byte of a pickle of protocol 2 or later, never the start of an Arrow IPC stream
+_PICKLE_PROTO = b"\x80"
+
+# Worker processes for analysis and export; each handles one course at a time
+ANALYSIS_WORKERS = max(1, min(2, (os.cpu_count() or 1)))
+
+# Seconds between progress updates of a page waiting on the pool
+ANALYSIS_POLL_SECONDS = 0.25
+
+# failCriteria codes used in ProcessingResult/statistic responses
+fail_criteria = {
+    "None": 0,
+    "SemesterRank": 1,
+    "GraduationRule": 2,
+    "IsNotPET": 3,
+    "MinCourseDuration": 4,
+    "MinSemRank": 5,
+    "MaxSemRank": 6,
+    "Lack TPF": 7,
+    "Lack DipC": 8,
+    "Lack DipO": 9,
+    "Lack DipE": 10,
+    "Lack TPE": 11,
+    "Lack CDS": 12,
+}
+
+
+def _build_assessment_lookup(settings_list):
+    """Map (subjectId, semesterId) -> assessment metadata"""
+    lookup = {}
+    for s in settings_list:
+        key = (s.get("subjectId"), s.get("semesterId"))
+        lookup[key] = {
+            "CreditUnit": s.get("creditUnit"),
+            "IsGraded": s.get("isGraded"),
+            "SubjectCategory": s.get("subjectCategory"),
+            "DiplomaCategory": s.get("diplomaCategory"),
+        }
+    return lookup
+
+
+def analyze_processing_result(content: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Analyze ProcessingResult/statistic response into two DataFrames (marks, summary)
+
+    Handles different response structures across environments.
+    Tries multiple possible paths for studentStatistics.
+    """
+    mark_rows = []
+    summary_rows = []
+
+    student_statistics = []
+
+    # Try different possible structures
+    # First, try SIT structure: content['data'][0]['studentStatistics']
+    data = content.get("data")
+    if data and isinstance(data, list) and len(data) > 0:
+        student_statistics = data[0].get("studentStatistics", [])
+
+    # If not found, try direct under content: content['studentStatistics']
+    if not student_statistics:
+        student_statistics = content.get("studentStatistics", [])
+
+    # If still not found, try under data as dict: content['data']['studentStatistics']
+    if not student_statistics and data and isinstance(data, dict):
+        student_statistics = data.get("studentStatistics", [])
+
+    # If still not found, try nested data: content['data'][0]['data']['studentStatistics'] or similar
+    if not student_statistics and data and isinstance(data, list) and len(data) > 0:
+        inner_data = data[0].get("data")
+        if inner_data and isinstance(inner_data, dict):
+            student_statistics = inner_data.get("studentStatistics", [])
+
+    for stu in student_statistics:
+        course_code = stu.get("courseCode", "")
+        course_name = stu.get("courseName", "")
+        semester_name = stu.get("semesterName", "")
+        student_fail_criteria = stu.get("failedCriteria", {})
+        student_fail_items = student_fail_criteria.get("failedItems", [])
+        fail_dict = {item.get("failCriteria"): item.get("value") for item in student_fail_items}
+
+        summary_rows.append(
+            {
+                "CourseCode": course_code,
+                "CourseName": course_name,
+                "SemesterName": semester_name,
+                "StudentId": stu.get("studentId"),
+                "StudentName": stu.get("studentName"),
+                "AdmissionNumber": stu.get("admissionNumber"),
+                "CourseVersion": stu.get("courseVersion"),
+                "StudentStatus": stu.get("studentStatus"),
+                "FutureStudentStatus": stu.get("futureStudentStatus"),
+                "StudentClassification": stu.get("studentClassification"),
+                "SemesterRank": stu.get("semesterRank"),
+                "StageOfStudy": stu.get("stageOfStudy"),
+                "GPA": stu.get("gpa"),
+                "CGPA": stu.get("cgpa"),
+                "WA": stu.get("wa"),
+                "CWA": stu.get("cwa"),
+                "CU": stu.get("cu"),
+                "TCU": stu.get("tcu"),
+                "ComputedAcadStanding": stu.get("computedAcadStanding"),
+                "AdjustAcadStanding": stu.get("adjustAcadStanding"),
+                "AcadStandingReason": stu.get("acadStandingReason"),
+                "Lack TPF": fail_dict.get(fail_criteria["Lack TPF"], 0) if isinstance(fail_criteria["Lack TPF"], int) else fail_dict.get(fail_criteria["Lack TPF"], 0),
+                "Lack DipC": fail_dict.get(fail_criteria["Lack DipC"], 0) if isinstance(fail_criteria["Lack DipC"], int) else fail_dict.get(fail_criteria["Lack DipC"], 0),
+                "Lack DipO": fail_dict.get(fail_criteria["Lack DipO"], 0) if isinstance(fail_criteria["Lack DipO"], int) else fail_dict.get(fail_criteria["Lack DipO"], 0),
+                "Lack DipE": fail_dict.get(fail_criteria["Lack DipE"], 0) if isinstance(fail_criteria["Lack DipE"], int) else fail_dict.get(fail_criteria["Lack DipE"], 0),
+                "Lack TPE": fail_dict.get(fail_criteria["Lack TPE"], 0) if isinstance(fail_criteria["Lack TPE"], int) else fail_dict.get(fail_criteria["Lack TPE"], 0),
+                "Lack CDS": fail_dict.get(fail_criteria["Lack CDS"], 0) if isinstance(fail_criteria["Lack CDS"], int) else fail_dict.get(fail_criteria["Lack CDS"], 0),
+            }
+        )
+
+        assess_lookup = _build_assessment_lookup(
+            stu.get("cummulativeAssessmentSettings", []) + stu.get("currentAssessmentSettings", [])
+        )
+
+        all_marks = {}
+        for m in stu.get("cummulativeSubjectMarks", []):
+            all_marks[m.get("id")] = m
+        for m in stu.get("currentSubjectMarks", []):
+            all_marks[m.get("id")] = m
+
+        for m in all_marks.values():
+            assess = assess_lookup.get((m.get("subjectId"), m.get("semesterId")), {})
+            mark_rows.append(
+                {
+                    "CourseCode": course_code,
+                    "CourseName": course_name,
+                    "StudentId": stu.get("studentId"),
+                    "StudentName": stu.get("studentName"),
+                    "AdmissionNumber": stu.get("admissionNumber"),
+                    "CourseVersion": stu.get("courseVersion"),
+                    "SubjectCode": m.get("subjectCode"),
+                    "SubjectId": m.get("subjectId"),
+                    "SemesterId": m.get("semesterId"),
+                    "SubjectComputedMark": m.get("subjectComputedMark"),
+                    "FinalSubjectGrade": m.get("finalSubjectGrade"),
+                    "SpecialGrade": m.get("specialGrade"),
+                    "NgpPenalty": m.get("ngpPenalty"),
+                    "ByPassSubjectType": m.get("byPassSubjectType"),
+                    "ContributedComponentPercentage": m.get("contributedComponentPercentage"),
+                    "AttemptNumber": m.get("attemptNumber"),
+                    "CreditUnit": assess.get("CreditUnit", ""),
+                    "IsGraded": assess.get("IsGraded", ""),
+                    "SubjectCategory": assess.get("SubjectCategory", ""),
+                    "DiplomaCategory": assess.get("DiplomaCategory", ""),
+                    "Lack TPF": fail_dict.get(fail_criteria["Lack TPF"], 0) if isinstance(fail_criteria["Lack TPF"], int) else fail_dict.get(fail_criteria["Lack TPF"], 0),
+                    "Lack DipC": fail_dict.get(fail_criteria["Lack DipC"], 0) if isinstance(fail_criteria["Lack DipC"], int) else fail_dict.get(fail_criteria["Lack DipC"], 0),
+                    "Lack DipO": fail_dict.get(fail_criteria["Lack DipO"], 0) if isinstance(fail_criteria["Lack DipO"], int) else fail_dict.get(fail_criteria["Lack DipO"], 0),
+                    "Lack DipE": fail_dict.get(fail_criteria["Lack DipE"], 0) if isinstance(fail_criteria["Lack DipE"], int) else fail_dict.get(fail_criteria["Lack DipE"], 0),
+                    "Lack TPE": fail_dict.get(fail_criteria["Lack TPE"], 0) if isinstance(fail_criteria["Lack TPE"], int) else fail_dict.get(fail_criteria["Lack TPE"], 0),
+                    "Lack CDS": fail_dict.get(fail_criteria["Lack CDS"], 0) if isinstance(fail_criteria["Lack CDS"], int) else fail_dict.get(fail_criteria["Lack CDS"], 0),
+                }
+            )
+
+    df_marks = pd.DataFrame(mark_rows)
+    df_summary = pd.DataFrame(summary_rows)
+
+    if not df_marks.empty:
+        df_marks.sort_values(by=["StudentName", "SubjectCode"], inplace=True, ignore_index=True)
+
+    return df_marks, df_summary
+
+
+def export_dfs_to_excel_bytes(df_marks: pd.DataFrame, df_summary: pd.DataFrame) -> bytes:
+    """Write two DataFrames to an Excel file in memory and return bytes."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        df_marks.to_excel(writer, sheet_name="Subject Marks", index=False)
+        df_summary.to_excel(writer, sheet_name="Student Summary", index=False)
+    output.seek(0)
+    return output.read()
+
+
+def export_df_to_excel_bytes(df: pd.DataFrame, sheet_name: str) -> bytes:
+    """Write one DataFrame to an Excel file in memory and return bytes."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+    output.seek(0)
+    return output.read()
+
+
+def pack_frame(df: pd.DataFrame) -> bytes:
+    """A DataFrame as bytes for crossing process boundaries
+
+    Arrow IPC when every column has one type, which the receiver reads
+    without copying numeric columns; pickle protocol 5 for frames with
+    mixed-type columns (a credit unit that is a number or "") that Arrow
+    cannot represent.
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except pa.ArrowException:
+        return pickle.dumps(df, protocol=5)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def unpack_frame(data: bytes) -> pd.DataFrame:
+    """A DataFrame read back from pack_frame bytes"""
+    if data[:1] == _PICKLE_PROTO:
+        return pickle.loads(data)
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+
+
+def analyze_statistic_bytes(raw: bytes) -> Tuple[bytes, bytes]:
+    """Parse a raw ProcessingResult/statistic body and analyze it, frames returned packed
+
+    Runs in a worker process: the raw response goes in as bytes instead of
+    a pickled dict of every student, and the two frames come back packed.
+    """
+    df_marks, df_summary = analyze_processing_result(json_loads(raw))
+    return pack_frame(df_marks), pack_frame(df_summary)
+
+
+def export_statistic_excel(marks: bytes, summary: bytes) -> bytes:
+    """Excel workbook of packed analyzed frames"""
+    return export_dfs_to_excel_bytes(unpack_frame(marks), unpack_frame(summary))
+
+
+def _parquet_bytes(df: pd.DataFrame) -> bytes:
+    """One DataFrame as Parquet, mixed-type columns written as text"""
+    output = io.BytesIO()
+    try:
+        df.to_parquet(output, index=False)
+    except pa.ArrowException:
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].map(lambda value: None if value is None else str(value))
+        output = io.BytesIO()
+        df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def export_statistic_parquet(marks: bytes, summary: bytes) -> bytes:
+    """Zip of subject_marks.parquet and student_summary.parquet from packed analyzed frames"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("subject_marks.parquet", _parquet_bytes(unpack_frame(marks)))
+        archive.writestr("student_summary.parquet", _parquet_bytes(unpack_frame(summary)))
+    return output.getvalue()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """Process-wide pool, started on first use with spawned workers
+
+    Spawn rather than fork: the server process runs many threads and
+    forking it could copy a lock held by one of them.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def submit_analysis(fn, *args) -> Future:
+    """Run fn in the analysis pool, starting a new pool once if a worker died"""
+    global _pool
+    try:
+        return get_analysis_pool().submit(fn, *args)
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return get_analysis_pool().submit(fn, *args)
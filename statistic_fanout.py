@@ -0,0 +1,194 @@
+"""Statistic Fan-out."""
+
+import copy
+import functools
+import re
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from batch_run import DEFAULT_MAX_PARALLEL, BatchRun, DeadlineSkipped
+from scenario import FAILED, PASSED, SKIPPED
+from statistic_analysis import unpack_frame
+from timeouts import Deadline
+from utils import json_loads
+
+# Admission numbers sent in one ProcessingResult/statistic request
+STATISTIC_CHUNK_SIZE = 200
+
+# Characters of an error response kept as the row's message
+MESSAGE_CHARS = 300
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+class FanoutError(ValueError):
+    """Course codes or admission numbers that cannot be run"""
+
+
+class StatisticRequest(NamedTuple):
+    """One request of a fan-out: a course and one chunk of its admission numbers"""
+
+    course_code: str
+    chunk: int
+    chunks: int
+    body: Dict[str, Any]
+
+
+def parse_codes(text: str) -> List[str]:
+    """Codes separated by commas, semicolons or whitespace, first occurrence kept"""
+    return list(dict.fromkeys(code for code in _SEPARATORS.split(text or "") if code))
+
+
+def plan_statistic_requests(body: Dict[str, Any], course_codes: List[str], admission_numbers: List[str],
+                            chunk_size: int = STATISTIC_CHUNK_SIZE) -> List[StatisticRequest]:
+    """One copy of body per course and chunk of admission numbers
+
+    Every course gets the same admission numbers; an empty list sends each
+    course once with an empty admissionNumbers, as a single run would.
+    """
+    if not course_codes:
+        raise FanoutError("Enter at least one course code")
+    if chunk_size < 1:
+        raise FanoutError("Chunk size must be at least 1")
+    chunks = [admission_numbers[i:i + chunk_size] for i in range(0, len(admission_numbers), chunk_size)] or [[]]
+    planned = []
+    for course_code in course_codes:
+        for index, numbers in enumerate(chunks):
+            chunk_body = copy.deepcopy(body) if isinstance(body, dict) else {}
+            chunk_body["courseCode"] = course_code
+            chunk_body["admissionNumbers"] = numbers
+            planned.append(StatisticRequest(course_code, index + 1, len(chunks), chunk_body))
+    return planned
+
+
+def _error_message(response: Dict[str, Any]) -> str:
+    """Message of a failed response, from its JSON error fields or its text"""
+    content = response.get("content")
+    if content is None and response.get("raw"):
+        try:
+            content = json_loads(response["raw"])
+        except ValueError:
+            content = response["raw"].decode("utf-8", errors="replace")
+    if isinstance(content, dict):
+        content = content.get("error") or content.get("message") or content
+    text = str(content or f"HTTP {response.get('status_code')}")
+    return text if len(text) <= MESSAGE_CHARS else text[:MESSAGE_CHARS - 3] + "..."
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Frames stacked in order, chunks without students left out"""
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class FanoutResult:
+    """Per-request outcome plus the merged analysis of every request that passed"""
+
+    def __init__(self, rows: List[Dict[str, Any]], spans: List[Tuple[int, int]],
+                 df_marks: pd.DataFrame, df_summary: pd.DataFrame, wall_time: float):
+        self.rows = rows
+        self.spans = spans  # (start_ns, end_ns) of each request, for the trace
+        self.df_marks = df_marks
+        self.df_summary = df_summary
+        self.wall_time = wall_time
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts by outcome, merged row counts and wall time"""
+        return {
+            "total": len(self.rows),
+            "courses": len({row["Course"] for row in self.rows}),
+            PASSED: sum(row["Status"] == PASSED for row in self.rows),
+            FAILED: sum(row["Status"] == FAILED for row in self.rows),
+            SKIPPED: sum(row["Status"] == SKIPPED for row in self.rows),
+            "students": len(self.df_summary),
+            "mark_rows": len(self.df_marks),
+            "wall_ms": round(self.wall_time * 1000, 1),
+        }
+
+
+def run_statistic_fanout(request: Dict[str, Any], planned: List[StatisticRequest],
+                         send: Callable[[Dict[str, Any]], Dict[str, Any]],
+                         analyze: Callable[[bytes], Future],
+                         max_parallel: int = DEFAULT_MAX_PARALLEL,
+                         deadline: Optional[Deadline] = None,
+                         on_progress: Optional[Callable[[int, int, int], None]] = None) -> FanoutResult:
+    """Send every planned request with at most max_parallel in flight, analyzing each as it arrives
+
+    request is prepared once (URL, cookies) on the calling thread and gets
+    each planned body in turn. send runs in worker threads and must return
+    the raw body under "raw". Each successful response is handed to analyze
+    right away, which returns a future of the packed (marks, summary)
+    frames, so analysis of early courses overlaps fetching later ones.
+    on_progress(fetched, analyzed, total) is called from the calling thread.
+    Requests not started before the deadline are skipped.
+    """
+    total = len(planned)
+    rows: List[Dict[str, Any]] = [{
+        "Course": item.course_code, "Chunk": f"{item.chunk}/{item.chunks}",
+        "Admission Numbers": len(item.body["admissionNumbers"]), "Status": FAILED, "HTTP": None,
+        "Time (ms)": None, "Analysis (ms)": None, "Students": None, "Mark Rows": None, "Message": ""
+    } for item in planned]
+    frames: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+    counts = {"fetched": 0, "analyzed": 0}
+    batch = BatchRun(total, lambda index: send({**request, "body": planned[index].body}), max_parallel, deadline)
+
+    def on_analyzed(index: int, submitted: float, future: Future) -> None:
+        counts["analyzed"] += 1
+        row = rows[index]
+        row["Analysis (ms)"] = round((time.perf_counter() - submitted) * 1000, 1)
+        try:
+            packed_marks, packed_summary = future.result()
+            df_marks, df_summary = unpack_frame(packed_marks), unpack_frame(packed_summary)
+        except Exception as e:
+            row["Message"] = f"Analysis failed: {e}"
+            return
+        frames[index] = (df_marks, df_summary)
+        row["Status"] = PASSED
+        row["Students"] = len(df_summary)
+        row["Mark Rows"] = len(df_marks)
+
+    def on_fetched(index: int, future: Future) -> None:
+        counts["fetched"] += 1
+        row = rows[index]
+        try:
+            response = future.result()
+        except DeadlineSkipped as e:
+            row["Status"] = SKIPPED
+            row["Message"] = str(e)
+            response = None
+        except Exception as e:
+            row["Message"] = str(e)
+            response = None
+        if response is None:
+            counts["analyzed"] += 1
+            return
+        row["HTTP"] = response.get("status_code")
+        row["Time (ms)"] = response.get("time")
+        if 200 <= (row["HTTP"] or 0) < 300 and response.get("raw"):
+            try:
+                submitted = time.perf_counter()
+                batch.follow(analyze(response["raw"]), functools.partial(on_analyzed, index, submitted))
+                return
+            except Exception as e:
+                row["Message"] = f"Analysis failed: {e}"
+        else:
+            row["Message"] = _error_message(response)
+        counts["analyzed"] += 1
+
+    def on_round() -> None:
+        if on_progress is not None:
+            on_progress(counts["fetched"], counts["analyzed"], total)
+
+    batch.run(on_fetched, on_round)
+
+    # Merged in plan order, so the result does not depend on which response came first
+    ordered = [frames[index] for index in sorted(frames)]
+    df_marks = _concat([marks for marks, _ in ordered])
+    df_summary = _concat([summary for _, summary in ordered])
+    if not df_marks.empty:
+        df_marks.sort_values(by=["CourseCode", "StudentName", "SubjectCode"], inplace=True, ignore_index=True,
+                             kind="stable")
+    return FanoutResult(rows, batch.spans, df_marks, df_summary, batch.wall_time)
@@ -0,0 +1,122 @@
+import os
+import threading
+
+import pytest
+
+import history_store
+from blob_index import BlobIndex
+from blob_store import BlobStore
+from history_store import HistoryStore
+
+
+class Items(BlobIndex):
+    table = "items"
+    hash_columns = ("a", "b")
+
+    def __init__(self, db_path, blob_dir):
+        super().__init__(db_path, blob_dir)
+        self._conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, a TEXT, b TEXT)")
+
+    def add(self, a, b=None):
+        with self._lock:
+            row = (self.blobs.put(a), self.blobs.put(b) if b else None)
+            self._conn.execute("INSERT INTO items (a, b) VALUES (?, ?)", row)
+            self._commit()
+
+    def delete(self, where, params=()):
+        with self._lock:
+            return self._commit(self._delete_rows(where, params))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "api_history.db"), str(tmp_path / "blobs"))
+
+
+def entry(body=None, response=None):
+    return {"timestamp": "2024-05-01 10:00:00", "name": "Get Students", "environment": "SIT",
+            "path": "/students", "method": "POST", "status_code": 200, "time_ms": 1.0,
+            "config": {"method": "POST", "body": body}, "response": response}
+
+
+def blob_files(tmp_path):
+    return [name for _, _, files in os.walk(tmp_path / "blobs") for name in files]
+
+
+def test_blob_round_trip_and_dedupe(tmp_path):
+    blobs = BlobStore(str(tmp_path / "blobs"))
+    digest = blobs.put(b"payload" * 100)
+    assert blobs.put(b"payload" * 100) == digest
+    assert blobs.get(digest) == b"payload" * 100
+    assert len(blob_files(tmp_path)) == 1
+    assert blobs.stored_size(digest) < 700
+
+
+def test_uncompressed_blob(tmp_path):
+    blobs = BlobStore(str(tmp_path / "blobs"))
+    digest = blobs.put(b"PK\x03\x04 already zipped", compress=False)
+    assert blobs.stored_size(digest) == len(b"PK\x03\x04 already zipped")
+    assert blobs.get(digest) == b"PK\x03\x04 already zipped"
+
+
+def test_missing_blob(tmp_path):
+    blobs = BlobStore(str(tmp_path / "blobs"))
+    assert blobs.get("0" * 64) is None
+    assert blobs.get_json(None) is None
+    assert blobs.delete(["0" * 64]) == 0
+
+
+def test_only_unreferenced_blobs_are_deleted(tmp_path):
+    items = Items(str(tmp_path / "items.db"), str(tmp_path / "blobs"))
+    items.add(b"shared", b"first")
+    items.add(b"second", b"shared")
+    assert items.delete("id = 1") == 1
+    assert len(blob_files(tmp_path)) == 2
+    assert items.delete("1 = 1") == 2
+    assert blob_files(tmp_path) == []
+
+
+def test_clear_removes_the_blob_directory(tmp_path):
+    items = Items(str(tmp_path / "items.db"), str(tmp_path / "blobs"))
+    items.add(b"a", b"b")
+    with items._lock:
+        items._clear()
+    assert not os.path.exists(tmp_path / "blobs")
+    items.add(b"a")
+    assert len(blob_files(tmp_path)) == 1
+
+
+def test_identical_payloads_share_one_blob(store, tmp_path):
+    for _ in range(3):
+        store.add(entry(body={"id": 1}, response={"ok": True}))
+    # config, body and response
+    assert len(blob_files(tmp_path)) == 3
+
+
+def test_pruning_removes_orphaned_blobs_only(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, "HISTORY_MAX_ENTRIES", 2)
+    store.add(entry(body={"id": 1}, response={"first": True}))
+    store.add(entry(body={"id": 1}, response={"second": True}))
+    store.add(entry(body={"id": 1}, response={"third": True}))
+    assert store.count() == 2
+    responses = [store.get(row["id"])["response"] for row in store.query()]
+    assert responses == [{"third": True}, {"second": True}]
+    # The shared config and body stay, the first response is gone
+    assert len(blob_files(tmp_path)) == 4
+
+
+def test_concurrent_adds_keep_every_blob(store, monkeypatch):
+    monkeypatch.setattr(history_store, "HISTORY_MAX_ENTRIES", 5)
+
+    def add_many():
+        for i in range(50):
+            store.add(entry(body={"id": i % 3}, response={"n": i % 4}))
+
+    threads = [threading.Thread(target=add_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for row in store.query():
+        full = store.get(row["id"])
+        assert full["config"]["body"] is not None and full["response"] is not None
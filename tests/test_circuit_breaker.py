@@ -0,0 +1,134 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import (CLOSED, ERROR_RATE_MIN_CALLS, FAILURE_THRESHOLD, HALF_OPEN, OPEN, OPEN_SECONDS,
+                             CircuitBreaker, CircuitOpenError)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic time that only moves when the test advances it"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(("SIT", "/api/items"))
+
+
+def trip(breaker):
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure("boom")
+
+
+def test_closed_breaker_lets_requests_through(breaker):
+    assert breaker.before_request() is False
+    assert breaker.state == CLOSED
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure("boom")
+    assert breaker.state == CLOSED
+    breaker.record_failure("boom")
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_request()
+    assert error.value.retry_in == OPEN_SECONDS
+
+
+def test_success_resets_the_consecutive_count(breaker):
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure("boom")
+    breaker.record_success()
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_error_rate(breaker):
+    for _ in range(ERROR_RATE_MIN_CALLS // 2):
+        breaker.record_success()
+        breaker.record_failure("boom")
+    assert breaker.consecutive_failures == 1
+    assert breaker.state == OPEN
+
+
+def test_4xx_is_not_a_failure(breaker):
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_response(404)
+    assert breaker.state == CLOSED
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_response(503)
+    assert breaker.state == OPEN
+    assert breaker.last_error == "HTTP 503"
+
+
+def test_single_probe_after_open_seconds(breaker, clock):
+    trip(breaker)
+    clock[0] += OPEN_SECONDS
+    assert breaker.before_request() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_successful_probe_closes(breaker, clock):
+    trip(breaker)
+    clock[0] += OPEN_SECONDS
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.before_request() is False
+
+
+def test_failed_probe_reopens(breaker, clock):
+    trip(breaker)
+    clock[0] += OPEN_SECONDS
+    breaker.before_request()
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_lost_probe_is_given_up_on(breaker, clock):
+    trip(breaker)
+    clock[0] += OPEN_SECONDS
+    breaker.before_request()
+    clock[0] += OPEN_SECONDS + 1
+    assert breaker.before_request() is True
+
+
+def test_attempt_releases_an_unrecorded_probe(breaker, clock):
+    trip(breaker)
+    clock[0] += OPEN_SECONDS
+    with pytest.raises(RuntimeError):
+        with breaker.attempt():
+            raise RuntimeError("connection setup failed")
+    assert breaker.state == HALF_OPEN
+    with breaker.attempt():
+        breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_attempt_raises_while_open(breaker):
+    trip(breaker)
+    with pytest.raises(CircuitOpenError):
+        with breaker.attempt():
+            pytest.fail("the block must not run while the circuit is open")
+
+
+def test_reset_closes(breaker):
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CLOSED
+    assert breaker.before_request() is False
+
+
+def test_breakers_are_shared_per_path_template():
+    first = circuit_breaker.get_circuit_breaker("SIT", "/api/items/{id}?page=1")
+    assert circuit_breaker.get_circuit_breaker("SIT", "/api/items/{id}") is first
+    assert circuit_breaker.get_circuit_breaker("UAT", "/api/items/{id}") is not first
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from data_sweep import SweepError, bind_row, convert_value, make_binding
+
+
+class TestConvertValue:
+    def test_auto_strips_text_and_keeps_other_values(self):
+        assert convert_value("  abc ") == "abc"
+        assert convert_value(7) == 7
+
+    @pytest.mark.parametrize("blank", [None, "", "   ", float("nan")])
+    def test_blank_is_none(self, blank):
+        assert convert_value(blank) is None
+        assert convert_value(blank, "number") is None
+
+    def test_string_keeps_blanks_and_spaces(self):
+        assert convert_value(None, "string") == ""
+        assert convert_value(" 007 ", "string") == " 007 "
+
+    def test_number(self):
+        assert convert_value("42", "number") == 42
+        assert convert_value(" 4.5", "number") == 4.5
+        assert convert_value("3.0", "number") == 3.0
+        assert isinstance(convert_value("3.0", "number"), float)
+        assert convert_value(2.5, "number") == 2.5
+
+    def test_numpy_scalars(self):
+        assert convert_value(np.int64(3), "number") == 3
+        assert type(convert_value(np.float64(1.5))) is float
+
+    def test_not_a_number(self):
+        with pytest.raises(SweepError, match="not a number"):
+            convert_value("abc", "number")
+
+    @pytest.mark.parametrize("text, expected", [("Yes", True), ("x", True), ("1", True), ("false", False),
+                                                ("N", False), ("0", False)])
+    def test_boolean(self, text, expected):
+        assert convert_value(text, "boolean") is expected
+
+    def test_not_a_boolean(self):
+        with pytest.raises(SweepError, match="not a boolean"):
+            convert_value("maybe", "boolean")
+
+    def test_list_splits_on_semicolons_commas_or_lines(self):
+        assert convert_value("a, b,,c", "list") == ["a", "b", "c"]
+        assert convert_value("1,5; 2,5", "list") == ["1,5", "2,5"]
+        assert convert_value("a\nb", "list") == ["a", "b"]
+
+    def test_json(self):
+        assert convert_value('{"id": [1, 2]}', "json") == {"id": [1, 2]}
+        with pytest.raises(SweepError, match="Invalid JSON"):
+            convert_value("{id}", "json")
+
+
+class TestBindRow:
+    REQUEST = {
+        "method": "POST",
+        "url": "https://sit.example/api/students/{studentId}/grades",
+        "params": {"page": 1},
+        "headers": {"accept": "application/json"},
+        "body": {"schoolYear": "2024", "items": [{"code": "old"}]},
+    }
+
+    def test_fills_every_location(self):
+        bindings = [make_binding("student", "path.studentId"), make_binding("page", "params.page", "number"),
+                    make_binding("tenant", "headers.x-tenant"), make_binding("code", "body.items[0].code"),
+                    make_binding("extra", "body.items[1].tags", "list")]
+        bound = bind_row(self.REQUEST, bindings,
+                         {"student": "a/b 1", "page": "3", "tenant": 12, "code": "new", "extra": "x;y"})
+        assert bound["url"] == "https://sit.example/api/students/a%2Fb%201/grades"
+        assert bound["params"] == {"page": 3}
+        assert bound["headers"] == {"accept": "application/json", "x-tenant": "12"}
+        assert bound["body"] == {"schoolYear": "2024", "items": [{"code": "new"}, {"tags": ["x", "y"]}]}
+
+    def test_does_not_change_the_prepared_request(self):
+        bind_row(self.REQUEST, [make_binding("code", "body.items[0].code")], {"code": "new"})
+        assert self.REQUEST["body"]["items"] == [{"code": "old"}]
+
+    def test_blank_cell_keeps_the_request_value(self):
+        bound = bind_row(self.REQUEST, [make_binding("code", "body.items[0].code")], {"code": " "})
+        assert bound["body"]["items"][0]["code"] == "old"
+
+    def test_whole_body(self):
+        bound = bind_row(self.REQUEST, [make_binding("payload", "body", "json")], {"payload": "[1, 2]"})
+        assert bound["body"] == [1, 2]
+
+    def test_missing_path_placeholder(self):
+        with pytest.raises(SweepError, match="no {classId} placeholder"):
+            bind_row(self.REQUEST, [make_binding("c", "path.classId")], {"c": "10A"})
+
+    def test_scalar_on_the_way_is_replaced(self):
+        bound = bind_row(self.REQUEST, [make_binding("c", "body.schoolYear[1].from")], {"c": "x"})
+        assert bound["body"]["schoolYear"] == [None, {"from": "x"}]
+
+    def test_key_on_a_list(self):
+        with pytest.raises(SweepError, match="non-object"):
+            bind_row(self.REQUEST, [make_binding("c", "body.items.code")], {"c": "x"})
+
+    def test_request_without_params(self):
+        request = {"url": "https://sit.example/api", "body": None}
+        bound = bind_row(request, [make_binding("p", "params.q"), make_binding("b", "body.id", "number")],
+                         {"p": "term", "b": "5"})
+        assert (bound["params"], bound["body"]) == ({"q": "term"}, {"id": 5})
+
+
+@pytest.mark.parametrize("target", ["query.page", "params", "body.items[x]"])
+def test_invalid_targets(target):
+    with pytest.raises(SweepError):
+        make_binding("column", target)
+
+
+def test_unknown_value_type():
+    with pytest.raises(SweepError, match="Unknown type"):
+        make_binding("column", "body.id", "date")
+
+
+class TestAutoType:
+    REQUEST = {
+        "url": "https://sit.example/api/classes",
+        "params": {"page": 1, "keyword": "x"},
+        "body": {"numberOfStudents": 10, "studentIds": ["S1"], "isActive": False, "score": 1.5,
+                 "filter": {"year": 2024}, "name": "old"},
+    }
+
+    @pytest.mark.parametrize("target, cell, expected", [
+        ("body.numberOfStudents", "20", 20),
+        ("body.score", "7.5", 7.5),
+        ("body.studentIds", "a,b", ["a", "b"]),
+        ("body.isActive", "yes", True),
+        ("body.filter", '{"year": 2025}', {"year": 2025}),
+        ("body.name", " new ", "new"),
+        ("body.missing", "20", "20"),
+        ("params.page", "3", 3),
+        ("params.keyword", "42", "42"),
+    ])
+    def test_follows_the_value_it_replaces(self, target, cell, expected):
+        bound = bind_row(self.REQUEST, [make_binding("c", target)], {"c": cell})
+        location, _, name = target.partition(".")
+        assert bound[location][name] == expected
+
+    def test_explicit_type_wins(self):
+        bound = bind_row(self.REQUEST, [make_binding("c", "body.numberOfStudents", "string")], {"c": "20"})
+        assert bound["body"]["numberOfStudents"] == "20"
+
+    def test_invalid_cell_for_the_inferred_type(self):
+        with pytest.raises(SweepError, match="not a number"):
+            bind_row(self.REQUEST, [make_binding("c", "body.numberOfStudents")], {"c": "twenty"})
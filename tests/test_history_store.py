@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from history_store import STATUS_FILTERS, HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "api_history.db"), str(tmp_path / "blobs"))
+
+
+def entry(name="Get Students", status_code=200, body=None, response=None, environment="SIT", path="/students"):
+    config = {"method": "POST", "path": path, "headers": {"accept": "application/json"}}
+    if body is not None:
+        config["body"] = body
+    return {"timestamp": "2024-05-01 10:00:00", "name": name, "environment": environment, "path": path,
+            "method": "POST", "status_code": status_code, "time_ms": 12.5, "config": config,
+            "response": response}
+
+
+def blob_files(tmp_path):
+    return [name for _, _, files in os.walk(tmp_path / "blobs") for name in files]
+
+
+def test_get_reads_the_payloads_back(store):
+    store.add(entry(body={"courseCode": "MATH101"}, response={"data": [1, 2]}))
+    row = store.query()[0]
+    assert "config" not in row
+    full = store.get(row["id"])
+    assert full["config"]["body"] == {"courseCode": "MATH101"}
+    assert full["config"]["headers"] == {"accept": "application/json"}
+    assert full["response"] == {"data": [1, 2]}
+    assert store.get(row["id"] + 1) is None
+
+
+def test_query_is_newest_first_and_paged(store):
+    for i in range(5):
+        store.add(entry(name=f"api {i}"))
+    assert [row["name"] for row in store.query(limit=2, offset=1)] == ["api 3", "api 2"]
+    assert store.count() == 5
+
+
+def test_filters(store):
+    store.add(entry(name="a", status_code=200))
+    store.add(entry(name="b", status_code=500, environment="UAT"))
+    store.add(entry(name="a", status_code=404, environment="UAT"))
+    assert store.count(name="a") == 2
+    assert store.count(environment="UAT", status=STATUS_FILTERS["5xx"]) == 1
+    assert store.distinct("environment") == ["SIT", "UAT"]
+    with pytest.raises(ValueError):
+        store.distinct("path")
+
+
+def test_search_matches_path_and_body(store):
+    store.add(entry(path="/students/search", body={"keyword": "nguyen"}))
+    store.add(entry(path="/courses", body={"keyword": "tran"}))
+    assert store.count(search="students") == 1
+    if store.has_fts:
+        assert [row["path"] for row in store.query(search="tran")] == ["/courses"]
+
+
+def test_clear(store, tmp_path):
+    store.add(entry(body={"id": 1}, response={"ok": True}))
+    store.clear()
+    assert store.count() == 0
+    assert blob_files(tmp_path) == []
+    store.add(entry(body={"id": 1}))
+    assert store.get(store.query()[0]["id"])["config"]["body"] == {"id": 1}
+
+
+def test_legacy_json_is_imported_once(store, tmp_path):
+    legacy = tmp_path / "api_history.json"
+    # The JSON file is newest first
+    legacy.write_text(json.dumps([entry(name="newer"), entry(name="older")]), encoding="utf-8")
+    assert store.import_json_history(str(legacy)) == 2
+    assert [row["name"] for row in store.query()] == ["newer", "older"]
+    assert store.import_json_history(str(legacy)) == 0
+    assert store.count() == 2
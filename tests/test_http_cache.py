@@ -0,0 +1,101 @@
+import datetime
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_cache import HIT, MISS, REVALIDATED, HTTPCache, cache_ttl
+
+API = {"method": "GET", "url": "https://sit.example/api/subjects", "params": {"page": 1}, "headers": {},
+       "cookies": {"Cookies": "a"}}
+
+
+def response(status_code=200, content=b'{"ok": true}', **headers):
+    result = requests.Response()
+    result.status_code = status_code
+    result.headers = CaseInsensitiveDict(headers)
+    result._content = content
+    result._content_consumed = True
+    result.url = API["url"]
+    result.elapsed = datetime.timedelta(milliseconds=5)
+    result.wire_size = len(content)
+    result.request_wire_size = 0
+    return result
+
+
+def fetch(cache, api=API, answer=None):
+    """What make_http_request does with a cache: look the entry up, then record the answer"""
+    key = cache.key(api)
+    entry = cache.get(key)
+    return cache.update(key, entry, answer if answer is not None else response(ETag='"v1"'), cache_ttl(api))
+
+
+def test_fresh_entry_is_served_from_memory():
+    cache = HTTPCache()
+    first = fetch(cache)
+    assert first.cache_status == MISS
+    hit = cache.fresh_response(API)
+    assert (hit.cache_status, hit.json()) == (HIT, {"ok": True})
+    assert cache.counts(API["url"]) == {HIT: 1, REVALIDATED: 0, MISS: 1}
+
+
+def test_entries_are_per_cookie():
+    cache = HTTPCache()
+    fetch(cache)
+    assert cache.fresh_response({**API, "cookies": {"Cookies": "b"}}) is None
+
+
+def test_stale_entry_is_revalidated_with_a_304():
+    cache = HTTPCache()
+    fetch(cache, {**API, "cache_ttl": 0})
+    assert cache.fresh_response(API) is None
+    entry = cache.get(cache.key(API))
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    revalidated = fetch(cache, answer=response(304, b""))
+    assert (revalidated.status_code, revalidated.cache_status, revalidated.content) == (200, REVALIDATED,
+                                                                                        b'{"ok": true}')
+    assert cache.fresh_response(API) is not None
+
+
+def test_304_for_an_entry_evicted_in_flight_still_returns_its_body():
+    cache = HTTPCache()
+    fetch(cache, {**API, "cache_ttl": 0})
+    key = cache.key(API)
+    entry = cache.get(key)
+    cache.clear()
+    revalidated = cache.update(key, entry, response(304, b""))
+    assert (revalidated.cache_status, revalidated.content) == (REVALIDATED, b'{"ok": true}')
+    assert cache.get(key) is entry
+
+
+def test_no_store_and_errors_are_not_cached():
+    cache = HTTPCache()
+    fetch(cache, answer=response(**{"Cache-Control": "no-store"}))
+    fetch(cache, {**API, "url": API["url"] + "/2"}, response(500))
+    assert cache.stats()["entries"] == 0
+
+
+def test_max_age_shortens_the_ttl():
+    cache = HTTPCache()
+    fetch(cache, answer=response(**{"Cache-Control": "max-age=0"}))
+    assert cache.fresh_response(API) is None
+
+
+def test_least_recently_used_bodies_are_evicted_by_size():
+    cache = HTTPCache(max_bytes=25)
+    apis = [{**API, "url": f"{API['url']}/{i}"} for i in range(3)]
+    for api in apis[:2]:
+        fetch(cache, api, response(content=b"x" * 10))
+    cache.get(cache.key(apis[0]))
+    fetch(cache, apis[2], response(content=b"y" * 10))
+    assert cache.fresh_response(apis[0]) is not None
+    assert cache.fresh_response(apis[1]) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entry_expires(monkeypatch):
+    cache = HTTPCache()
+    fetch(cache, {**API, "cache_ttl": 5})
+    now = time.monotonic()
+    monkeypatch.setattr("http_cache.time.monotonic", lambda: now + 6)
+    assert cache.fresh_response(API) is None
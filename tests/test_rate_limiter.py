@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import RateLimiter, RateLimitTimeout
+
+
+def wait_for_waiting(limiter, count):
+    """Block until count requests are queued, so threads enqueue in a known order"""
+    for _ in range(500):
+        if limiter.stats()["Waiting"] == count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{count} requests never queued")
+
+
+def test_burst_up_to_one_second_of_requests():
+    limiter = RateLimiter(max_rps=5, max_concurrent=10)
+    waits = []
+    for _ in range(5):
+        waits.append(limiter.acquire())
+        limiter.release()
+    assert max(waits) < 0.05
+    assert limiter.stats()["Granted"] == 5
+
+
+def test_rate_is_enforced_after_the_burst():
+    limiter = RateLimiter(max_rps=20, max_concurrent=10)
+    for _ in range(20):
+        with limiter.slot():
+            pass
+    with limiter.slot() as waited:
+        pass
+    assert waited >= 0.03
+
+
+def test_concurrency_cap_times_out():
+    limiter = RateLimiter(max_rps=100, max_concurrent=1)
+    with limiter.slot():
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(timeout=0.05)
+    assert limiter.stats()["Waiting"] == 0
+    with limiter.slot(timeout=0.05):
+        assert limiter.stats()["In Flight"] == 1
+    assert limiter.stats()["In Flight"] == 0
+
+
+def test_slot_is_released_on_error():
+    limiter = RateLimiter(max_rps=100, max_concurrent=1)
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError
+    assert limiter.stats()["In Flight"] == 0
+
+
+def test_configure_clamps_limits():
+    limiter = RateLimiter(max_rps=0, max_concurrent=0)
+    assert (limiter.max_rps, limiter.max_concurrent, limiter.capacity) == (0.1, 1, 1.0)
+
+
+def test_waiting_users_are_served_round_robin():
+    limiter = RateLimiter(max_rps=1000, max_concurrent=1)
+    order = []
+
+    def request(user):
+        with limiter.slot(user, timeout=5):
+            order.append(user)
+
+    threads = []
+    with limiter.slot("holder"):
+        for queued, user in enumerate(["batch", "batch", "batch", "single"], start=1):
+            thread = threading.Thread(target=request, args=(user,))
+            thread.start()
+            threads.append(thread)
+            wait_for_waiting(limiter, queued)
+        assert limiter.stats()["Waiting Users"] == 2
+    for thread in threads:
+        thread.join(5)
+    assert order == ["batch", "single", "batch", "batch"]
@@ -0,0 +1,120 @@
+import pytest
+
+import response_query
+from response_query import ResponseIndex, compile_jsonpath, matches_to_rows, run_query
+
+CONTENT = {
+    "data": {
+        "students": [
+            {"id": 1, "name": "An", "class": {"code": "10A"}, "score": 8.5},
+            {"id": 2, "name": "Binh", "class": {"code": "10B"}, "score": 6},
+            {"id": 3, "name": "Chi", "class": {"code": "10A"}, "score": None},
+        ],
+        "total": 3,
+        "page size": 50,
+    },
+    "message": "ok",
+}
+
+
+@pytest.fixture
+def index():
+    return ResponseIndex(CONTENT)
+
+
+def values(index, expression):
+    return [value for _, value in run_query(index, expression)]
+
+
+def paths(index, expression):
+    return [tuple(parts) for parts, _ in run_query(index, expression)]
+
+
+def test_keys_and_index(index):
+    assert values(index, "$.data.total") == [3]
+    assert values(index, "$.data.students[1].name") == ["Binh"]
+    assert values(index, "$.data.students[-1].id") == [3]
+    assert values(index, "$.data.students[5]") == []
+
+
+def test_quoted_key(index):
+    assert values(index, "$.data['page size']") == [50]
+
+
+def test_slice_and_wildcards(index):
+    assert values(index, "$.data.students[0:2].id") == [1, 2]
+    assert values(index, "$.data.students[1:].id") == [2, 3]
+    assert values(index, "$.data.students[*].id") == [1, 2, 3]
+    assert values(index, "$.data.students.*.id") == [1, 2, 3]
+
+
+def test_root(index):
+    assert values(index, "$") == [CONTENT]
+
+
+def test_recursive_descent_by_key(index):
+    assert values(index, "$..code") == ["10A", "10B", "10A"]
+    assert paths(index, "$..code")[0] == ("data", "students", 0, "class", "code")
+
+
+def test_recursive_descent_below_a_match(index):
+    assert values(index, "$.data.students[1]..code") == ["10B"]
+
+
+def test_recursive_descent_wildcard(index):
+    assert 3 in values(index, "$.data..*")
+    small = ResponseIndex({"a": {"b": 1}, "c": [2]})
+    assert sorted(paths(small, "$..*")) == [("a",), ("a", "b"), ("c",), ("c", 0)]
+
+
+def test_equality_filter_uses_the_field_index(index):
+    assert values(index, "$.data.students[?(@.class.code == '10A')].id") == [1, 3]
+    assert (("data", "students"), ("class", "code")) in index._field_indexes
+    assert values(index, "$.data.students[?(@.id == 2)].name") == ["Binh"]
+
+
+def test_comparison_filters(index):
+    assert values(index, "$.data.students[?(@.score >= 6)].id") == [1, 2]
+    assert values(index, "$.data.students[?(@.name != 'An')].id") == [2, 3]
+    assert values(index, "$.data.students[?(@.score == null)].id") == [3]
+
+
+def test_filter_skips_incomparable_values(index):
+    assert values(index, "$.data.students[?(@.score < 7)].id") == [2]
+
+
+@pytest.mark.parametrize("expression", ["data.total", "$.data[", "$.data[?(@.id ~ 1)]", "$.data[?(@.id == abc)]"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        compile_jsonpath(expression)
+
+
+def test_jmespath_without_the_package(index, monkeypatch):
+    monkeypatch.setattr(response_query, "jmespath", None)
+    response_query.compile_jmespath.cache_clear()
+    with pytest.raises(ValueError, match="jmespath"):
+        run_query(index, "data.total", "JMESPath")
+
+
+def test_largest_arrays(index):
+    assert index.largest_arrays() == [("$.data.students", 3)]
+
+
+def test_matches_to_rows(index):
+    rows = matches_to_rows(run_query(index, "$.data.students[0:2]"))
+    assert rows[0] == {"Path": "$.data.students[0]", "id": 1, "name": "An", "class": "{code}", "score": 8.5}
+    assert matches_to_rows(run_query(index, "$.data.total")) == [{"Path": "$.data.total", "Value": 3}]
+    assert len(matches_to_rows(run_query(index, "$..id"), limit=2)) == 2
+
+
+def test_booleans_never_equal_numbers():
+    index = ResponseIndex({"items": [{"id": 1}, {"id": True}, {"id": 0}, {"id": False}, {"id": 1.0}]})
+    assert paths(index, "$.items[?(@.id == 1)]") == [("items", 0), ("items", 4)]
+    assert paths(index, "$.items[?(@.id == true)]") == [("items", 1)]
+    assert paths(index, "$.items[?(@.id == false)]") == [("items", 3)]
+    assert paths(index, "$.items[?(@.id != 0)]") == [("items", 0), ("items", 1), ("items", 3), ("items", 4)]
+
+
+def test_recursive_descent_excludes_the_starting_node():
+    index = ResponseIndex({"x": {"b": {"b": 1}}})
+    assert paths(index, "$.x.b..b") == [("x", "b", "b")]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight, request_fingerprint
+
+
+def wait_for_waiters(flights, count):
+    for _ in range(500):
+        if sum(call["waiters"] for call in flights.in_flight()) == count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{count} duplicates never attached")
+
+
+def run_duplicates(flights, fn, count):
+    """Start a leader and count duplicates of key "k", then let fn finish; returns each caller's outcome"""
+    release = threading.Event()
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flights.do("k", lambda: fn(release)))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count + 1)]
+    threads[0].start()
+    while not flights.in_flight():
+        time.sleep(0.01)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_waiters(flights, count)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_duplicates_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def send(release):
+        calls.append(1)
+        release.wait(5)
+        return "response"
+
+    outcomes = run_duplicates(flights, send, 3)
+    assert len(calls) == 1
+    assert sorted(outcomes) == [("response", False)] + [("response", True)] * 3
+    assert (flights.started, flights.coalesced) == (1, 3)
+    assert flights.in_flight() == []
+
+
+def test_duplicates_get_the_same_error():
+    flights = SingleFlight()
+    error = RuntimeError("connection reset")
+
+    def send(release):
+        release.wait(5)
+        raise error
+
+    outcomes = run_duplicates(flights, send, 2)
+    assert outcomes == [error] * 3
+
+
+def test_key_is_sent_again_once_finished():
+    flights = SingleFlight()
+    assert flights.do("k", lambda: 1) == (1, False)
+    assert flights.do("k", lambda: 2) == (2, False)
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: flights.do("b", lambda: "inner")) == (("inner", False), False)
+
+
+@pytest.mark.parametrize("other", [
+    ("POST", "https://sit.example/x", {"page": 2}, {"id": 1}),
+    ("POST", "https://sit.example/y", {"page": 1}, {"id": 1}),
+    ("PUT", "https://sit.example/x", {"page": 1}, {"id": 1}),
+    ("POST", "https://sit.example/x", {"page": 1}, {"id": 2}),
+])
+def test_fingerprint_tells_requests_apart(other):
+    assert request_fingerprint("POST", "https://sit.example/x", {"page": 1}, {"id": 1}) != request_fingerprint(*other)
+
+
+def test_fingerprint_ignores_what_is_not_sent():
+    assert request_fingerprint("get", "https://sit.example/x") == request_fingerprint("GET", "https://sit.example/x",
+                                                                                      {}, "")
+    assert request_fingerprint("POST", "u", None, {"id": 1}) == request_fingerprint("POST", "u", None, b'{"id":1}')
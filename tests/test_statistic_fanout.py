@@ -0,0 +1,93 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.payloads import make_statistic_payload
+from scenario import FAILED, PASSED, SKIPPED
+from statistic_analysis import analyze_statistic_bytes
+from statistic_fanout import FanoutError, parse_codes, plan_statistic_requests, run_statistic_fanout
+from timeouts import Deadline
+
+REQUEST = {"method": "POST", "url": "https://sit.example/processingresult/statistic", "body": {}}
+
+
+def payload(students):
+    return json.dumps(make_statistic_payload(students, subjects=2)).encode("utf-8")
+
+
+@pytest.fixture
+def analyze():
+    # Threads instead of the process pool keep the test fast; the callable contract is the same
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield lambda raw: executor.submit(analyze_statistic_bytes, raw)
+
+
+def test_parse_codes():
+    assert parse_codes(" MATH101, ENG201;MATH101\nSCI301 ") == ["MATH101", "ENG201", "SCI301"]
+    assert parse_codes("") == []
+
+
+def test_plan_chunks_every_course():
+    planned = plan_statistic_requests({"semesterId": "s1", "nested": {"a": 1}}, ["C1", "C2"],
+                                      ["A1", "A2", "A3"], chunk_size=2)
+    assert [(item.course_code, item.chunk, item.chunks) for item in planned] == [
+        ("C1", 1, 2), ("C1", 2, 2), ("C2", 1, 2), ("C2", 2, 2)]
+    assert planned[1].body == {"semesterId": "s1", "nested": {"a": 1}, "courseCode": "C1",
+                               "admissionNumbers": ["A3"]}
+    assert planned[0].body["nested"] is not planned[2].body["nested"]
+
+
+def test_plan_without_admission_numbers_sends_each_course_once():
+    planned = plan_statistic_requests({}, ["C1"], [])
+    assert [item.body["admissionNumbers"] for item in planned] == [[]]
+
+
+@pytest.mark.parametrize("codes, chunk_size", [([], 10), (["C1"], 0)])
+def test_plan_errors(codes, chunk_size):
+    with pytest.raises(FanoutError):
+        plan_statistic_requests({}, codes, ["A1"], chunk_size)
+
+
+def test_fanout_merges_passed_requests_in_plan_order(analyze):
+    planned = plan_statistic_requests({}, ["C1", "C2", "C3"], [])
+    answers = {
+        "C1": {"status_code": 200, "time": 5.0, "raw": payload(3)},
+        "C2": {"status_code": 500, "time": 2.0, "raw": b'{"message": "Server error"}'},
+        "C3": {"status_code": 200, "time": 4.0, "raw": payload(2)},
+    }
+    progress = []
+    result = run_statistic_fanout(REQUEST, planned, lambda request: answers[request["body"]["courseCode"]],
+                                  analyze, max_parallel=2, on_progress=lambda *counts: progress.append(counts))
+    assert [row["Status"] for row in result.rows] == [PASSED, FAILED, PASSED]
+    assert result.rows[1]["Message"] == "Server error"
+    assert [row["Students"] for row in result.rows] == [3, None, 2]
+    assert len(result.df_summary) == 5
+    assert result.df_marks["CourseCode"].is_monotonic_increasing
+    summary = result.summary()
+    assert (summary["total"], summary[PASSED], summary[FAILED], summary["students"]) == (3, 2, 1, 5)
+    assert progress[-1] == (3, 3, 3)
+
+
+def test_send_and_analysis_errors_fail_only_their_row(analyze):
+    planned = plan_statistic_requests({}, ["C1", "C2", "C3"], [])
+
+    def send(request):
+        code = request["body"]["courseCode"]
+        if code == "C1":
+            raise ConnectionError("connection reset")
+        return {"status_code": 200, "time": 1.0, "raw": b"not json" if code == "C2" else payload(1)}
+
+    result = run_statistic_fanout(REQUEST, planned, send, analyze)
+    assert [row["Status"] for row in result.rows] == [FAILED, FAILED, PASSED]
+    assert result.rows[0]["Message"] == "connection reset"
+    assert result.rows[1]["Message"].startswith("Analysis failed")
+
+
+def test_requests_after_the_deadline_are_skipped(analyze):
+    planned = plan_statistic_requests({}, ["C1", "C2"], [])
+    deadline = Deadline(0)
+    result = run_statistic_fanout(REQUEST, planned, lambda request: pytest.fail("sent after the deadline"),
+                                  analyze, deadline=deadline)
+    assert [row["Status"] for row in result.rows] == [SKIPPED, SKIPPED]
+    assert result.df_summary.empty
@@ -0,0 +1,177 @@
+import datetime
+
+import pytest
+
+from timer_orchestrator import CronSchedule, ScheduledPlan, TimerPlan, TimerPlanError, TimerScheduler, _cron_field
+
+
+def at(*args):
+    return datetime.datetime(*args)
+
+
+def plan(*jobs):
+    return TimerPlan({"jobs": [{"timer_job_id": f"tj-{job['id']}", **job} for job in jobs]})
+
+
+class TestCronField:
+    def test_star_covers_the_whole_range(self):
+        assert _cron_field("*", 0, 59) == set(range(60))
+
+    def test_single_value(self):
+        assert _cron_field("5", 0, 59) == {5}
+
+    def test_range_is_inclusive(self):
+        assert _cron_field("9-17", 0, 23) == set(range(9, 18))
+
+    def test_steps(self):
+        assert _cron_field("*/15", 0, 59) == {0, 15, 30, 45}
+        assert _cron_field("10-20/5", 0, 59) == {10, 15, 20}
+
+    def test_value_with_step_runs_to_the_end(self):
+        assert _cron_field("50/4", 0, 59) == {50, 54, 58}
+
+    def test_list_of_parts(self):
+        assert _cron_field("1,5-6,*/20", 0, 59) == {0, 1, 5, 6, 20, 40}
+
+    @pytest.mark.parametrize("text", ["60", "5-3", "*/0", "a", "1-", ""])
+    def test_invalid_part_is_raised(self, text):
+        with pytest.raises(ValueError):
+            _cron_field(text, 0, 59)
+
+    def test_value_below_the_range(self):
+        with pytest.raises(ValueError):
+            _cron_field("0", 1, 31)
+
+
+class TestCronSchedule:
+    def test_shortcuts(self):
+        assert CronSchedule("@hourly").next_after(at(2024, 5, 1, 10, 30)) == at(2024, 5, 1, 11, 0)
+        assert CronSchedule("@daily").next_after(at(2024, 5, 1, 10, 30)) == at(2024, 5, 2, 0, 0)
+        # 2024-05-01 is a Wednesday
+        assert CronSchedule("@weekly").next_after(at(2024, 5, 1, 10, 30)) == at(2024, 5, 5, 0, 0)
+        assert CronSchedule("@monthly").next_after(at(2024, 5, 1, 10, 30)) == at(2024, 6, 1, 0, 0)
+
+    def test_next_after_is_strictly_after(self):
+        schedule = CronSchedule("30 10 * * *")
+        assert schedule.next_after(at(2024, 5, 1, 10, 30)) == at(2024, 5, 2, 10, 30)
+        assert schedule.next_after(at(2024, 5, 1, 10, 29, 59)) == at(2024, 5, 1, 10, 30)
+
+    def test_sunday_is_zero_or_seven(self):
+        assert CronSchedule("0 8 * * 7").weekdays == CronSchedule("0 8 * * 0").weekdays == {0}
+        assert CronSchedule("0 8 * * 7").next_after(at(2024, 5, 1)) == at(2024, 5, 5, 8, 0)
+
+    def test_weekday_range(self):
+        schedule = CronSchedule("0 9 * * 1-5")
+        # Friday evening runs again on Monday
+        assert schedule.next_after(at(2024, 5, 3, 18, 0)) == at(2024, 5, 6, 9, 0)
+
+    def test_restricted_day_and_weekday_match_either(self):
+        schedule = CronSchedule("0 0 13 * 5")
+        # Friday 2024-05-03 comes before the 13th
+        assert schedule.next_after(at(2024, 5, 1)) == at(2024, 5, 3, 0, 0)
+        # Monday the 13th matches by day of month alone
+        assert schedule.next_after(at(2024, 5, 12, 12, 0)) == at(2024, 5, 13, 0, 0)
+
+    def test_only_one_day_field_restricted_must_match(self):
+        schedule = CronSchedule("0 0 * 5 5")
+        assert schedule.next_after(at(2024, 4, 1)) == at(2024, 5, 3, 0, 0)
+
+    def test_crosses_month_ends(self):
+        assert CronSchedule("0 0 31 * *").next_after(at(2024, 4, 15)) == at(2024, 5, 31, 0, 0)
+        assert CronSchedule("15 6 * * *").next_after(at(2024, 1, 31, 23, 59)) == at(2024, 2, 1, 6, 15)
+
+    def test_crosses_year_end(self):
+        assert CronSchedule("0 0 1 1 *").next_after(at(2024, 12, 31, 23, 59)) == at(2025, 1, 1, 0, 0)
+
+    def test_leap_day(self):
+        assert CronSchedule("0 12 29 2 *").next_after(at(2024, 3, 1)) == at(2028, 2, 29, 12, 0)
+
+    def test_never_matching_schedule(self):
+        with pytest.raises(TimerPlanError, match="never matches"):
+            CronSchedule("0 0 31 2 *").next_after(at(2024, 1, 1))
+
+    @pytest.mark.parametrize("expression", ["* * * *", "@yearly", "61 * * * *", "* 24 * * *", "* * 0 * *",
+                                            "* * * 13 *", "* * * * 8", "*/x * * * *"])
+    def test_invalid_expression(self, expression):
+        with pytest.raises(TimerPlanError):
+            CronSchedule(expression)
+
+
+class TestTimerPlanStages:
+    def test_jobs_without_dependencies_share_the_first_stage(self):
+        assert plan({"id": "a"}, {"id": "b"}).stages == [["a", "b"]]
+
+    def test_each_job_runs_one_stage_after_its_last_dependency(self):
+        stages = plan(
+            {"id": "report", "depends_on": ["grades", "attendance"]},
+            {"id": "grades", "depends_on": ["import"]},
+            {"id": "import"},
+            {"id": "attendance"},
+        ).stages
+        assert stages == [["import", "attendance"], ["grades"], ["report"]]
+
+    def test_stage_keeps_plan_order(self):
+        stages = plan({"id": "c", "depends_on": ["a"]}, {"id": "b", "depends_on": ["a"]}, {"id": "a"}).stages
+        assert stages == [["a"], ["c", "b"]]
+
+    def test_cycle_is_rejected(self):
+        with pytest.raises(TimerPlanError, match="cycle between jobs a, b"):
+            plan({"id": "a", "depends_on": ["b"]}, {"id": "b", "depends_on": ["a"]}, {"id": "c"})
+
+    def test_self_dependency_is_a_cycle(self):
+        with pytest.raises(TimerPlanError, match="cycle"):
+            plan({"id": "a", "depends_on": ["a"]})
+
+    def test_unknown_dependency(self):
+        with pytest.raises(TimerPlanError, match="unknown job"):
+            plan({"id": "a", "depends_on": ["missing"]})
+
+    def test_duplicate_id(self):
+        with pytest.raises(TimerPlanError, match="Duplicate"):
+            plan({"id": "a"}, {"id": "a"})
+
+    def test_empty_jobs(self):
+        with pytest.raises(TimerPlanError):
+            TimerPlan({"jobs": []})
+
+    def test_job_by_registry_name(self):
+        timer_plan = TimerPlan({"jobs": [{"id": "a", "job": "Nightly"}]},
+                               [{"name": "Nightly", "id": "42", "path": "/run/{timer_job_id}", "module": "AD"}])
+        job = timer_plan.jobs["a"]
+        assert (job.timer_job_id, job.module, job.trigger_request()["path"]) == ("42", "AD", "/run/42")
+
+    def test_job_needs_a_timer_job(self):
+        with pytest.raises(TimerPlanError, match="timer_job_id"):
+            TimerPlan({"jobs": [{"id": "a"}]})
+
+
+class TestTimerScheduler:
+    def schedule(self, scheduler, owner, env="SIT"):
+        scheduled = ScheduledPlan(plan({"id": "a"}), CronSchedule("@daily"), env, owner, lambda stop: None)
+        scheduler.add(scheduled)
+        return scheduled.key
+
+    def test_users_scheduling_the_same_plan_keep_their_own(self):
+        scheduler = TimerScheduler()
+        first = self.schedule(scheduler, "qa1")
+        second = self.schedule(scheduler, "qa2")
+        assert first != second
+        assert [row["Owner"] for row in scheduler.rows()] == ["qa1", "qa2"]
+        assert [row["Key"] for row in scheduler.rows("qa2")] == [second]
+
+    def test_scheduling_again_replaces_the_owners_plan(self):
+        scheduler = TimerScheduler()
+        self.schedule(scheduler, "qa1")
+        self.schedule(scheduler, "qa1")
+        assert len(scheduler.rows()) == 1
+
+    def test_only_the_owner_or_an_admin_unschedules(self):
+        scheduler = TimerScheduler()
+        key = self.schedule(scheduler, "qa1")
+        assert scheduler.remove(key, "qa2") is False
+        assert len(scheduler.rows()) == 1
+        assert scheduler.remove(key, "adminadmin", is_admin=True) is True
+        assert scheduler.remove(key, "qa1") is False
+        key = self.schedule(scheduler, "qa1")
+        assert scheduler.remove(key, "qa1") is True
+        assert scheduler.rows() == []
@@ -0,0 +1,106 @@
+import datetime
+import os
+import threading
+
+import pytest
+
+import upload_store
+from upload_store import UploadStore
+
+XLSX = b"PK\x03\x04" + b"sheet" * 50
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / "upload_data"))
+
+
+def set_clock(monkeypatch, moment):
+    monkeypatch.setattr(upload_store, "_now", lambda: moment.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def test_put_and_read(store):
+    upload = store.put("qa1", "Import Marks", "marks.xlsx", XLSX)
+    assert upload["new"] is True
+    assert store.read(upload["id"]) == XLSX
+    assert store.read(upload["id"] + 1) is None
+    assert store.query()[0]["filename"] == "marks.xlsx"
+
+
+def test_same_file_again_refreshes_the_row(store):
+    first = store.put("qa1", "Import Marks", "marks.xlsx", XLSX)
+    again = store.put("qa1", "Import Marks", "marks (1).xlsx", XLSX)
+    assert (again["id"], again["new"]) == (first["id"], False)
+    assert store.query()[0]["filename"] == "marks (1).xlsx"
+
+
+def test_users_share_one_blob(store):
+    store.put("qa1", "Import Marks", "marks.xlsx", XLSX)
+    store.put("qa2", "Import Marks", "copy.xlsx", XLSX)
+    totals = store.totals()
+    assert (totals["files"], totals["size"], totals["stored_size"]) == (2, 2 * len(XLSX), len(XLSX))
+    assert [row["user"] for row in store.users()] == ["qa1", "qa2"]
+    assert len(store.query(user="qa2")) == 1
+
+
+def test_deleting_one_user_keeps_the_shared_blob(store):
+    store.put("qa1", "Import Marks", "marks.xlsx", XLSX)
+    kept = store.put("qa2", "Import Marks", "copy.xlsx", XLSX)
+    assert store.delete_user("qa1") == 1
+    assert store.read(kept["id"]) == XLSX
+    store.delete(kept["id"])
+    assert store.totals()["stored_size"] == 0
+    assert not any(files for _, _, files in os.walk(store.blobs.root))
+
+
+def test_unused_uploads_expire(store, monkeypatch):
+    now = datetime.datetime.now()
+    set_clock(monkeypatch, now - datetime.timedelta(days=store.retention_days + 1))
+    store.put("qa1", "Import Marks", "old.xlsx", XLSX)
+    set_clock(monkeypatch, now)
+    store.put("qa1", "Import Marks", "new.csv", b"id\n1\n")
+    assert [row["filename"] for row in store.query()] == ["new.csv"]
+
+
+def test_least_recently_used_go_beyond_max_bytes(tmp_path, monkeypatch):
+    store = UploadStore(str(tmp_path / "upload_data"), max_bytes=2 * len(XLSX) + 10)
+    start = datetime.datetime.now()
+    for i in range(3):
+        set_clock(monkeypatch, start + datetime.timedelta(seconds=i))
+        store.put("qa1", "Import Marks", f"{i}.xlsx", XLSX + bytes([i]))
+    assert sorted(row["filename"] for row in store.query()) == ["1.xlsx", "2.xlsx"]
+
+
+def test_legacy_files_are_imported(tmp_path):
+    root = tmp_path / "upload_data"
+    root.mkdir()
+    (root / "qa1_Import Marks_20240501_101500.xlsx").write_bytes(XLSX)
+    (root / "notes.txt").write_text("not an upload")
+    store = UploadStore(str(root))
+    row = store.query()[0]
+    assert (row["user"], row["api"], row["created"]) == ("qa1", "Import Marks", "2024-05-01 10:15:00")
+    assert not (root / "qa1_Import Marks_20240501_101500.xlsx").exists()
+    assert (root / "notes.txt").exists()
+
+
+def test_concurrent_puts_and_deletes_keep_live_blobs(store):
+    def churn(user):
+        for i in range(30):
+            upload = store.put(user, "Import Marks", "marks.xlsx", XLSX + bytes([i % 3]))
+            if i % 2:
+                store.delete(upload["id"])
+
+    threads = [threading.Thread(target=churn, args=(f"qa{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for row in store.query(limit=100):
+        assert store.read(row["id"]) is not None
+
+
+def test_clear(store):
+    store.put("qa1", "Import Marks", "marks.xlsx", XLSX)
+    store.clear()
+    assert store.totals()["files"] == 0
+    assert store.put("qa1", "Import Marks", "marks.xlsx", XLSX)["new"] is True
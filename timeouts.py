@@ -0,0 +1,88 @@
+"""Timeouts."""
+
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import requests
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_TOTAL_TIMEOUT = 120.0
+
+# Overall budget of a batch run unless the API sets timeouts.batch
+DEFAULT_BATCH_DEADLINE = 1800.0
+
+# Requests are not started with less time than this left on their deadline
+MIN_ATTEMPT_SECONDS = 0.5
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """A request or batch ran past its total deadline"""
+
+
+class Timeouts(NamedTuple):
+    """Connect and read limits for each socket operation plus a total for the whole request"""
+
+    connect: float = DEFAULT_CONNECT_TIMEOUT
+    read: float = DEFAULT_READ_TIMEOUT
+    total: float = DEFAULT_TOTAL_TIMEOUT
+
+    def for_requests(self):
+        """The (connect, read) tuple passed as requests' timeout, never longer than total"""
+        return (min(self.connect, self.total), min(self.read, self.total))
+
+
+DEFAULT_TIMEOUTS = Timeouts()
+
+
+def _overrides(config: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Positive connect/read/total values from a config's "timeouts" object"""
+    timeouts = (config or {}).get("timeouts") or {}
+    return {
+        field: float(timeouts[field])
+        for field in Timeouts._fields
+        if isinstance(timeouts.get(field), (int, float)) and timeouts[field] > 0
+    }
+
+
+def resolve_timeouts(api: Optional[Dict[str, Any]] = None,
+                     env_config: Optional[Dict[str, Any]] = None) -> Timeouts:
+    """Defaults, overridden by the environment's, overridden by the API's "timeouts" entry
+
+    Both configs use the same shape, e.g. {"timeouts": {"connect": 3, "read": 30, "total": 45}};
+    missing fields fall through to the next level.
+    """
+    return DEFAULT_TIMEOUTS._replace(**{**_overrides(env_config), **_overrides(api)})
+
+
+def batch_deadline_seconds(api: Optional[Dict[str, Any]] = None,
+                           env_config: Optional[Dict[str, Any]] = None) -> float:
+    """Overall batch budget from timeouts.batch, API first, then environment"""
+    for config in (api, env_config):
+        value = ((config or {}).get("timeouts") or {}).get("batch")
+        if isinstance(value, (int, float)) and value > 0:
+            return float(value)
+    return DEFAULT_BATCH_DEADLINE
+
+
+class Deadline:
+    """A point in time that a group of requests must finish by"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """True once too little time is left to start another request"""
+        return self.remaining() < MIN_ATTEMPT_SECONDS
+
+    def clamp(self, timeouts: Timeouts) -> Timeouts:
+        """Shrink a request's timeouts so it cannot outlive this deadline"""
+        remaining = self.remaining()
+        if remaining < MIN_ATTEMPT_SECONDS:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:.0f} s exhausted")
+        return Timeouts(min(timeouts.connect, remaining), min(timeouts.read, remaining),
+                        min(timeouts.total, remaining))
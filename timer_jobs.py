@@ -0,0 +1,125 @@
+"""Timer Jobs."""
+
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import load_json_file, save_json_file
+
+TIMER_JOBS_FILE = os.path.join(os.path.dirname(__file__), "timer_jobs.json")
+ADMIN_CONTENT_FILE = os.path.join(os.path.dirname(__file__), "ADMIN_CONTENT.md")
+
+DEFAULT_TIMER_JOB_PATH = "/DEVTimerJob/DEVTriggerTimerJob/{timer_job_id}"
+
+_ENTRY_FIELDS = ("name", "id", "path", "module")
+
+_EMPTY_MARKDOWN = (
+    "# Timer Job APIs\n\n"
+    "❌ **No Timer Job APIs configured yet.**\n\n"
+    "💡 **Tip:** Admin users can add Timer Job APIs in the Admin Panel → Timer Run tab.\n\n"
+    "📝 **Note:** Timer Job URLs are automatically generated for SIT environment only.\n"
+)
+
+
+def timer_job_url(entry: Dict[str, Any], base_url: str) -> str:
+    """Full URL of a timer job entry under a module base URL"""
+    return f"{base_url}{entry['path'].replace('{timer_job_id}', entry['id'])}"
+
+
+class TimerJobRegistry:
+    """Timer job entries kept in timer_jobs.json, keyed by a generated key
+
+    The public Timer Run markdown is ADMIN_CONTENT.md followed by one section
+    per entry. It is rendered once and reused until an entry changes,
+    ADMIN_CONTENT.md is saved, or the SIT base URLs change.
+    """
+
+    def __init__(self, path: str = TIMER_JOBS_FILE, admin_content_path: str = ADMIN_CONTENT_FILE):
+        """Load entries from path, which is created on the first change"""
+        self.path = path
+        self.admin_content_path = admin_content_path
+        self.version = 0
+        self._lock = threading.Lock()
+        try:
+            data = load_json_file(path)
+        except Exception:
+            data = {}
+        self._entries: Dict[str, Dict[str, Any]] = data if isinstance(data, dict) else {}
+        self._markdown_key: Optional[Tuple[Any, ...]] = None
+        self._markdown = ""
+        self._admin_mtime: Optional[int] = None
+        self._admin_text = ""
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Entries in the order they were added, each with its key"""
+        with self._lock:
+            return [{"key": key, **entry} for key, entry in self._entries.items()]
+
+    def _save(self) -> None:
+        self.version += 1
+        save_json_file(self._entries, self.path)
+
+    def add(self, name: str, job_id: str, path: str = DEFAULT_TIMER_JOB_PATH, module: str = "EX") -> str:
+        """Add an entry and return its key"""
+        key = uuid.uuid4().hex
+        with self._lock:
+            self._entries[key] = {"name": name, "id": job_id, "path": path, "module": module}
+            self._save()
+        return key
+
+    def update(self, key: str, **fields: Any) -> None:
+        """Change name, id, path or module of an entry; a key removed meanwhile is ignored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.update({field: value for field, value in fields.items() if field in _ENTRY_FIELDS})
+                self._save()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def _admin_content(self) -> str:
+        """ADMIN_CONTENT.md, read again only when its modification time changes"""
+        try:
+            mtime = os.stat(self.admin_content_path).st_mtime_ns
+        except OSError:
+            self._admin_mtime, self._admin_text = None, ""
+            return ""
+        if mtime != self._admin_mtime:
+            with open(self.admin_content_path, 'r', encoding='utf-8') as f:
+                self._admin_text = f.read()
+            self._admin_mtime = mtime
+        return self._admin_text
+
+    def markdown(self, base_url_for: Callable[[str], str]) -> str:
+        """Public Timer Run markdown, base_url_for maps a module to its SIT base URL"""
+        with self._lock:
+            admin_content = self._admin_content()
+            modules = sorted({entry["module"] for entry in self._entries.values()})
+            base_urls = {module: base_url_for(module) for module in modules}
+            key = (self.version, self._admin_mtime, tuple(base_urls.items()))
+            if key != self._markdown_key:
+                sections = [f"## {entry['name']}:\n\n{timer_job_url(entry, base_urls[entry['module']])}"
+                            for entry in self._entries.values()]
+                if not sections and "##" not in admin_content:
+                    self._markdown = _EMPTY_MARKDOWN
+                else:
+                    self._markdown = "\n\n".join([admin_content.strip() or "# Timer Job APIs"] + sections)
+                self._markdown_key = key
+            return self._markdown
+
+
+_registry: Optional[TimerJobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_timer_job_registry() -> TimerJobRegistry:
+    """Process-wide registry shared by every session"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TimerJobRegistry()
+        return _registry
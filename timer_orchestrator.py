@@ -0,0 +1,623 @@
+"""Timer Orchestrator."""
+
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from scenario import FAILED, PASSED, SKIPPED, ScenarioError, extract_value
+from timer_jobs import DEFAULT_TIMER_JOB_PATH
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, timer plans can always be written as JSON
+    yaml = None
+
+TIMER_PLANS_DIR = os.path.join(os.path.dirname(__file__), "timer_plans")
+
+# Jobs of one stage triggered at the same time when the plan does not say otherwise
+DEFAULT_MAX_PARALLEL = 4
+
+# Status polling: first wait, multiplier per poll, longest wait and overall limit, in seconds
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_POLL_BACKOFF = 2.0
+DEFAULT_MAX_POLL_INTERVAL = 30.0
+DEFAULT_JOB_TIMEOUT = 900.0
+
+# A job fails once this many status polls in a row got no usable answer
+MAX_POLL_ERRORS = 3
+
+# Job runs kept for the duration log
+JOB_LOG_SIZE = 500
+
+# Manual runs going at the same time across all sessions, and how often the page refreshes their progress
+MANUAL_RUN_WORKERS = 4
+TIMER_PLAN_POLL_SECONDS = 2.0
+
+RUNNING = "running"
+TIMED_OUT = "timed out"
+
+
+class TimerPlanError(ValueError):
+    """A timer plan or schedule that cannot be run"""
+
+
+def parse_timer_plan(text: str, filename: str = "") -> Dict[str, Any]:
+    """Parse a JSON or YAML timer plan"""
+    if filename.endswith((".yaml", ".yml")) or not text.lstrip().startswith("{"):
+        if yaml is None:
+            raise TimerPlanError("YAML timer plans require the 'pyyaml' package, use JSON instead")
+        try:
+            definition = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise TimerPlanError(f"Invalid YAML: {e}")
+    else:
+        try:
+            definition = json.loads(text)
+        except ValueError as e:
+            raise TimerPlanError(f"Invalid JSON: {e}")
+    if not isinstance(definition, dict):
+        raise TimerPlanError("A timer plan must be an object with a 'jobs' list")
+    return definition
+
+
+def list_timer_plan_files(directory: str = TIMER_PLANS_DIR) -> List[str]:
+    """Timer plan file names in a directory"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith((".json", ".yaml", ".yml")))
+
+
+class StatusCheck:
+    """How to find out that a triggered job has finished
+
+    path is requested with GET after the trigger ({timer_job_id} is filled
+    in), value is a JSONPath into its response, and the job is done once the
+    value is one of done_values or failed once it is one of failed_values.
+    Waits between polls grow from interval by backoff up to max_interval.
+    """
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.path = definition.get("path") or ""
+        if "{timer_job_id}" not in self.path:
+            raise TimerPlanError("The status 'path' needs a {timer_job_id} placeholder")
+        self.module = definition.get("module") or "EX"
+        self.value = definition.get("value") or "$.data.status"
+        self.done_values = {str(value).lower() for value in definition.get("done_values") or ["Completed", "Succeeded"]}
+        self.failed_values = {str(value).lower() for value in definition.get("failed_values") or ["Failed", "Error"]}
+        self.interval = float(definition.get("interval") or DEFAULT_POLL_INTERVAL)
+        self.backoff = max(1.0, float(definition.get("backoff") or DEFAULT_POLL_BACKOFF))
+        self.max_interval = float(definition.get("max_interval") or DEFAULT_MAX_POLL_INTERVAL)
+        self.timeout = float(definition.get("timeout") or DEFAULT_JOB_TIMEOUT)
+
+
+class TimerPlanJob:
+    """One timer job of a plan, given by timer_job_id or by the name of a registry entry"""
+
+    def __init__(self, definition: Dict[str, Any], registry_entries: Dict[str, Dict[str, Any]],
+                 default_status: Optional[StatusCheck]):
+        self.id = str(definition.get("id") or "")
+        if not self.id:
+            raise TimerPlanError("Every job needs an 'id'")
+        entry = {}
+        if definition.get("job"):
+            entry = registry_entries.get(definition["job"])
+            if entry is None:
+                raise TimerPlanError(f"Job '{self.id}' uses unknown timer job '{definition['job']}'")
+        self.timer_job_id = str(definition.get("timer_job_id") or entry.get("id") or "")
+        if not self.timer_job_id:
+            raise TimerPlanError(f"Job '{self.id}' needs a 'timer_job_id' or a 'job' name")
+        self.path = definition.get("path") or entry.get("path") or DEFAULT_TIMER_JOB_PATH
+        self.module = definition.get("module") or entry.get("module") or "EX"
+        self.depends_on: Set[str] = set(definition.get("depends_on") or [])
+        self.status = StatusCheck(definition["status"]) if definition.get("status") else default_status
+
+    def trigger_request(self) -> Dict[str, Any]:
+        return {"method": "GET", "path": self.path.replace("{timer_job_id}", self.timer_job_id),
+                "module": self.module, "headers": {"accept": "text/plain"}, "params": {}}
+
+    def status_request(self) -> Dict[str, Any]:
+        return {"method": "GET", "path": self.status.path.replace("{timer_job_id}", self.timer_job_id),
+                "module": self.status.module, "headers": {"accept": "application/json"}, "params": {}}
+
+
+class TimerPlan:
+    """A validated timer plan: jobs grouped into dependency stages"""
+
+    def __init__(self, definition: Dict[str, Any], registry_entries: Optional[List[Dict[str, Any]]] = None):
+        self.name = definition.get("name") or "Timer plan"
+        self.description = definition.get("description") or ""
+        self.max_parallel = int(definition.get("max_parallel") or DEFAULT_MAX_PARALLEL)
+        self.schedule = definition.get("schedule") or ""
+        if self.schedule:
+            CronSchedule(self.schedule)
+        default_status = StatusCheck(definition["status"]) if definition.get("status") else None
+
+        entries = {entry["name"]: entry for entry in registry_entries or []}
+        job_definitions = definition.get("jobs")
+        if not isinstance(job_definitions, list) or not job_definitions:
+            raise TimerPlanError("A timer plan needs a non-empty 'jobs' list")
+        self.jobs: Dict[str, TimerPlanJob] = {}
+        for job_definition in job_definitions:
+            job = TimerPlanJob(job_definition, entries, default_status)
+            if job.id in self.jobs:
+                raise TimerPlanError(f"Duplicate job id '{job.id}'")
+            self.jobs[job.id] = job
+        for job in self.jobs.values():
+            unknown = job.depends_on - self.jobs.keys()
+            if unknown:
+                raise TimerPlanError(f"Job '{job.id}' depends on unknown job(s) {', '.join(sorted(unknown))}")
+        self.stages = self._stages()
+
+    def _stages(self) -> List[List[str]]:
+        """Job ids grouped so every job comes one stage after its last dependency"""
+        stage_of: Dict[str, int] = {}
+        remaining = dict(self.jobs)
+        while remaining:
+            ready = [job_id for job_id, job in remaining.items() if job.depends_on <= stage_of.keys()]
+            if not ready:
+                raise TimerPlanError(f"Dependency cycle between jobs {', '.join(sorted(remaining))}")
+            for job_id in ready:
+                stage_of[job_id] = 1 + max((stage_of[dep] for dep in remaining[job_id].depends_on), default=-1)
+                del remaining[job_id]
+        stages: List[List[str]] = [[] for _ in range(max(stage_of.values()) + 1)]
+        for job_id in self.jobs:
+            stages[stage_of[job_id]].append(job_id)
+        return stages
+
+    def plan_rows(self) -> List[Dict[str, Any]]:
+        """One row per job, stage by stage"""
+        return [{
+            "Stage": index + 1,
+            "Job": job_id,
+            "Timer Job ID": self.jobs[job_id].timer_job_id,
+            "Depends On": ", ".join(sorted(self.jobs[job_id].depends_on)),
+            "Polls Status": "✓" if self.jobs[job_id].status else "",
+        } for index, stage in enumerate(self.stages) for job_id in stage]
+
+
+class JobResult:
+    """Outcome and end-to-end timing of one job, from trigger to observed completion"""
+
+    def __init__(self, job_id: str, timer_job_id: str):
+        self.job_id = job_id
+        self.timer_job_id = timer_job_id
+        self.status = SKIPPED
+        self.status_code: Optional[int] = None
+        self.final_state = ""
+        self.polls = 0
+        self.error = ""
+        self.started_at: Optional[datetime.datetime] = None
+        self.start_ns = 0
+        self.end_ns = 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns else 0.0
+
+
+class TimerPlanResult:
+    """Per-job results of one run of a plan"""
+
+    def __init__(self, plan: TimerPlan, results: Dict[str, JobResult], started_at: datetime.datetime,
+                 wall_time: float, trigger: str):
+        self.plan = plan
+        self.results = results
+        self.started_at = started_at
+        self.wall_time = wall_time
+        self.trigger = trigger
+        self.waterfall: List[Dict[str, Any]] = []  # filled in by callers that trace the run
+
+    @property
+    def passed(self) -> bool:
+        return all(result.status == PASSED for result in self.results.values())
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One row per job, stage by stage"""
+        rows = []
+        for index, stage in enumerate(self.plan.stages):
+            for job_id in stage:
+                result = self.results[job_id]
+                rows.append({
+                    "Stage": index + 1,
+                    "Job": job_id,
+                    "Status": result.status,
+                    "HTTP": result.status_code if result.status_code is not None else "",
+                    "Started": result.started_at.strftime("%H:%M:%S") if result.started_at else "",
+                    "Duration (s)": round(result.duration, 1) if result.end_ns else None,
+                    "Polls": result.polls,
+                    "Final State": result.final_state,
+                    "Error": result.error,
+                })
+        return rows
+
+
+def _run_job(job: TimerPlanJob, prepare: Callable[[Dict[str, Any]], Dict[str, Any]],
+             send: Callable[[Dict[str, Any]], Dict[str, Any]], stop: threading.Event) -> JobResult:
+    """Trigger a job and, when it has a status check, poll until it finishes"""
+    result = JobResult(job.id, job.timer_job_id)
+    result.status = RUNNING
+    result.started_at = datetime.datetime.now()
+    result.start_ns = time.time_ns()
+    try:
+        response = send(prepare(job.trigger_request()))
+        result.status_code = response.get("status_code")
+        if not 200 <= (result.status_code or 0) < 300:
+            content = response.get("content")
+            message = content.get("error") or content.get("message") if isinstance(content, dict) else None
+            raise TimerPlanError(message or f"Trigger failed with HTTP {result.status_code}")
+
+        if job.status is None:
+            result.status = PASSED
+            result.final_state = "triggered"
+        else:
+            check = job.status
+            status_request = prepare(job.status_request())
+            deadline = time.monotonic() + check.timeout
+            interval = check.interval
+            errors = 0
+            while result.status == RUNNING:
+                if stop.wait(min(interval, max(0.0, deadline - time.monotonic()))):
+                    raise TimerPlanError("Stopped")
+                if time.monotonic() >= deadline:
+                    result.status = TIMED_OUT
+                    result.error = f"Not finished after {check.timeout:.0f} s"
+                    break
+                interval = min(interval * check.backoff, check.max_interval)
+                result.polls += 1
+                response = send(status_request)
+                try:
+                    if not 200 <= (response.get("status_code") or 0) < 300:
+                        raise TimerPlanError(f"Status check answered HTTP {response.get('status_code')}")
+                    state = str(extract_value(response.get("content"), check.value))
+                except (TimerPlanError, ScenarioError) as e:
+                    errors += 1
+                    if errors >= MAX_POLL_ERRORS:
+                        raise TimerPlanError(f"{e} ({errors} polls in a row)")
+                    continue
+                errors = 0
+                result.final_state = state
+                if state.lower() in check.done_values:
+                    result.status = PASSED
+                elif state.lower() in check.failed_values:
+                    result.status = FAILED
+                    result.error = f"Job reported {state}"
+    except Exception as e:
+        result.status = FAILED
+        result.error = str(e)
+    result.end_ns = time.time_ns()
+    return result
+
+
+def run_timer_plan(plan: TimerPlan, prepare: Callable[[Dict[str, Any]], Dict[str, Any]],
+                   send: Callable[[Dict[str, Any]], Dict[str, Any]],
+                   max_parallel: Optional[int] = None,
+                   on_job_done: Optional[Callable[[JobResult], None]] = None,
+                   stop: Optional[threading.Event] = None, trigger: str = "manual",
+                   on_job_start: Optional[Callable[[str], None]] = None) -> TimerPlanResult:
+    """Run a plan stage by stage, the jobs of a stage concurrently
+
+    prepare turns a trigger or status request (path, module) into a request
+    with URL and cookies and send performs it; both are called from worker
+    threads. A job is skipped when one of its dependencies did not pass.
+    Setting stop ends status polling early and skips the jobs not yet
+    triggered.
+    """
+    stop = stop or threading.Event()
+    results = {job_id: JobResult(job_id, job.timer_job_id) for job_id, job in plan.jobs.items()}
+    started_at = datetime.datetime.now()
+    run_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_parallel or plan.max_parallel) as executor:
+        for stage in plan.stages:
+            runnable = []
+            for job_id in stage:
+                failed = [dep for dep in plan.jobs[job_id].depends_on if results[dep].status != PASSED]
+                if stop.is_set():
+                    results[job_id].error = "Stopped"
+                elif failed:
+                    results[job_id].error = f"Dependency '{sorted(failed)[0]}' did not pass"
+                else:
+                    runnable.append(job_id)
+                    if on_job_start is not None:
+                        on_job_start(job_id)
+                    continue
+                if on_job_done is not None:
+                    on_job_done(results[job_id])
+            futures = [executor.submit(_run_job, plan.jobs[job_id], prepare, send, stop) for job_id in runnable]
+            for future in futures:
+                result = future.result()
+                results[result.job_id] = result
+                if on_job_done is not None:
+                    on_job_done(result)
+    return TimerPlanResult(plan, results, started_at, time.perf_counter() - run_start, trigger)
+
+
+class PlanProgress:
+    """Jobs of a running plan as they start and finish, readable from another thread
+
+    job_started and job_done are meant as run_timer_plan's on_job_start
+    and on_job_done.
+    """
+
+    def __init__(self, plan: TimerPlan):
+        self.plan = plan
+        self._lock = threading.Lock()
+        self._started: Dict[str, float] = {}
+        self._done: Dict[str, JobResult] = {}
+
+    def job_started(self, job_id: str) -> None:
+        with self._lock:
+            self._started[job_id] = time.monotonic()
+
+    def job_done(self, result: JobResult) -> None:
+        with self._lock:
+            self._done[result.job_id] = result
+
+    def finished(self) -> int:
+        with self._lock:
+            return len(self._done)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One row per job, stage by stage, with the time running jobs have taken so far"""
+        now = time.monotonic()
+        with self._lock:
+            rows = []
+            for index, stage in enumerate(self.plan.stages):
+                for job_id in stage:
+                    result = self._done.get(job_id)
+                    if result is not None:
+                        status = result.status
+                        seconds = round(result.duration, 1) if result.end_ns else None
+                    elif job_id in self._started:
+                        status, seconds = RUNNING, round(now - self._started[job_id], 1)
+                    else:
+                        status, seconds = "pending", None
+                    rows.append({"Stage": index + 1, "Job": job_id, "Status": status, "Duration (s)": seconds,
+                                 "Error": result.error if result is not None else ""})
+            return rows
+
+
+_job_log: Deque[Dict[str, Any]] = deque(maxlen=JOB_LOG_SIZE)
+_job_log_lock = threading.Lock()
+
+
+def record_plan_run(result: TimerPlanResult, env: str) -> None:
+    """Add the jobs of a finished run to the duration log"""
+    with _job_log_lock:
+        for row in result.rows():
+            if row["Status"] == SKIPPED:
+                continue
+            _job_log.append({
+                "Finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "Plan": result.plan.name,
+                "Environment": env,
+                "Trigger": result.trigger,
+                "Job": row["Job"],
+                "Timer Job ID": result.results[row["Job"]].timer_job_id,
+                "Status": row["Status"],
+                "Duration (s)": row["Duration (s)"],
+                "Polls": row["Polls"],
+            })
+
+
+def job_run_log() -> List[Dict[str, Any]]:
+    """Recorded job runs, newest first"""
+    with _job_log_lock:
+        return list(reversed(_job_log))
+
+
+def _cron_field(text: str, low: int, high: int) -> Set[int]:
+    """Values of one cron field: *, n, a-b, lists and /step"""
+    values: Set[int] = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(value) for value in spec.split("-", 1))
+            else:
+                start = int(spec)
+                end = high if step_text else start
+        except ValueError:
+            raise ValueError(part)
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week
+
+    Supports *, numbers, ranges, lists, /steps and the @hourly, @daily,
+    @weekly and @monthly shortcuts. As in cron, when both day fields are
+    restricted a day matches if either does. Sunday is 0 or 7.
+    """
+
+    _SHORTCUTS = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = self._SHORTCUTS.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise TimerPlanError(f"Schedule '{expression}' needs 5 fields: minute hour day month weekday")
+        try:
+            self.minutes = _cron_field(fields[0], 0, 59)
+            self.hours = _cron_field(fields[1], 0, 23)
+            self.days = _cron_field(fields[2], 1, 31)
+            self.months = _cron_field(fields[3], 1, 12)
+            self.weekdays = {day % 7 for day in _cron_field(fields[4], 0, 7)}
+        except ValueError as e:
+            raise TimerPlanError(f"Schedule '{expression}' has an invalid field '{e}'")
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime.datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = candidate + datetime.timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+            else:
+                return candidate
+        raise TimerPlanError(f"Schedule '{self.expression}' never matches")
+
+
+class ScheduledPlan:
+    """A plan run by the scheduler whenever its cron schedule comes due
+
+    Keyed by plan name, environment and owner, so scheduling a plan again
+    replaces the owner's earlier schedule and never someone else's.
+    """
+
+    def __init__(self, plan: TimerPlan, schedule: CronSchedule, env: str, owner: str,
+                 runner: Callable[[threading.Event], TimerPlanResult]):
+        self.key = f"{plan.name} @ {env} ({owner})"
+        self.plan = plan
+        self.schedule = schedule
+        self.env = env
+        self.owner = owner
+        self.runner = runner
+        self.next_run = schedule.next_after(datetime.datetime.now())
+        self.running = False
+        self.runs = 0
+        self.last_run: Optional[datetime.datetime] = None
+        self.last_outcome = ""
+
+
+class TimerScheduler:
+    """In-process scheduler running timer plans on cron schedules
+
+    One daemon thread sleeps until the next plan is due and hands it to a
+    small worker pool. A plan that is still running when it comes due again
+    skips that run instead of overlapping itself.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._plans: Dict[str, ScheduledPlan] = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="timer-plan")
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, scheduled: ScheduledPlan) -> None:
+        """Schedule a plan, replacing any plan with the same key"""
+        with self._cond:
+            self._plans[scheduled.key] = scheduled
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="timer-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def remove(self, key: str, user: str, is_admin: bool = False) -> bool:
+        """Unschedule a plan of user, or of anyone for an admin; False when there is no such plan"""
+        with self._cond:
+            scheduled = self._plans.get(key)
+            if scheduled is None or not (is_admin or scheduled.owner == user):
+                return False
+            del self._plans[key]
+            self._cond.notify_all()
+            return True
+
+    def rows(self, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One row per scheduled plan (of owner, when given), next due first"""
+        with self._cond:
+            plans = sorted((scheduled for scheduled in self._plans.values()
+                            if owner is None or scheduled.owner == owner), key=lambda scheduled: scheduled.next_run)
+            return [{
+                "Key": scheduled.key,
+                "Plan": scheduled.plan.name,
+                "Schedule": scheduled.schedule.expression,
+                "Environment": scheduled.env,
+                "Owner": scheduled.owner,
+                "Next Run": scheduled.next_run.strftime("%Y-%m-%d %H:%M"),
+                "Running": "⏳" if scheduled.running else "",
+                "Runs": scheduled.runs,
+                "Last Run": scheduled.last_run.strftime("%Y-%m-%d %H:%M:%S") if scheduled.last_run else "",
+                "Last Outcome": scheduled.last_outcome,
+            } for scheduled in plans]
+
+    def _loop(self) -> None:
+        with self._cond:
+            while not self._stop.is_set():
+                now = datetime.datetime.now()
+                for scheduled in self._plans.values():
+                    if scheduled.next_run <= now:
+                        scheduled.next_run = scheduled.schedule.next_after(now)
+                        if scheduled.running:
+                            scheduled.last_outcome = "skipped, previous run still going"
+                            continue
+                        scheduled.running = True
+                        self._executor.submit(self._run, scheduled)
+                due = [scheduled.next_run for scheduled in self._plans.values()]
+                wait = (min(due) - datetime.datetime.now()).total_seconds() if due else None
+                self._cond.wait(None if wait is None else max(wait, 0.5))
+
+    def _run(self, scheduled: ScheduledPlan) -> None:
+        try:
+            result = scheduled.runner(self._stop)
+            outcome = "passed" if result.passed else "failed"
+            record_plan_run(result, scheduled.env)
+        except Exception as e:
+            outcome = f"error: {e}"
+        with self._cond:
+            scheduled.running = False
+            scheduled.runs += 1
+            scheduled.last_run = datetime.datetime.now()
+            scheduled.last_outcome = outcome
+
+
+_scheduler: Optional[TimerScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_timer_scheduler() -> TimerScheduler:
+    """Process-wide scheduler, started when the first plan is scheduled"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TimerScheduler()
+        return _scheduler
+
+
+_manual_runs: Optional[ThreadPoolExecutor] = None
+_manual_runs_lock = threading.Lock()
+
+
+def submit_plan_run(runner: Callable[[threading.Event], TimerPlanResult], stop: threading.Event,
+                    env: str) -> Future:
+    """Run a plan in the background now; the future gives its result, already in the duration log
+
+    Setting stop ends the run early, as it does for scheduled runs.
+    """
+    global _manual_runs
+    with _manual_runs_lock:
+        if _manual_runs is None:
+            _manual_runs = ThreadPoolExecutor(max_workers=MANUAL_RUN_WORKERS, thread_name_prefix="timer-plan-manual")
+
+    def run() -> TimerPlanResult:
+        result = runner(stop)
+        record_plan_run(result, env)
+        return result
+
+    return _manual_runs.submit(run)
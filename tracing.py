@@ -0,0 +1,207 @@
+"""Tracing."""
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+# service.name resource attribute on exported spans
+SERVICE_NAME = "api-tester"
+
+# Trace files are rotated to <file>.1 once they grow past this size
+TRACE_FILE_MAX_BYTES = 10 * 1024 * 1024
+
+# Standard OpenTelemetry variables; when one is set traces are also POSTed to the collector
+_ENDPOINT_VARIABLES = ("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "OTEL_EXPORTER_OTLP_ENDPOINT")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Encode an attribute value as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation inside a Trace"""
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"] = None,
+                 start_ns: Optional[int] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+
+    @property
+    def depth(self) -> int:
+        """Nesting level, 0 for the root span"""
+        return 0 if self.parent is None else self.parent.depth + 1
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration so far, or total once ended"""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Encode the span in the OTLP/JSON span format"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns if self.end_ns is not None else time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+class Trace:
+    """Spans of one user interaction, rooted at a single span
+
+    Spans opened with span() nest under the innermost open span of the same
+    trace in the current context; pass parent explicitly from worker threads.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, self.trace_id, attributes=attributes)
+        self.spans: List[Span] = [self.root]
+        self._lock = threading.Lock()
+
+    def _parent(self, parent: Optional[Span]) -> Span:
+        """Explicit parent, else the current span when it belongs to this trace, else the root"""
+        if parent is not None:
+            return parent
+        current = _current_span.get()
+        if current is not None and current.trace_id == self.trace_id:
+            return current
+        return self.root
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child span"""
+        span = Span(name, self.trace_id, self._parent(parent), attributes=attributes)
+        with self._lock:
+            self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(str(e))
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None,
+                 **attributes: Any) -> Span:
+        """Record an already measured interval as a span"""
+        span = Span(name, self.trace_id, self._parent(parent), start_ns, attributes)
+        span.end(end_ns)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def finish(self) -> None:
+        """End the root span"""
+        self.root.end()
+
+    def waterfall_rows(self) -> List[Dict[str, Any]]:
+        """One row per span, in start order, with offsets from the trace start in ms"""
+        origin = self.root.start_ns
+        rows = []
+        for span in sorted(self.spans, key=lambda s: (s.start_ns, s.depth)):
+            end_ns = span.end_ns if span.end_ns is not None else time.time_ns()
+            rows.append({
+                "Span": "  " * span.depth + span.name,
+                "Depth": span.depth,
+                "Start (ms)": round((span.start_ns - origin) / 1e6, 2),
+                "End (ms)": round((end_ns - origin) / 1e6, 2),
+                "Duration (ms)": round((end_ns - span.start_ns) / 1e6, 2),
+                "Error": span.error or "",
+            })
+        return rows
+
+    def to_otlp(self, service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [span.to_otlp() for span in self.spans],
+                }],
+            }]
+        }
+
+
+def _collector_endpoint() -> Optional[str]:
+    """OTLP/HTTP traces endpoint from the standard environment variables"""
+    traces_endpoint = os.environ.get(_ENDPOINT_VARIABLES[0])
+    if traces_endpoint:
+        return traces_endpoint
+    base_endpoint = os.environ.get(_ENDPOINT_VARIABLES[1])
+    if base_endpoint:
+        return base_endpoint.rstrip("/") + "/v1/traces"
+    return None
+
+
+def _post_to_collector(endpoint: str, payload: bytes) -> None:
+    """Send a trace to an OTLP/HTTP collector, ignoring failures"""
+    try:
+        requests.post(endpoint, data=payload, headers={"Content-Type": "application/json"}, timeout=5)
+    except requests.exceptions.RequestException:
+        pass
+
+
+def export_trace(trace: Trace, file_path: Optional[str] = None, endpoint: Optional[str] = None) -> None:
+    """Append the trace as one OTLP/JSON line to file_path and POST it to a collector if configured
+
+    The collector call runs on a background thread so the UI never waits on it.
+    """
+    trace.finish()
+    payload = json.dumps(trace.to_otlp(), ensure_ascii=False)
+
+    if file_path:
+        try:
+            if os.path.exists(file_path) and os.path.getsize(file_path) > TRACE_FILE_MAX_BYTES:
+                os.replace(file_path, file_path + ".1")
+            with open(file_path, "a", encoding="utf-8") as f:
+                f.write(payload + "\n")
+        except OSError:
+            pass
+
+    endpoint = endpoint or _collector_endpoint()
+    if endpoint:
+        threading.Thread(target=_post_to_collector, args=(endpoint, payload.encode("utf-8")), daemon=True).start()
@@ -1,11 +1,20 @@
 import streamlit as st
+import altair as alt
 import requests
 import json
 import pandas as pd
 import time
 import os
+import contextlib
+import contextvars
+import copy
 import datetime
+import http.cookiejar
 import io
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from urllib.parse import urlsplit
 from utils import (
     get_current_base_url, 
     get_user_specific_paths,
@@ -15,8 +24,6 @@ from utils import (
     save_user_apis,
     load_api_configs,
     save_api_config,
-    load_api_history,
-    save_api_history,
     load_cookies_config,
     save_cookies_config,
     make_http_request,
@@ -27,8 +34,60 @@ from utils import (
     ensure_path_format,
     load_environments_config,
     save_environments_config,
-    get_enabled_environments
+    get_enabled_environments,
+    json_dumps_bytes,
+    load_shared_config,
+    load_shared_environments_config,
+    migrate_user_data,
+    clear_shared_config_cache,
+    shared_config_cache_info,
+    estimate_memory
 )
+from body_document import BodyDocument
+from response_viewer import (
+    RESPONSE_INLINE_LIMIT_BYTES,
+    ARRAY_PAGE_SIZE,
+    parse_json_path,
+    format_json_path,
+    get_node,
+    type_name,
+    summarize_children,
+    page_count,
+    format_size,
+    preview_value
+)
+from response_query import (
+    QUERY_RESULT_ROW_LIMIT,
+    ResponseIndex,
+    run_query,
+    matches_to_rows,
+    jmespath
+)
+from response_diff import DEFAULT_KEY_FIELDS, DIFF_ROW_LIMIT, diff_json
+from history_store import HISTORY_PAGE_SIZE, STATUS_FILTERS, get_history_store
+from tracing import Trace, export_trace
+from profiler import PROFILE_MODES, profile_call
+from rate_limiter import environment_limits, get_rate_limiter, rate_limiter_stats
+from circuit_breaker import circuit_breaker_stats, get_circuit_breaker, reset_circuit_breakers
+from timeouts import Deadline, batch_deadline_seconds, resolve_timeouts
+from content_encoding import ACCEPT_ENCODING, mark_encoding_rejected, request_encoding_for
+from scenario import (PASSED, FAILED, Scenario, ScenarioError, list_scenario_files, parse_scenario,
+                      run_scenario, SCENARIOS_DIR)
+from timer_jobs import ADMIN_CONTENT_FILE, DEFAULT_TIMER_JOB_PATH, get_timer_job_registry, timer_job_url
+from timer_orchestrator import (TIMER_PLAN_POLL_SECONDS, TIMER_PLANS_DIR, CronSchedule, PlanProgress,
+                                 ScheduledPlan, TimerPlan, TimerPlanError, get_timer_scheduler, job_run_log,
+                                 list_timer_plan_files, parse_timer_plan, run_timer_plan, submit_plan_run)
+from statistic_analysis import (ANALYSIS_POLL_SECONDS, analyze_statistic_bytes, export_df_to_excel_bytes,
+                                export_statistic_excel, export_statistic_parquet, pack_frame, submit_analysis,
+                                unpack_frame)
+from statistic_fanout import (STATISTIC_CHUNK_SIZE, FanoutError, parse_codes, plan_statistic_requests,
+                              run_statistic_fanout)
+from http_cache import HIT, MISS, REVALIDATED, get_http_cache
+from single_flight import get_send_flights, request_fingerprint
+from upload_store import UPLOAD_PAGE_SIZE, get_upload_store
+from batch_run import DEFAULT_MAX_PARALLEL
+from data_sweep import (SKIPPED, VALUE_TYPES, SweepError, bind_row, make_binding, read_data_set, run_sweep,
+                        suggest_bindings)
 
 
 # Global admin cookies file
@@ -37,171 +96,24 @@ ADMIN_COOKIES_FILE = os.path.join(os.path.dirname(__file__), "admin_cookies_conf
 # Global API configurations file
 API_CONFIGS_FILE = os.path.join(os.path.dirname(__file__), "api_configs.json")
 
-
-# Helpers for Processing Result Statistic analysis and export
-fail_criteria = {
-    "None": 0,
-    "SemesterRank": 1,
-    "GraduationRule": 2,
-    "IsNotPET": 3,
-    "MinCourseDuration": 4,
-    "MinSemRank": 5,
-    "MaxSemRank": 6,
-    "Lack TPF": 7,
-    "Lack DipC": 8,
-    "Lack DipO": 9,
-    "Lack DipE": 10,
-    "Lack TPE": 11,
-    "Lack CDS": 12,
-}
-
-
-def _build_assessment_lookup(settings_list):
-    """Map (subjectId, semesterId) -> assessment metadata"""
-    lookup = {}
-    for s in settings_list:
-        key = (s.get("subjectId"), s.get("semesterId"))
-        lookup[key] = {
-            "CreditUnit": s.get("creditUnit"),
-            "IsGraded": s.get("isGraded"),
-            "SubjectCategory": s.get("subjectCategory"),
-            "DiplomaCategory": s.get("diplomaCategory"),
-        }
-    return lookup
+# Placeholder for the last profile summary, set by the profiler controls during the current script run
+_profile_slot = contextvars.ContextVar("profile_slot", default=None)
 
 
-def analyze_processing_result(content: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Analyze ProcessingResult/statistic response into two DataFrames (marks, summary)
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """HTTP session shared by every browser session, for its connection pool
 
-    Handles different response structures across environments.
-    Tries multiple possible paths for studentStatistics.
+    Cookies are always passed per request, the session never stores cookies set
+    by responses so one user's cookies cannot leak into another's requests.
     """
-    mark_rows = []
-    summary_rows = []
-
-    student_statistics = []
-
-    # Try different possible structures
-    # First, try SIT structure: content['data'][0]['studentStatistics']
-    data = content.get("data")
-    if data and isinstance(data, list) and len(data) > 0:
-        student_statistics = data[0].get("studentStatistics", [])
-
-    # If not found, try direct under content: content['studentStatistics']
-    if not student_statistics:
-        student_statistics = content.get("studentStatistics", [])
-
-    # If still not found, try under data as dict: content['data']['studentStatistics']
-    if not student_statistics and data and isinstance(data, dict):
-        student_statistics = data.get("studentStatistics", [])
-
-    # If still not found, try nested data: content['data'][0]['data']['studentStatistics'] or similar
-    if not student_statistics and data and isinstance(data, list) and len(data) > 0:
-        inner_data = data[0].get("data")
-        if inner_data and isinstance(inner_data, dict):
-            student_statistics = inner_data.get("studentStatistics", [])
-
-    for stu in student_statistics:
-        course_code = stu.get("courseCode", "")
-        course_name = stu.get("courseName", "")
-        semester_name = stu.get("semesterName", "")
-        student_fail_criteria = stu.get("failedCriteria", {})
-        student_fail_items = student_fail_criteria.get("failedItems", [])
-        fail_dict = {item.get("failCriteria"): item.get("value") for item in student_fail_items}
-
-        summary_rows.append(
-            {
-                "CourseCode": course_code,
-                "CourseName": course_name,
-                "SemesterName": semester_name,
-                "StudentId": stu.get("studentId"),
-                "StudentName": stu.get("studentName"),
-                "AdmissionNumber": stu.get("admissionNumber"),
-                "CourseVersion": stu.get("courseVersion"),
-                "StudentStatus": stu.get("studentStatus"),
-                "FutureStudentStatus": stu.get("futureStudentStatus"),
-                "StudentClassification": stu.get("studentClassification"),
-                "SemesterRank": stu.get("semesterRank"),
-                "StageOfStudy": stu.get("stageOfStudy"),
-                "GPA": stu.get("gpa"),
-                "CGPA": stu.get("cgpa"),
-                "WA": stu.get("wa"),
-                "CWA": stu.get("cwa"),
-                "CU": stu.get("cu"),
-                "TCU": stu.get("tcu"),
-                "ComputedAcadStanding": stu.get("computedAcadStanding"),
-                "AdjustAcadStanding": stu.get("adjustAcadStanding"),
-                "AcadStandingReason": stu.get("acadStandingReason"),
-                "Lack TPF": fail_dict.get(fail_criteria["Lack TPF"], 0) if isinstance(fail_criteria["Lack TPF"], int) else fail_dict.get(fail_criteria["Lack TPF"], 0),
-                "Lack DipC": fail_dict.get(fail_criteria["Lack DipC"], 0) if isinstance(fail_criteria["Lack DipC"], int) else fail_dict.get(fail_criteria["Lack DipC"], 0),
-                "Lack DipO": fail_dict.get(fail_criteria["Lack DipO"], 0) if isinstance(fail_criteria["Lack DipO"], int) else fail_dict.get(fail_criteria["Lack DipO"], 0),
-                "Lack DipE": fail_dict.get(fail_criteria["Lack DipE"], 0) if isinstance(fail_criteria["Lack DipE"], int) else fail_dict.get(fail_criteria["Lack DipE"], 0),
-                "Lack TPE": fail_dict.get(fail_criteria["Lack TPE"], 0) if isinstance(fail_criteria["Lack TPE"], int) else fail_dict.get(fail_criteria["Lack TPE"], 0),
-                "Lack CDS": fail_dict.get(fail_criteria["Lack CDS"], 0) if isinstance(fail_criteria["Lack CDS"], int) else fail_dict.get(fail_criteria["Lack CDS"], 0),
-            }
-        )
-
-        assess_lookup = _build_assessment_lookup(
-            stu.get("cummulativeAssessmentSettings", []) + stu.get("currentAssessmentSettings", [])
-        )
-
-        all_marks = {}
-        for m in stu.get("cummulativeSubjectMarks", []):
-            all_marks[m.get("id")] = m
-        for m in stu.get("currentSubjectMarks", []):
-            all_marks[m.get("id")] = m
-
-        for m in all_marks.values():
-            assess = assess_lookup.get((m.get("subjectId"), m.get("semesterId")), {})
-            mark_rows.append(
-                {
-                    "CourseCode": course_code,
-                    "CourseName": course_name,
-                    "StudentId": stu.get("studentId"),
-                    "StudentName": stu.get("studentName"),
-                    "AdmissionNumber": stu.get("admissionNumber"),
-                    "CourseVersion": stu.get("courseVersion"),
-                    "SubjectCode": m.get("subjectCode"),
-                    "SubjectId": m.get("subjectId"),
-                    "SemesterId": m.get("semesterId"),
-                    "SubjectComputedMark": m.get("subjectComputedMark"),
-                    "FinalSubjectGrade": m.get("finalSubjectGrade"),
-                    "SpecialGrade": m.get("specialGrade"),
-                    "NgpPenalty": m.get("ngpPenalty"),
-                    "ByPassSubjectType": m.get("byPassSubjectType"),
-                    "ContributedComponentPercentage": m.get("contributedComponentPercentage"),
-                    "AttemptNumber": m.get("attemptNumber"),
-                    "CreditUnit": assess.get("CreditUnit", ""),
-                    "IsGraded": assess.get("IsGraded", ""),
-                    "SubjectCategory": assess.get("SubjectCategory", ""),
-                    "DiplomaCategory": assess.get("DiplomaCategory", ""),
-                    "Lack TPF": fail_dict.get(fail_criteria["Lack TPF"], 0) if isinstance(fail_criteria["Lack TPF"], int) else fail_dict.get(fail_criteria["Lack TPF"], 0),
-                    "Lack DipC": fail_dict.get(fail_criteria["Lack DipC"], 0) if isinstance(fail_criteria["Lack DipC"], int) else fail_dict.get(fail_criteria["Lack DipC"], 0),
-                    "Lack DipO": fail_dict.get(fail_criteria["Lack DipO"], 0) if isinstance(fail_criteria["Lack DipO"], int) else fail_dict.get(fail_criteria["Lack DipO"], 0),
-                    "Lack DipE": fail_dict.get(fail_criteria["Lack DipE"], 0) if isinstance(fail_criteria["Lack DipE"], int) else fail_dict.get(fail_criteria["Lack DipE"], 0),
-                    "Lack TPE": fail_dict.get(fail_criteria["Lack TPE"], 0) if isinstance(fail_criteria["Lack TPE"], int) else fail_dict.get(fail_criteria["Lack TPE"], 0),
-                    "Lack CDS": fail_dict.get(fail_criteria["Lack CDS"], 0) if isinstance(fail_criteria["Lack CDS"], int) else fail_dict.get(fail_criteria["Lack CDS"], 0),
-                }
-            )
-
-    df_marks = pd.DataFrame(mark_rows)
-    df_summary = pd.DataFrame(summary_rows)
-
-    if not df_marks.empty:
-        df_marks.sort_values(by=["StudentName", "SubjectCode"], inplace=True, ignore_index=True)
-
-    return df_marks, df_summary
-
-
-def export_dfs_to_excel_bytes(df_marks: pd.DataFrame, df_summary: pd.DataFrame) -> bytes:
-    """Write two DataFrames to an Excel file in memory and return bytes."""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df_marks.to_excel(writer, sheet_name="Subject Marks", index=False)
-        df_summary.to_excel(writer, sheet_name="Student Summary", index=False)
-    output.seek(0)
-    return output.read()
-
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter = requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 def load_help_content():
@@ -220,9 +132,8 @@ def load_help_content():
 def load_admin_content():
     """Load admin-editable content from markdown file"""
     try:
-        admin_content_file = os.path.join(os.path.dirname(__file__), "ADMIN_CONTENT.md")
-        if os.path.exists(admin_content_file):
-            with open(admin_content_file, 'r', encoding='utf-8') as f:
+        if os.path.exists(ADMIN_CONTENT_FILE):
+            with open(ADMIN_CONTENT_FILE, 'r', encoding='utf-8') as f:
                 return f.read()
         else:
             # Default content if file doesn't exist
@@ -234,8 +145,7 @@ def load_admin_content():
 def save_admin_content(content):
     """Save admin-editable content to markdown file"""
     try:
-        admin_content_file = os.path.join(os.path.dirname(__file__), "ADMIN_CONTENT.md")
-        with open(admin_content_file, 'w', encoding='utf-8') as f:
+        with open(ADMIN_CONTENT_FILE, 'w', encoding='utf-8') as f:
             f.write(content)
         return True
     except Exception as e:
@@ -243,118 +153,10 @@ def save_admin_content(content):
         return False
 
 
-def _update_admin_content_with_timer_jobs():
-    """Auto-update ADMIN_CONTENT.md with timer job URLs (SIT only)"""
-    try:
-        # Get current timer job entries
-        timer_entries = st.session_state.get('timer_job_entries', [])
-        
-        if not timer_entries:
-            # If no timer entries, just ensure ADMIN_CONTENT.md exists with basic content
-            current_content = load_admin_content()
-            if "No timer job entries" not in current_content:
-                # Remove any existing timer job sections and add empty notice
-                lines = current_content.split('\n')
-                filtered_lines = []
-                skip_section = False
-                
-                for line in lines:
-                    if line.startswith('## ') and ('Timer' in line or 'timer' in line):
-                        skip_section = True
-                        continue
-                    elif line.startswith('## ') and skip_section:
-                        skip_section = False
-                        filtered_lines.append(line)
-                    elif not skip_section and not line.startswith('```'):
-                        filtered_lines.append(line)
-                    elif not skip_section and line.startswith('```') and len(filtered_lines) > 0 and not filtered_lines[-1].startswith('```'):
-                        # Skip code blocks that were part of timer sections
-                        continue
-                    elif not skip_section:
-                        filtered_lines.append(line)
-                
-                # Clean up and add basic content if needed
-                clean_content = '\n'.join(filtered_lines).strip()
-                if not clean_content:
-                    clean_content = "# Admin Content\n\nWelcome to the API Tester system.\n\n*No timer job entries configured yet.*"
-                
-                save_admin_content(clean_content)
-            return True
-        
-        # Check if SIT environment exists
-        enabled_envs = get_enabled_environments()
-        if "SIT" not in enabled_envs:
-            return False
-        
-        # Load current admin content
-        current_content = load_admin_content()
-        
-        # Remove existing timer job sections
-        lines = current_content.split('\n')
-        filtered_lines = []
-        skip_section = False
-        
-        for line in lines:
-            if line.startswith('## ') and ('Timer' in line or 'timer' in line):
-                skip_section = True
-                continue
-            elif line.startswith('## ') and skip_section:
-                skip_section = False
-                filtered_lines.append(line)
-            elif not skip_section and not line.startswith('```'):
-                filtered_lines.append(line)
-            elif not skip_section and line.startswith('```') and len(filtered_lines) > 0 and not filtered_lines[-1].startswith('```'):
-                # Skip code blocks that were part of timer sections
-                continue
-            elif not skip_section:
-                filtered_lines.append(line)
-        
-        # Build new content with timer jobs
-        base_content = '\n'.join(filtered_lines).strip()
-        
-        # Add timer job sections
-        timer_content = ""
-        for entry in timer_entries:
-            # Get SIT URL
-            base_url = get_current_base_url("SIT", entry['module'])
-            final_path = entry['path'].replace('{timer_job_id}', entry['id'])
-            full_url = f"{base_url}{final_path}"
-            
-            # Add timer job section with the specified format
-            timer_content += f"\n\n## {entry['name']}:\n```\n{full_url}\n```"
-        
-        # Combine content
-        if base_content:
-            new_content = base_content + timer_content
-        else:
-            new_content = "# Timer Job APIs" + timer_content
-        
-        # Save updated content
-        return save_admin_content(new_content)
-        
-    except Exception as e:
-        print(f"Error updating admin content with timer jobs: {str(e)}")
-        return False
-
-
 def generate_timer_job_markdown():
-    """Generate markdown content for Timer Job APIs from ADMIN_CONTENT.md"""
+    """Markdown for the Timer Run dialog: ADMIN_CONTENT.md plus the SIT URL of each timer job entry"""
     try:
-        # Load admin content which contains timer job URLs
-        admin_content = load_admin_content()
-        
-        # Check if there are timer job entries in the content
-        if "##" in admin_content and ("Timer" in admin_content or "timer" in admin_content or "```" in admin_content):
-            # Return the admin content directly as it already contains formatted timer jobs
-            return admin_content
-        else:
-            # No timer jobs found in admin content
-            markdown_content = "# Timer Job APIs\n\n"
-            markdown_content += "❌ **No Timer Job APIs configured yet.**\n\n"
-            markdown_content += "💡 **Tip:** Admin users can add Timer Job APIs in the Admin Panel → Timer Run tab.\n\n"
-            markdown_content += "📝 **Note:** Timer Job URLs are automatically generated for SIT environment only.\n"
-            return markdown_content
-        
+        return get_timer_job_registry().markdown(lambda module: get_current_base_url("SIT", module))
     except Exception as e:
         return f"# Timer Job APIs\n\n❌ **Error loading Timer Job information:** {str(e)}\n"
 
@@ -634,8 +436,8 @@ def _handle_multi_user_login(username: str, is_admin: bool):
         'apis': {},
         'api_responses': {},
         'current_env': default_env,
-        'api_history': [],
-        'cookies_config': {}  # Start with empty cookies - will be loaded properly in _load_user_data
+        'cookies_config': {},  # Start with empty cookies - will be loaded properly in _load_user_data
+        'loaded': set()  # Sections (apis, cookies) loaded so far, filled lazily on activation
     }
 
     # Set as active user if it's the first one, if no active user, or if it's a QA/BA user
@@ -657,63 +459,55 @@ def _handle_multi_user_login(username: str, is_admin: bool):
         st.success(f"User {username} added to session")
 
 
+def _ensure_user_apis(user_data):
+    """Load a user's saved APIs on first use, running pending data migrations once"""
+    if 'apis' in user_data['loaded']:
+        return
+    try:
+        user_data['apis'] = load_user_apis(user_data['file_paths']["USER_APIS_FILE"])
+        migrate_user_data(user_data['file_paths'], user_data['apis'])
+    except Exception as e:
+        st.error(f"Error loading user APIs: {str(e)}")
+        user_data['apis'] = {}
+    user_data['loaded'].add('apis')
+
+
+def _ensure_user_cookies(username, user_data):
+    """Load a user's cookies on first use"""
+    if user_data['is_admin'] and username == "adminadmin":
+        # For admin user, a private copy of the global admin cookies; the shared
+        # cache only re-reads the file when it changed, so this stays cheap
+        user_data['cookies_config'] = dict(load_shared_config(ADMIN_COOKIES_FILE))
+    elif 'cookies' in user_data['loaded']:
+        return
+    else:
+        # For regular users, load with empty defaults
+        user_data['cookies_config'] = load_cookies_config(user_data['file_paths']["COOKIES_CONFIG_FILE"])
+    user_data['loaded'].add('cookies')
+
+
 def _load_user_data(username: str):
-    """Load data for the specified user and set as active"""
+    """Switch the active user, loading each section of their data only the first time"""
     if username not in st.session_state.logged_in_users:
         return
 
     user_data = st.session_state.logged_in_users[username]
+    user_data.setdefault('loaded', set())
 
     # Set current user context
     st.session_state.username = username
     st.session_state.is_admin = user_data['is_admin']
     st.session_state.file_paths = user_data['file_paths']
 
-    # Load user's saved data if not already loaded
-    if not user_data['apis']:
-        try:
-            # Always load APIs for any user (including admin)
-            user_data['apis'] = load_user_apis(user_data['file_paths']["USER_APIS_FILE"])
-            
-            # Migration: Add module field to existing APIs that don't have it (default to EX)
-            for api_name, api_config in user_data['apis'].items():
-                if 'module' not in api_config:
-                    api_config['module'] = 'EX'
-            
-            # Save the updated APIs with module information
-            if user_data['apis']:
-                save_user_apis(user_data['apis'], user_data['file_paths']["USER_APIS_FILE"])
-        except Exception as e:
-            st.error(f"Error loading user APIs for {username}: {str(e)}")
-            user_data['apis'] = {}
-
-    if not user_data['api_history']:
-        user_data['api_history'] = load_api_history(user_data['file_paths']["API_HISTORY_FILE"])
-
-    if not user_data['cookies_config']:
-        if user_data['is_admin'] and username == "adminadmin":
-            # For admin user, load from global admin cookies file
-            if os.path.exists(ADMIN_COOKIES_FILE):
-                try:
-                    admin_cookies = load_api_configs(ADMIN_COOKIES_FILE)
-                    # Initialize with admin cookies (not empty like regular users)
-                    user_data['cookies_config'] = admin_cookies
-                except Exception:
-                    user_data['cookies_config'] = {}
-            else:
-                user_data['cookies_config'] = {}
-        else:
-            # For regular users, load with empty defaults
-            user_data['cookies_config'] = load_cookies_config(
-                user_data['file_paths']["COOKIES_CONFIG_FILE"],
-                ADMIN_COOKIES_FILE
-            )
+    # Sections already loaded are reused as-is when switching back to this user;
+    # history is opened on demand by _get_history_store
+    _ensure_user_apis(user_data)
+    _ensure_user_cookies(username, user_data)
 
     # Set session state to current user's data
     st.session_state.apis = user_data['apis']
     st.session_state.api_responses = user_data['api_responses']
     st.session_state.current_env = user_data['current_env']
-    st.session_state.api_history = user_data['api_history']
     st.session_state.cookies_config = user_data['cookies_config']
     
     # Reset and recalculate module selection based on the new username
@@ -721,26 +515,6 @@ def _load_user_data(username: str):
         st.session_state.selected_module = "AD"  # Only exact "QA" gets AD module
     else:
         st.session_state.selected_module = "EX"  # All others (including "QA xxx") get EX module
-    
-    # Always refresh cookies config to get latest admin values and ensure empty defaults
-    if user_data['is_admin'] and username == "adminadmin":
-        # For admin user, always load from global admin cookies file
-        if os.path.exists(ADMIN_COOKIES_FILE):
-            try:
-                admin_cookies = load_api_configs(ADMIN_COOKIES_FILE)
-                st.session_state.cookies_config = admin_cookies
-                user_data['cookies_config'] = admin_cookies
-            except Exception:
-                st.session_state.cookies_config = {}
-                user_data['cookies_config'] = {}
-    else:
-        # For regular users, load with empty defaults
-        st.session_state.cookies_config = load_cookies_config(
-            user_data['file_paths']["COOKIES_CONFIG_FILE"],
-            ADMIN_COOKIES_FILE
-        )
-        # Update user data with refreshed cookies
-        user_data['cookies_config'] = st.session_state.cookies_config
 
 
 def _logout_user(username: str):
@@ -780,7 +554,7 @@ def _logout_user(username: str):
                 st.session_state.active_user = None
                 st.session_state.show_main_app = False
                 for key in ['username', 'is_admin', 'file_paths', 'apis', 'api_responses', 
-                           'current_env', 'api_history', 'cookies_config']:
+                           'current_env', 'cookies_config']:
                     if key in st.session_state:
                         del st.session_state[key]
 
@@ -792,7 +566,6 @@ def _save_current_user_data():
         user_data['apis'] = st.session_state.get('apis', {})
         user_data['api_responses'] = st.session_state.get('api_responses', {})
         user_data['current_env'] = st.session_state.get('current_env', 'SIT')
-        user_data['api_history'] = st.session_state.get('api_history', [])
         user_data['cookies_config'] = st.session_state.get('cookies_config', {})
 
 def show_admin_panel():
@@ -807,7 +580,7 @@ def show_admin_panel():
     environments = load_environments_config()
     
     # Create tabs for different admin functions
-    tab_names = ["🌐 Environment Management", "🍪 Cookie Configuration", "🔧 API Configuration", "📝 Content Management", "⏰ Timer Run", "📁 File Management"]
+    tab_names = ["🌐 Environment Management", "🍪 Cookie Configuration", "🔧 API Configuration", "📝 Content Management", "⏰ Timer Run", "📁 File Management", "🧠 Shared Cache"]
     
     # Determine default tab index based on focus
     default_tab = 0
@@ -817,7 +590,7 @@ def show_admin_panel():
         if "admin_tab_focus" in st.session_state:
             del st.session_state["admin_tab_focus"]
     
-    env_tab, cookie_tab, api_tab, content_tab, timer_tab, file_tab = st.tabs(tab_names)
+    env_tab, cookie_tab, api_tab, content_tab, timer_tab, file_tab, cache_tab = st.tabs(tab_names)
     
     with env_tab:
         st.subheader("Environment Management")
@@ -1327,11 +1100,9 @@ def show_admin_panel():
         # Manual Timer Job URL Generator Section
         with st.expander("📝 Timer Job URL Generator", expanded=True):
             st.write("**Create Timer Job URLs for SIT environment:**")
-            st.info("URLs will be automatically saved to ADMIN_CONTENT.md for public viewing")
+            st.info("Entries are saved to timer_jobs.json and shown to everyone in the Timer Run dialog")
             
-            # Initialize timer job entries in session state
-            if 'timer_job_entries' not in st.session_state:
-                st.session_state.timer_job_entries = []
+            registry = get_timer_job_registry()
             
             # Form to add new timer job entry
             with st.form("add_timer_job_form"):
@@ -1354,7 +1125,7 @@ def show_admin_panel():
                 # API Path configuration
                 api_path = st.text_input(
                     "API Path Template",
-                    value="/DEVTimerJob/DEVTriggerTimerJob/{timer_job_id}",
+                    value=DEFAULT_TIMER_JOB_PATH,
                     help="API path with {timer_job_id} placeholder"
                 )
                 
@@ -1368,24 +1139,13 @@ def show_admin_panel():
                 submitted = st.form_submit_button("➕ Add Timer Job Entry")
                 
                 if submitted and job_name and job_id:
-                    # Add to session state
-                    new_entry = {
-                        'name': job_name,
-                        'id': job_id,
-                        'path': api_path,
-                        'module': module
-                    }
-                    st.session_state.timer_job_entries.append(new_entry)
-                    
-                    # Auto-update ADMIN_CONTENT.md
-                    _update_admin_content_with_timer_jobs()
-                    
+                    registry.add(job_name, job_id, api_path, module)
                     st.success(f"Added timer job entry: {job_name}")
-                    st.success("✅ ADMIN_CONTENT.md updated automatically!")
                     st.rerun()
             
             # Display existing entries with SIT URLs only
-            if st.session_state.timer_job_entries:
+            timer_entries = registry.entries()
+            if timer_entries:
                 st.markdown("---")
                 st.write("**Generated Timer Job URLs (SIT Environment):**")
                 
@@ -1393,89 +1153,64 @@ def show_admin_panel():
                 enabled_envs = get_enabled_environments()
                 
                 if "SIT" in enabled_envs:
-                    for i, entry in enumerate(st.session_state.timer_job_entries):
+                    for entry in timer_entries:
+                        key = entry['key']
                         with st.container():
                             # Entry header with edit/remove buttons
-                            col_header, col_edit, col_remove, col_update = st.columns([4, 1, 1, 2])
+                            col_header, col_edit, col_remove = st.columns([6, 1, 1])
                             
                             with col_header:
                                 st.write(f"**🎯 {entry['name']}** (ID: `{entry['id']}`)")
                             
                             with col_edit:
-                                if st.button("✏️", key=f"edit_timer_entry_{i}", help="Edit entry"):
-                                    st.session_state[f"editing_timer_{i}"] = True
+                                if st.button("✏️", key=f"edit_timer_entry_{key}", help="Edit entry"):
+                                    st.session_state[f"editing_timer_{key}"] = True
                                     st.rerun()
                             
                             with col_remove:
-                                if st.button("🗑️", key=f"remove_timer_entry_{i}", help="Remove entry"):
-                                    st.session_state.timer_job_entries.pop(i)
-                                    # Auto-update ADMIN_CONTENT.md after removal
-                                    _update_admin_content_with_timer_jobs()
-                                    st.success("Timer job entry removed and ADMIN_CONTENT.md updated!")
+                                if st.button("🗑️", key=f"remove_timer_entry_{key}", help="Remove entry"):
+                                    registry.remove(key)
+                                    st.success("Timer job entry removed!")
                                     st.rerun()
                             
-                            with col_update:
-                                if st.button("🔄 Update Content", key=f"update_content_{i}", help="Update ADMIN_CONTENT.md"):
-                                    _update_admin_content_with_timer_jobs()
-                                    st.success("✅ ADMIN_CONTENT.md updated!")
-                            
                             # Inline editing form
-                            if st.session_state.get(f"editing_timer_{i}", False):
-                                with st.form(f"edit_timer_form_{i}"):
-                                    edit_name = st.text_input("Name", value=entry['name'], key=f"edit_name_{i}")
-                                    edit_id = st.text_input("ID", value=entry['id'], key=f"edit_id_{i}")
-                                    edit_path = st.text_input("Path", value=entry['path'], key=f"edit_path_{i}")
+                            if st.session_state.get(f"editing_timer_{key}", False):
+                                with st.form(f"edit_timer_form_{key}"):
+                                    edit_name = st.text_input("Name", value=entry['name'], key=f"edit_name_{key}")
+                                    edit_id = st.text_input("ID", value=entry['id'], key=f"edit_id_{key}")
+                                    edit_path = st.text_input("Path", value=entry['path'], key=f"edit_path_{key}")
                                     edit_module = st.selectbox("Module", ["EX", "AD"], 
                                                              index=0 if entry['module'] == 'EX' else 1, 
-                                                             key=f"edit_module_{i}")
+                                                             key=f"edit_module_{key}")
                                     
                                     col_save, col_cancel = st.columns(2)
                                     with col_save:
                                         if st.form_submit_button("💾 Save & Update"):
-                                            st.session_state.timer_job_entries[i] = {
-                                                'name': edit_name,
-                                                'id': edit_id,
-                                                'path': edit_path,
-                                                'module': edit_module
-                                            }
-                                            st.session_state[f"editing_timer_{i}"] = False
-                                            
-                                            # Auto-update ADMIN_CONTENT.md after edit
-                                            _update_admin_content_with_timer_jobs()
-                                            
+                                            registry.update(key, name=edit_name, id=edit_id, path=edit_path,
+                                                            module=edit_module)
+                                            st.session_state[f"editing_timer_{key}"] = False
                                             st.success("Timer job entry updated!")
-                                            st.success("✅ ADMIN_CONTENT.md updated automatically!")
                                             st.rerun()
                                     
                                     with col_cancel:
                                         if st.form_submit_button("❌ Cancel"):
-                                            st.session_state[f"editing_timer_{i}"] = False
+                                            st.session_state[f"editing_timer_{key}"] = False
                                             st.rerun()
                             else:
-                                # Display SIT URL only
-                                base_url = get_current_base_url("SIT", entry['module'])
-                                final_path = entry['path'].replace('{timer_job_id}', entry['id'])
-                                full_url = f"{base_url}{final_path}"
-                                
                                 # Display with SIT environment label and copy-friendly format
                                 st.text_input(
                                     f"SIT Environment URL:",
-                                    value=full_url,
-                                    key=f"url_{entry['name']}_SIT_{i}",
+                                    value=timer_job_url(entry, get_current_base_url("SIT", entry['module'])),
+                                    key=f"url_{key}_SIT",
                                     help=f"Copy this URL to run {entry['name']} in SIT"
                                 )
                             
                             st.markdown("---")
                         
-                    # Auto-update all content button
-                    if st.button("🔄 Update All to ADMIN_CONTENT.md", type="primary"):
-                        _update_admin_content_with_timer_jobs()
-                        st.success("✅ All timer job entries updated to ADMIN_CONTENT.md!")
-                        
                 else:
                     st.warning("⚠️ SIT environment not found. Configure SIT environment first in the Environment Management tab.")
             else:
-                st.info("💡 Add timer job entries above to generate SIT URLs and auto-update ADMIN_CONTENT.md.")
+                st.info("💡 Add timer job entries above to generate SIT URLs for the Timer Run dialog.")
         
         # Predefined Timer Job APIs Section (from API configuration)
         with st.expander("⚙️ Predefined Timer Job APIs", expanded=False):
@@ -1608,183 +1343,551 @@ def show_admin_panel():
         st.subheader("File Management")
         st.info("Manage uploaded Excel files from all users.")
         
-        upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-        if os.path.exists(upload_dir):
-            all_files = [f for f in os.listdir(upload_dir) if f.endswith(('.xlsx', '.xls'))]
-            
-            if all_files:
-                st.success(f"📊 Found {len(all_files)} uploaded file(s) in total")
-                
-                # Summary stats
-                total_size = 0
-                for file_name in all_files:
-                    try:
-                        file_path = os.path.join(upload_dir, file_name)
-                        total_size += os.path.getsize(file_path)
-                    except:
-                        pass
-                
-                total_size_mb = round(total_size / (1024 * 1024), 2)
-                st.info(f"💾 Total storage used: {total_size_mb} MB")
-                
-                # Group files by user
-                user_files = {}
-                for file_name in all_files:
-                    # Extract username from filename (username_apiname_timestamp.extension)
-                    parts = file_name.split('_')
-                    if len(parts) >= 2:
-                        username_part = parts[0]
-                        if username_part not in user_files:
-                            user_files[username_part] = []
-                        user_files[username_part].append(file_name)
-                    else:
-                        # Files that don't follow naming convention
-                        if 'other' not in user_files:
-                            user_files['other'] = []
-                        user_files['other'].append(file_name)
-                
-                # Sort users - prioritize problematic ones
-                sorted_users = sorted(user_files.keys())
-                
-                for user in sorted_users:
-                    files = user_files[user]
-                    user_size = 0
-                    for file_name in files:
-                        try:
-                            file_path = os.path.join(upload_dir, file_name)
-                            user_size += os.path.getsize(file_path)
-                        except:
-                            pass
-                    user_size_mb = round(user_size / (1024 * 1024), 2)
-                    
-                    with st.expander(f"👤 **{user}** ({len(files)} files, {user_size_mb} MB)", expanded=False):
-                        
-                        for file_name in sorted(files, reverse=True):  # Most recent first
-                            file_path = os.path.join(upload_dir, file_name)
-                            try:
-                                file_size = os.path.getsize(file_path)
-                                file_size_kb = round(file_size / 1024, 2)
-                                
-                                # Extract timestamp from filename
-                                try:
-                                    name_parts = file_name.split('_')
-                                    if len(name_parts) >= 3:
-                                        date_part = name_parts[-2]
-                                        time_part = name_parts[-1].split('.')[0]
-                                        timestamp_str = f"{date_part}_{time_part}"
-                                        timestamp = datetime.datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                                        formatted_time = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                                    else:
-                                        formatted_time = "Unknown time"
-                                except:
-                                    formatted_time = "Unknown time"
-                                
-                                col1, col2 = st.columns([4, 1])
-                                with col1:
-                                    st.text(f"📄 {file_name}")
-                                    st.caption(f"Uploaded: {formatted_time} | Size: {file_size_kb} KB")
-                                
-                                with col2:
-                                    if st.button("🗑️", key=f"admin_delete_{file_name}", help="Delete file"):
-                                        try:
-                                            os.remove(file_path)
-                                            st.success(f"✅ Deleted {file_name}")
-                                            st.rerun()
-                                        except Exception as e:
-                                            st.error(f"❌ Error deleting file: {str(e)}")
-                            except Exception as e:
-                                st.error(f"Error accessing file {file_name}: {str(e)}")
-                        
-                        # Delete all files for this user
-                        if st.button(f"🗑️ Delete all files for {user}", key=f"delete_user_files_{user}"):
-                            deleted_count = 0
-                            failed_count = 0
-                            
-                            for file_name in files:
-                                try:
-                                    file_path = os.path.join(upload_dir, file_name)
-                                    os.remove(file_path)
-                                    deleted_count += 1
-                                except Exception:
-                                    failed_count += 1
-                            
-                            if deleted_count > 0:
-                                st.success(f"✅ Deleted {deleted_count} file(s) for {user}")
-                            if failed_count > 0:
-                                st.error(f"❌ Failed to delete {failed_count} file(s)")
-                            
-                            if deleted_count > 0:
-                                st.rerun()
-                
-                st.markdown("---")
-                
-                # Bulk operations
-                st.subheader("🗑️ Bulk Operations")
-                
-                col1, col2 = st.columns(2)
-                
+        _render_upload_files()
+
+    with cache_tab:
+        _render_shared_cache_tab()
+        st.markdown("---")
+        _render_rate_limits(environments)
+        st.markdown("---")
+        _render_circuit_breakers()
+
+    if st.button("Back to API Tester"):
+        st.session_state.admin_mode = False
+        st.rerun()
+
+
+def _store_upload(api_name, uploaded_file):
+    """Keep an uploaded file in the shared upload store under the current user
+
+    The uploader hands back the same file on every rerun, so it is stored
+    once per upload, recognized by the uploader's file_id.
+    """
+    stored_key = f"stored_upload_{api_name}"
+    if st.session_state.get(stored_key) == uploaded_file.file_id:
+        return
+    username = st.session_state.get('username', 'unknown') or 'unknown'
+    get_upload_store().put(username, api_name, uploaded_file.name, uploaded_file.getvalue())
+    st.session_state[stored_key] = uploaded_file.file_id
+
+
+def _render_upload_files():
+    """Uploaded files of all users, read from the upload index one page at a time"""
+    store = get_upload_store()
+    totals = store.totals()
+    if not totals["files"]:
+        st.info("📂 No uploaded files found")
+        st.write("Files will appear here when users upload Excel files through the AD module APIs.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Uploaded Files", totals["files"])
+    with col2:
+        st.metric("Uploaded Size", format_size(totals["size"]))
+    with col3:
+        st.metric("Stored on Disk", format_size(totals["stored_size"]),
+                  help="After removing duplicates and compressing")
+    st.caption(f"Uploads unused for {store.retention_days} days are removed, and the least recently used "
+               f"ones once storage exceeds {format_size(store.max_bytes)}.")
+
+    for user_row in store.users():
+        user = user_row["user"]
+        with st.expander(f"👤 **{user}** ({user_row['files']} files, {format_size(user_row['size'])})", expanded=False):
+            pages = max(1, math.ceil(user_row["files"] / UPLOAD_PAGE_SIZE))
+            page = 1
+            if pages > 1:
+                page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"upload_page_{user}")
+            for upload in store.query(user, UPLOAD_PAGE_SIZE, (page - 1) * UPLOAD_PAGE_SIZE):
+                col1, col2, col3 = st.columns([6, 1, 1])
                 with col1:
-                    # Delete all files
-                    if st.button("🗑️ Delete ALL Files", key="admin_delete_all_files", type="secondary"):
-                        deleted_count = 0
-                        failed_count = 0
-                        
-                        for file_name in all_files:
-                            try:
-                                file_path = os.path.join(upload_dir, file_name)
-                                os.remove(file_path)
-                                deleted_count += 1
-                            except Exception:
-                                failed_count += 1
-                        
-                        if deleted_count > 0:
-                            st.success(f"✅ Deleted {deleted_count} file(s)")
-                        if failed_count > 0:
-                            st.error(f"❌ Failed to delete {failed_count} file(s)")
-                        
-                        if deleted_count > 0:
-                            st.rerun()
-                
+                    st.text(f"📄 {upload['filename']}")
+                    st.caption(f"{upload['api']} | Uploaded: {upload['created']} | Last used: {upload['last_used']} "
+                               f"| Size: {format_size(upload['size'])}")
                 with col2:
-                    # Delete files older than X days
-                    days_old = st.number_input("Delete files older than (days):", min_value=1, max_value=365, value=30)
-                    if st.button(f"🗑️ Delete files older than {days_old} days", key="delete_old_files"):
-                        import datetime as dt
-                        cutoff_date = dt.datetime.now() - dt.timedelta(days=days_old)
-                        
-                        deleted_count = 0
-                        failed_count = 0
-                        
-                        for file_name in all_files:
-                            try:
-                                file_path = os.path.join(upload_dir, file_name)
-                                file_mtime = dt.datetime.fromtimestamp(os.path.getmtime(file_path))
-                                
-                                if file_mtime < cutoff_date:
-                                    os.remove(file_path)
-                                    deleted_count += 1
-                            except Exception:
-                                failed_count += 1
-                        
-                        if deleted_count > 0:
-                            st.success(f"✅ Deleted {deleted_count} old file(s)")
-                        elif failed_count > 0:
-                            st.error(f"❌ Failed to delete {failed_count} file(s)")
-                        else:
-                            st.info("No files older than the specified period found")
-                        
-                        if deleted_count > 0:
-                            st.rerun()
+                    if st.button("📥", key=f"admin_prepare_upload_{upload['id']}", help="Download file"):
+                        st.session_state[f"admin_upload_bytes_{upload['id']}"] = store.read(upload['id'])
+                    data = st.session_state.get(f"admin_upload_bytes_{upload['id']}")
+                    if data is not None:
+                        st.download_button("💾", data=data, file_name=upload['filename'],
+                                           key=f"admin_download_upload_{upload['id']}")
+                with col3:
+                    if st.button("🗑️", key=f"admin_delete_upload_{upload['id']}", help="Delete file"):
+                        store.delete(upload['id'])
+                        st.success(f"✅ Deleted {upload['filename']}")
+                        st.rerun()
+
+            # Delete all files for this user
+            if st.button(f"🗑️ Delete all files for {user}", key=f"delete_user_files_{user}"):
+                deleted_count = store.delete_user(user)
+                st.success(f"✅ Deleted {deleted_count} file(s) for {user}")
+                st.rerun()
+
+    st.markdown("---")
+
+    # Bulk operations
+    st.subheader("🗑️ Bulk Operations")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        if st.button("🗑️ Delete ALL Files", key="admin_delete_all_files", type="secondary"):
+            store.clear()
+            st.success(f"✅ Deleted {totals['files']} file(s)")
+            st.rerun()
+
+    with col2:
+        days_old = st.number_input("Delete files older than (days):", min_value=1, max_value=365, value=30)
+        if st.button(f"🗑️ Delete files older than {days_old} days", key="delete_old_files"):
+            deleted_count = store.delete_older_than(days_old)
+            if deleted_count > 0:
+                st.success(f"✅ Deleted {deleted_count} old file(s)")
+                st.rerun()
             else:
-                st.info("📂 No uploaded files found")
-                st.write("Files will appear here when users upload Excel files through the AD module APIs.")
-        else:
-            st.warning("📁 Upload directory does not exist")
-            st.write("The upload directory will be created automatically when the first file is uploaded.")
+                st.info("No files older than the specified period found")
 
-    if st.button("Back to API Tester"):
-        st.session_state.admin_mode = False
+    with col3:
+        if st.button("🧹 Apply Retention Now", key="apply_upload_retention"):
+            freed = store.apply_retention()
+            st.success(f"✅ Freed {freed} stored file(s)")
+            st.rerun()
+
+
+def _render_rate_limits(environments):
+    """Admin view and editor of the per-environment request budgets"""
+    st.subheader("Rate Limits")
+    st.info("Requests to an environment share one budget across all users of this server. "
+            "Waiting requests are served round-robin between users.")
+
+    stats = rate_limiter_stats()
+    if stats:
+        st.dataframe(pd.DataFrame(stats), use_container_width=True, hide_index=True)
+
+    with st.form("rate_limits_form"):
+        limits = {}
+        for env_name in environments:
+            current = environment_limits(env_name)
+            col1, col2, col3 = st.columns([2, 2, 2])
+            with col1:
+                st.write(f"**{env_name}**")
+            with col2:
+                max_rps = st.number_input("Max requests/s", min_value=0.1, value=current["max_rps"],
+                                          step=1.0, key=f"max_rps_{env_name}")
+            with col3:
+                max_concurrent = st.number_input("Max concurrent", min_value=1, value=current["max_concurrent"],
+                                                 step=1, key=f"max_concurrent_{env_name}")
+            limits[env_name] = (max_rps, max_concurrent)
+
+        if st.form_submit_button("Save Rate Limits"):
+            for env_name, (max_rps, max_concurrent) in limits.items():
+                environments[env_name]['max_rps'] = max_rps
+                environments[env_name]['max_concurrent'] = int(max_concurrent)
+            if save_environments_config(environments):
+                st.success("Rate limits saved")
+            else:
+                st.error("Failed to save rate limits")
+
+
+def _render_circuit_breakers():
+    """Admin view of the per-endpoint circuit breakers"""
+    st.subheader("Circuit Breakers")
+    st.info("An endpoint that keeps failing (connection errors or 5xx) is short-circuited for a while "
+            "so batches fail fast instead of waiting on every item, then probed with a single request.")
+
+    rows = circuit_breaker_stats()
+    if not rows:
+        st.write("No requests sent yet.")
+        return
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    if st.button("🔌 Close All Circuits", key="reset_circuit_breakers"):
+        reset_circuit_breakers()
+        st.rerun()
+
+
+def _render_shared_cache_tab():
+    """Admin view of process-wide caches versus this browser session's memory"""
+    st.subheader("Shared Cache")
+    st.info("Configs, environments, Excel templates and the HTTP connection pool are shared by all "
+            "browser sessions on this server. Changes to config files are picked up automatically; "
+            "clear the cache to force a reload.")
+
+    st.write("**Shared by all sessions:**")
+    shared_rows = shared_config_cache_info()
+    session = get_http_session()
+    pools = sum(len(adapter.poolmanager.pools) for adapter in set(session.adapters.values()))
+    shared_rows.append({"File": "HTTP connection pools", "Entries": pools, "Bytes": None})
+    http_cache_stats = get_http_cache().stats()
+    shared_rows.append({"File": "Cached GET responses", "Entries": http_cache_stats["entries"],
+                        "Bytes": http_cache_stats["bytes"]})
+    template_functions = [
+        _generate_excel_template, _generate_excel_template_ex, _generate_excel_template_student_subject,
+        _generate_excel_template_course_student, _generate_excel_template_allocate_student
+    ]
+    shared_rows.append({
+        "File": "Excel templates",
+        "Entries": len(template_functions),
+        "Bytes": sum(len(generate() or b"") for generate in template_functions)
+    })
+    shared_df = pd.DataFrame(shared_rows)
+    shared_df["Size"] = shared_df["Bytes"].map(lambda b: format_size(int(b)) if pd.notna(b) else "")
+    st.dataframe(shared_df.drop(columns=["Bytes"]), use_container_width=True, hide_index=True)
+
+    st.write("**This session:**")
+    session_rows = [
+        {"Key": str(key), "Bytes": estimate_memory(value)}
+        for key, value in st.session_state.items()
+    ]
+    session_rows.sort(key=lambda row: row["Bytes"], reverse=True)
+    st.metric("Session state (approx.)", format_size(estimate_memory(dict(st.session_state.items()))))
+    session_df = pd.DataFrame(session_rows[:15])
+    if not session_df.empty:
+        session_df["Size"] = session_df["Bytes"].map(format_size)
+        st.dataframe(session_df.drop(columns=["Bytes"]), use_container_width=True, hide_index=True)
+
+    if st.button("🧹 Clear Shared Cache", key="clear_shared_cache"):
+        clear_shared_config_cache()
+        get_http_cache().clear()
+        st.cache_resource.clear()
+        st.success("Shared cache cleared, files will be reloaded on next use")
+
+
+def show_scenario_runner():
+    """Define, validate and run multi-step scenarios over the configured APIs"""
+    st.title("🧪 Scenarios")
+    if st.button("Back to API Tester", key="scenario_back"):
+        st.session_state.scenario_mode = False
+        st.rerun()
+
+    st.info("A scenario chains API calls: steps extract values from earlier responses with JSONPath "
+            "and use them as ${variables}. Steps that do not depend on each other run concurrently.")
+
+    custom_option = "(paste your own)"
+    files = list_scenario_files()
+    source = st.selectbox("Scenario", files + [custom_option], key="scenario_file")
+    default_text = ""
+    if source != custom_option:
+        with open(os.path.join(SCENARIOS_DIR, source), 'r', encoding='utf-8') as f:
+            default_text = f.read()
+    # Keyed per file so picking another scenario reloads the editor
+    text = st.text_area("Definition (JSON or YAML)", value=default_text, height=360, key=f"scenario_text_{source}")
+    if not text.strip():
+        return
+
+    api_configs = {**load_shared_config(API_CONFIGS_FILE), **st.session_state.get('apis', {})}
+    try:
+        scenario = Scenario(parse_scenario(text, source), api_configs)
+    except ScenarioError as e:
+        st.error(f"❌ {e}")
+        return
+
+    st.subheader(scenario.name)
+    if scenario.description:
+        st.caption(scenario.description)
+    st.dataframe(pd.DataFrame(scenario.plan_rows()), use_container_width=True, hide_index=True)
+    st.download_button("📥 Download Definition", data=text.encode('utf-8'),
+                       file_name=source if source != custom_option else "scenario.json", key="scenario_download")
+
+    enabled_envs = get_enabled_environments()
+    current_env = st.session_state.get('current_env')
+    env_col, parallel_col = st.columns(2)
+    with env_col:
+        env = st.selectbox("Environment", enabled_envs, key="scenario_env",
+                           index=enabled_envs.index(current_env) if current_env in enabled_envs else 0)
+    with parallel_col:
+        max_parallel = st.slider("Max parallel steps", 1, 16, min(scenario.max_parallel, 16), key="scenario_parallel")
+
+    if st.button("▶️ Run Scenario", type="primary", key="scenario_run"):
+        _handle_scenario_run(scenario, env, max_parallel)
+
+    _render_scenario_result()
+
+
+def _handle_scenario_run(scenario, env, max_parallel):
+    """Run a scenario against an environment and keep the outcome for display"""
+    session = get_http_session()
+    user = st.session_state.get('username', '')
+    trace = Trace(f"scenario {scenario.name}", environment=env, **{"scenario.steps": len(scenario.steps)})
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    finished = []
+
+    def on_step_done(result):
+        finished.append(result.step_id)
+        progress_bar.progress(len(finished) / len(scenario.steps))
+        icon = "✅" if result.status == PASSED else "❌"
+        status_text.text(f"{icon} {result.step_id} ({len(finished)}/{len(scenario.steps)})")
+
+    with st.spinner(f"Running {scenario.name} on {env}..."):
+        result = run_scenario(
+            scenario,
+            prepare=lambda api: _build_env_request(api, env),
+            send=lambda request: _send_prepared_request(request, session, env, user),
+            max_parallel=max_parallel,
+            on_step_done=on_step_done
+        )
+    progress_bar.progress(1.0)
+
+    for step_result in result.results.values():
+        if step_result.status in (PASSED, FAILED):
+            span = trace.add_span(step_result.step_id, step_result.start_ns, step_result.end_ns,
+                                  **{"http.status_code": step_result.status_code or 0})
+            if step_result.error:
+                span.set_error(step_result.error)
+    if not result.passed:
+        trace.root.set_error("One or more steps did not pass")
+    _export_trace(trace)
+
+    st.session_state.scenario_result = {
+        "name": scenario.name,
+        "env": env,
+        "passed": result.passed,
+        "wall_ms": round(result.wall_time * 1000, 1),
+        "rows": result.rows(),
+        "critical_path": result.critical_path(),
+        "variables": {name: preview_value(value) for name, value in result.variables.items()},
+        "waterfall": trace.waterfall_rows()
+    }
+
+
+def _render_scenario_result():
+    """Per-step outcome, critical path and waterfall of the last scenario run"""
+    outcome = st.session_state.get("scenario_result")
+    if not outcome:
+        return
+    st.markdown("---")
+    st.subheader(f"Last Run: {outcome['name']} on {outcome['env']}")
+    rows = outcome['rows']
+    critical_ms = sum(row["Duration (ms)"] or 0 for row in rows if row["Critical"])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Result", "✅ Passed" if outcome['passed'] else "❌ Failed")
+    with col2:
+        st.metric("Wall Time", f"{outcome['wall_ms']} ms")
+    with col3:
+        st.metric("Critical Path", f"{round(critical_ms, 1)} ms")
+    st.write("**Critical path:** " + " → ".join(outcome['critical_path']))
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    with st.expander("⏱️ Timing", expanded=True):
+        _render_trace_waterfall(outcome['waterfall'])
+    with st.expander("🔤 Variables", expanded=False):
+        st.json(outcome['variables'])
+
+
+def show_timer_plans():
+    """Trigger timer jobs in dependency stages, now or on a cron schedule"""
+    st.title("⏱️ Timer Plans")
+    if st.button("Back to API Tester", key="timer_plan_back"):
+        st.session_state.timer_plan_mode = False
+        st.rerun()
+
+    st.info("A timer plan triggers timer jobs stage by stage: jobs in the same stage run in parallel, and a job "
+            "starts once the jobs it depends on have finished. With a status endpoint, each job is polled "
+            "until it reports completion, so the durations below are end to end.")
+
+    custom_option = "(paste your own)"
+    files = list_timer_plan_files()
+    source = st.selectbox("Timer Plan", files + [custom_option], key="timer_plan_file")
+    default_text = ""
+    if source != custom_option:
+        with open(os.path.join(TIMER_PLANS_DIR, source), 'r', encoding='utf-8') as f:
+            default_text = f.read()
+    text = st.text_area("Definition (JSON or YAML)", value=default_text, height=320, key=f"timer_plan_text_{source}")
+
+    plan = None
+    if text.strip():
+        try:
+            plan = TimerPlan(parse_timer_plan(text, source), get_timer_job_registry().entries())
+        except TimerPlanError as e:
+            st.error(f"❌ {e}")
+
+    if plan is not None:
+        st.subheader(plan.name)
+        if plan.description:
+            st.caption(plan.description)
+        st.dataframe(pd.DataFrame(plan.plan_rows()), use_container_width=True, hide_index=True)
+
+        enabled_envs = get_enabled_environments()
+        current_env = st.session_state.get('current_env')
+        env_col, parallel_col = st.columns(2)
+        with env_col:
+            env = st.selectbox("Environment", enabled_envs, key="timer_plan_env",
+                               index=enabled_envs.index(current_env) if current_env in enabled_envs else 0)
+        with parallel_col:
+            max_parallel = st.slider("Max parallel jobs", 1, 16, min(plan.max_parallel, 16), key="timer_plan_parallel")
+
+        running = st.session_state.get("timer_plan_active_run") is not None
+        if st.button("▶️ Run Now", type="primary", key="timer_plan_run", disabled=running,
+                     help="One manual run at a time; stop the current one first" if running else None):
+            _handle_timer_plan_run(plan, env, max_parallel)
+
+        with st.expander("📅 Schedule", expanded=False):
+            cron = st.text_input("Cron schedule (minute hour day month weekday)", value=plan.schedule or "0 2 * * *",
+                                 key=f"timer_plan_cron_{source}",
+                                 help="e.g. 0 2 * * 1-5 for 02:00 on weekdays, */30 * * * *, @daily")
+            try:
+                schedule = CronSchedule(cron)
+                upcoming, moment = [], datetime.datetime.now()
+                for _ in range(3):
+                    moment = schedule.next_after(moment)
+                    upcoming.append(moment.strftime("%a %Y-%m-%d %H:%M"))
+                st.caption("Next runs: " + ", ".join(upcoming))
+            except TimerPlanError as e:
+                st.error(f"❌ {e}")
+                schedule = None
+            st.caption("Scheduled runs use the cookies you have for the environment right now and run in "
+                       "this server process until it restarts.")
+            if st.button("📅 Schedule Plan", key="timer_plan_schedule", disabled=schedule is None):
+                get_timer_scheduler().add(ScheduledPlan(
+                    plan, schedule, env, st.session_state.get('username', ''),
+                    _timer_plan_runner(plan, env, max_parallel, "schedule")
+                ))
+                st.success(f"✅ Scheduled {plan.name} on {env}")
+
+    # Scheduled runs carry their owner's cookies, so only admins see and unschedule everyone's
+    username = st.session_state.get('username', '')
+    is_admin = st.session_state.get("is_admin", False)
+    scheduled_rows = get_timer_scheduler().rows(None if is_admin else username)
+    if scheduled_rows:
+        st.markdown("---")
+        st.subheader("Scheduled Plans")
+        st.dataframe(pd.DataFrame(scheduled_rows), use_container_width=True, hide_index=True)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            key = st.selectbox("Scheduled plan", [row["Key"] for row in scheduled_rows], key="timer_plan_unschedule_key")
+        with col2:
+            st.write("")
+            if st.button("🗑️ Unschedule", key="timer_plan_unschedule"):
+                if get_timer_scheduler().remove(key, username, is_admin):
+                    st.rerun()
+                st.error("❌ Only the owner or an admin can unschedule this plan")
+
+    if st.session_state.get("timer_plan_active_run") is not None:
+        _render_timer_plan_progress()
+    _render_timer_plan_result()
+
+    job_rows = job_run_log()
+    if job_rows:
+        st.markdown("---")
+        st.subheader("Job Durations")
+        log_df = pd.DataFrame(job_rows)
+        st.dataframe(log_df, use_container_width=True, hide_index=True)
+        st.download_button("📥 Download CSV", data=log_df.to_csv(index=False).encode('utf-8-sig'),
+                           file_name="timer_job_durations.csv", mime="text/csv", key="timer_plan_log_csv")
+
+
+def _timer_plan_runner(plan, env, max_parallel, trigger, on_job_done=None, on_job_start=None):
+    """A callable running the plan on env, usable from threads without a Streamlit session
+
+    Cookies, the HTTP session, the user and the trace file are captured now,
+    so background and scheduled runs keep working after the page that
+    created them is gone.
+    """
+    cookies = _build_env_request({"path": "", "module": "EX"}, env).get('cookies', {})
+    session = get_http_session()
+    user = st.session_state.get('username', '')
+    traces_file = (st.session_state.get('file_paths') or {}).get("TRACES_FILE")
+
+    def prepare(api):
+        return {**api, "url": f"{get_current_base_url(env, api['module'])}{api['path']}", "cookies": cookies}
+
+    def run(stop):
+        trace = Trace(f"timer plan {plan.name}", environment=env, **{"timer_plan.jobs": len(plan.jobs),
+                                                                      "timer_plan.trigger": trigger})
+        result = run_timer_plan(plan, prepare, lambda request: _send_prepared_request(request, session, env, user),
+                                max_parallel, on_job_done, stop, trigger, on_job_start)
+        for job_result in result.results.values():
+            if job_result.end_ns:
+                span = trace.add_span(job_result.job_id, job_result.start_ns, job_result.end_ns,
+                                      **{"timer_job.id": job_result.timer_job_id, "timer_job.polls": job_result.polls})
+                if job_result.status != PASSED:
+                    span.set_error(job_result.error or job_result.status)
+        if not result.passed:
+            trace.root.set_error("One or more jobs did not pass")
+        export_trace(trace, traces_file)
+        result.waterfall = trace.waterfall_rows()
+        return result
+
+    return run
+
+
+def _handle_timer_plan_run(plan, env, max_parallel):
+    """Start a timer plan in the background; its progress is polled by _render_timer_plan_progress"""
+    progress = PlanProgress(plan)
+    stop = threading.Event()
+    runner = _timer_plan_runner(plan, env, max_parallel, "manual", progress.job_done, progress.job_started)
+    st.session_state.timer_plan_active_run = {
+        "name": plan.name,
+        "env": env,
+        "progress": progress,
+        "stop": stop,
+        "future": submit_plan_run(runner, stop, env)
+    }
+    # Render the page again so Run Now is disabled and the progress shows
+    st.rerun()
+
+
+@st.fragment(run_every=TIMER_PLAN_POLL_SECONDS)
+def _render_timer_plan_progress():
+    """Per-job progress of the manual run in the background, with a Stop button
+
+    Reruns on its own every few seconds without blocking the rest of the
+    page, and hands over to _render_timer_plan_result once the run ends.
+    """
+    run = st.session_state.get("timer_plan_active_run")
+    if run is None:
+        return
+    future = run["future"]
+    if future.done():
+        del st.session_state.timer_plan_active_run
+        try:
+            result = future.result()
+        except Exception as e:
+            st.session_state.timer_plan_result = {"name": run["name"], "env": run["env"], "error": str(e)}
+        else:
+            st.session_state.timer_plan_result = {
+                "name": run["name"],
+                "env": run["env"],
+                "passed": result.passed,
+                "wall_s": round(result.wall_time, 1),
+                "rows": result.rows(),
+                "waterfall": result.waterfall
+            }
         st.rerun()
+
+    progress = run["progress"]
+    total = len(progress.plan.jobs)
+    finished = progress.finished()
+    st.markdown("---")
+    st.subheader(f"Running: {run['name']} on {run['env']}")
+    st.progress(finished / total, text=f"{finished}/{total} job(s) finished")
+    if not run["stop"].is_set() and st.button("⏹️ Stop", key="timer_plan_stop"):
+        run["stop"].set()
+    if run["stop"].is_set():
+        st.caption("Stopping: running jobs stop polling and the rest are skipped...")
+    st.dataframe(pd.DataFrame(progress.rows()), use_container_width=True, hide_index=True)
+
+
+def _render_timer_plan_result():
+    """Per-job outcome and waterfall of the last manual run"""
+    outcome = st.session_state.get("timer_plan_result")
+    if not outcome:
+        return
+    st.markdown("---")
+    st.subheader(f"Last Run: {outcome['name']} on {outcome['env']}")
+    if outcome.get("error"):
+        st.error(f"❌ The run failed: {outcome['error']}")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Result", "✅ Passed" if outcome['passed'] else "❌ Failed")
+    with col2:
+        st.metric("Wall Time", f"{outcome['wall_s']} s")
+    st.dataframe(pd.DataFrame(outcome['rows']), use_container_width=True, hide_index=True)
+    with st.expander("⏱️ Timing", expanded=True):
+        _render_trace_waterfall(outcome['waterfall'])
+
+
 def main():
     """Main."""
     # Initialize session state
@@ -1806,6 +1909,14 @@ def main():
         show_admin_panel()
         return
 
+    if st.session_state.get("scenario_mode", False):
+        show_scenario_runner()
+        return
+
+    if st.session_state.get("timer_plan_mode", False):
+        show_timer_plans()
+        return
+
     # Save current user data before any operations
     _save_current_user_data()
 
@@ -1813,7 +1924,7 @@ def main():
     file_paths = st.session_state.file_paths
 
     # Help and content buttons above title
-    col1, col2, col3 = st.columns([1, 1, 8])
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 6])
     
     with col1:
         if st.button("📖 Instruction", help="Take a look about instruction"):
@@ -1823,6 +1934,16 @@ def main():
         if st.button("⏰ Timer Run", help="View Timer Job APIs information"):
             show_timer_job_dialog()
 
+    with col3:
+        if st.button("🧪 Scenarios", help="Run multi-step API scenarios"):
+            st.session_state.scenario_mode = True
+            st.rerun()
+
+    with col4:
+        if st.button("⏱️ Timer Plans", help="Trigger timer jobs in stages, now or on a schedule"):
+            st.session_state.timer_plan_mode = True
+            st.rerun()
+
     # Create a layout with title and user switcher
     title_col, user_col, _ = st.columns([2, 3, 3])
 
@@ -1932,6 +2053,7 @@ def main():
         if st.sidebar.button("Admin Panel"):
             st.session_state.admin_mode = True
             st.rerun()
+        _render_profiler_controls()
 
     # Individual user logout
     username = st.session_state.get('username', 'Unknown')
@@ -1963,11 +2085,8 @@ def main():
             if st.session_state.active_user in st.session_state.logged_in_users:
                 st.session_state.logged_in_users[st.session_state.active_user]['current_env'] = env
 
-            # Refresh cookies config to get latest admin values for all environments
-            st.session_state.cookies_config = load_cookies_config(
-                st.session_state.file_paths["COOKIES_CONFIG_FILE"],
-                ADMIN_COOKIES_FILE
-            )
+            # Refresh cookies config so every enabled environment has an entry
+            st.session_state.cookies_config = load_cookies_config(st.session_state.file_paths["COOKIES_CONFIG_FILE"])
 
             # Update URLs for all APIs to use the new environment's base URL
             for api_name in st.session_state.apis:
@@ -2284,12 +2403,7 @@ def manage_cookies(file_path):
         env_cookies_string = st.session_state.cookies_config.get(st.session_state.current_env, "")
 
         # Show admin cookies for reference
-        admin_cookies = {}
-        if os.path.exists(ADMIN_COOKIES_FILE):
-            try:
-                admin_cookies = load_api_configs(ADMIN_COOKIES_FILE)
-            except:
-                admin_cookies = {}
+        admin_cookies = load_shared_config(ADMIN_COOKIES_FILE)
         
         admin_cookie_value = admin_cookies.get(st.session_state.current_env, "")
         if admin_cookie_value:
@@ -2395,7 +2509,7 @@ def add_new_api():
 def load_predefined_api(file_path):
     """Load predefined API for viewing without saving to user list"""
     # Load predefined API tests from JSON file
-    predefined_configs = load_api_configs(file_path)
+    predefined_configs = load_shared_config(file_path)
 
     if not predefined_configs:
         st.warning("No predefined API configurations found")
@@ -2439,7 +2553,8 @@ def load_predefined_api(file_path):
 
     if selected_api and st.button("Load Predefined Test"):
         # Convert the configuration to a complete API configuration
-        api_config = filtered_configs[selected_api].copy()
+        # Deep copy, the shared config must not be edited through the user's API
+        api_config = copy.deepcopy(filtered_configs[selected_api])
 
         # Get the path from the config
         path = api_config.get("path", "")
@@ -2502,6 +2617,14 @@ def load_predefined_api(file_path):
         st.info("This API is in preview mode. Save it to add permanently to your saved APIs.")
         st.rerun()
 
+def _get_body_document(api_name):
+    """Get the cached body document for an API, creating it on first use"""
+    doc_key = f"body_doc_{api_name}"
+    if doc_key not in st.session_state:
+        st.session_state[doc_key] = BodyDocument()
+    return st.session_state[doc_key]
+
+
 def _render_headers_section(api):
     """Render the headers section of the API tester"""
     with st.expander("Headers", expanded=False):
@@ -2594,6 +2717,7 @@ def _render_parameters_section(api):
             st.rerun()
 
 
+@st.cache_resource(show_spinner=False)
 def _generate_excel_template():
     """Generate Excel template with sample data for student upload"""
     try:
@@ -2709,6 +2833,7 @@ def _generate_excel_template():
         return None
 
 
+@st.cache_resource(show_spinner=False)
 def _generate_excel_template_ex():
     """Generate Excel template with sample data for EX module API (Assessment Student Info V2)"""
     try:
@@ -2824,6 +2949,7 @@ def _generate_excel_template_ex():
         return None
 
 
+@st.cache_resource(show_spinner=False)
 def _generate_excel_template_student_subject():
     """Generate Excel template with sample data for Student Subject API (DEVAddStudentV2)"""
     try:
@@ -2948,6 +3074,7 @@ def _generate_excel_template_student_subject():
         return None
 
 
+@st.cache_resource(show_spinner=False)
 def _generate_excel_template_course_student():
     """Generate Excel template with sample data for Course Student API (AssessmentStudentInfo/DEVAddStudentV2)"""
     try:
@@ -3149,35 +3276,8 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
     # Process uploaded file
     if uploaded_file is not None:
         try:
-            # Create upload_data directory if it doesn't exist
-            upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Generate unique filename with timestamp
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            username = st.session_state.get('username', 'unknown')
-            
-            # Clean names for file path
-            clean_username = ''.join(c for c in username if c.isalnum() or c in '-_').strip()
-            if not clean_username:
-                clean_username = 'unknown'
-            
-            clean_api_name = ''.join(c for c in api_name if c.isalnum() or c in '-_').strip()
-            if not clean_api_name:
-                clean_api_name = 'course_api'
-            
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            if not file_extension:
-                file_extension = '.xlsx'
-            
-            saved_filename = f"{clean_username}_{clean_api_name}_{timestamp}{file_extension}"
-            saved_file_path = os.path.join(upload_dir, saved_filename)
-            
-            # Save the uploaded file
-            with open(saved_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Keep a copy of the upload, re-uploading the same file only refreshes it
+            _store_upload(api_name, uploaded_file)
             
             # Read Excel file
             df = pd.read_excel(uploaded_file)
@@ -3226,7 +3326,7 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
                 api['body'] = json_body
                 
                 # Update session state
-                formatted_json = json.dumps(json_body, indent=2, ensure_ascii=False)
+                formatted_json = _get_body_document(api_name).text(json_body)
                 body_json_key = f"original_body_json_{api_name}"
                 st.session_state[body_json_key] = formatted_json
                 st.session_state[f"json_body_course_{api_name}"] = formatted_json
@@ -3261,7 +3361,8 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
             }
             
         # Keep track of original JSON to detect changes
-        original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+        body_doc = _get_body_document(api_name)
+        original_json = body_doc.text(api['body'])
         body_json_key = f"original_body_json_{api_name}"
         
         if body_json_key not in st.session_state:
@@ -3274,8 +3375,8 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
                 try:
                     # Parse and reformat the current JSON
                     current_json = st.session_state.get(f"json_body_course_{api_name}", original_json)
-                    parsed = json.loads(current_json)
-                    formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                    parsed = body_doc.parse(current_json)
+                    formatted_json = body_doc.text(parsed)
                     
                     # Update the API body and session state
                     api['body'] = parsed
@@ -3303,7 +3404,7 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
 
         try:
             # Parse and validate the JSON
-            parsed_body = json.loads(body_json)
+            parsed_body = body_doc.parse(body_json)
             api['body'] = parsed_body
             
             # Only update session state if JSON changed
@@ -3318,7 +3419,7 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
             
         # Show a preview of the parsed JSON structure if valid
         try:
-            parsed_preview = json.loads(body_json)
+            parsed_preview = body_doc.parse(body_json)
             if parsed_preview:
                 with st.expander("📋 JSON Structure Preview", expanded=False):
                     st.json(parsed_preview)
@@ -3326,6 +3427,7 @@ def _render_excel_upload_section_course_student(api_name, api, file_paths):
             pass
 
 
+@st.cache_resource(show_spinner=False)
 def _generate_excel_template_allocate_student():
     """Generate Excel template with sample data for Allocate Student API (DEVAllocateStudent dual API)"""
     try:
@@ -3546,38 +3648,8 @@ def _render_excel_upload_section(api_name, api, file_paths):
     # Process uploaded file
     if uploaded_file is not None:
         try:
-            # Create upload_data directory if it doesn't exist
-            upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Generate unique filename with timestamp - clean up names to avoid path issues
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            username = st.session_state.get('username', 'unknown')
-            
-            # Clean username - remove any characters that might cause path issues
-            clean_username = ''.join(c for c in username if c.isalnum() or c in '-_').strip()
-            if not clean_username:
-                clean_username = 'unknown'
-            
-            # Clean API name - remove any characters that might cause path issues
-            clean_api_name = ''.join(c for c in api_name if c.isalnum() or c in '-_').strip()
-            if not clean_api_name:
-                clean_api_name = 'api'
-            
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            if not file_extension:
-                file_extension = '.xlsx'  # Default extension
-            
-            saved_filename = f"{clean_username}_{clean_api_name}_{timestamp}{file_extension}"
-            saved_file_path = os.path.join(upload_dir, saved_filename)
-            
-            # Save the uploaded file
-            with open(saved_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
-            # st.success(f"📁 File saved as: {saved_filename}")
+            # Keep a copy of the upload, re-uploading the same file only refreshes it
+            _store_upload(api_name, uploaded_file)
             
             # Read Excel file directly from uploaded file buffer, not from saved file
             df = pd.read_excel(uploaded_file)
@@ -3619,7 +3691,7 @@ def _render_excel_upload_section(api_name, api, file_paths):
                 api['body'] = json_body
                 
                 # Update session state
-                formatted_json = json.dumps(json_body, indent=2, ensure_ascii=False)
+                formatted_json = _get_body_document(api_name).text(json_body)
                 body_json_key = f"original_body_json_{api_name}"
                 st.session_state[body_json_key] = formatted_json
                 st.session_state[f"json_body_{api_name}"] = formatted_json
@@ -3689,7 +3761,8 @@ def _render_excel_upload_section(api_name, api, file_paths):
             api['body'] = {"students": []}
             
         # Keep track of original JSON to detect changes
-        original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+        body_doc = _get_body_document(api_name)
+        original_json = body_doc.text(api['body'])
         body_json_key = f"original_body_json_{api_name}"
         
         if body_json_key not in st.session_state:
@@ -3702,8 +3775,8 @@ def _render_excel_upload_section(api_name, api, file_paths):
                 try:
                     # Parse and reformat the current JSON
                     current_json = st.session_state.get(f"json_body_{api_name}", original_json)
-                    parsed = json.loads(current_json)
-                    formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                    parsed = body_doc.parse(current_json)
+                    formatted_json = body_doc.text(parsed)
                     
                     # Update the API body and session state
                     api['body'] = parsed
@@ -3731,7 +3804,7 @@ def _render_excel_upload_section(api_name, api, file_paths):
 
         try:
             # Parse the JSON
-            parsed_body = json.loads(body_json)
+            parsed_body = body_doc.parse(body_json)
             api['body'] = parsed_body
             
             # Show JSON validation status
@@ -3759,7 +3832,7 @@ def _render_excel_upload_section(api_name, api, file_paths):
             
         # Show a preview of the parsed JSON structure if valid
         try:
-            parsed_preview = json.loads(body_json)
+            parsed_preview = body_doc.parse(body_json)
             if parsed_preview:
                 with st.expander("📋 JSON Structure Preview", expanded=False):
                     st.json(parsed_preview)
@@ -3818,7 +3891,9 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
                     api['body']['maxStudentSize'] = max_student_size
                     
                     # Update the JSON in the text area as well
-                    formatted_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+                    body_doc = _get_body_document(api_name)
+                    body_doc.touch()
+                    formatted_json = body_doc.text(api['body'])
                     body_json_key = f"original_body_json_{api_name}"
                     st.session_state[body_json_key] = formatted_json
                     st.session_state[f"json_body_ex_{api_name}"] = formatted_json
@@ -3876,36 +3951,8 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
     # Process uploaded file
     if uploaded_file is not None:
         try:
-            # Create upload_data directory if it doesn't exist
-            upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Generate unique filename with timestamp - clean up names to avoid path issues
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            username = st.session_state.get('username', 'unknown')
-            
-            # Clean username - remove any characters that might cause path issues
-            clean_username = ''.join(c for c in username if c.isalnum() or c in '-_').strip()
-            if not clean_username:
-                clean_username = 'unknown'
-            
-            # Clean API name - remove any characters that might cause path issues
-            clean_api_name = ''.join(c for c in api_name if c.isalnum() or c in '-_').strip()
-            if not clean_api_name:
-                clean_api_name = 'api'
-            
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            if not file_extension:
-                file_extension = '.xlsx'  # Default extension
-            
-            saved_filename = f"{clean_username}_{clean_api_name}_{timestamp}{file_extension}"
-            saved_file_path = os.path.join(upload_dir, saved_filename)
-            
-            # Save the uploaded file
-            with open(saved_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Keep a copy of the upload, re-uploading the same file only refreshes it
+            _store_upload(api_name, uploaded_file)
             
             # Read Excel file directly from uploaded file buffer, not from saved file
             df = pd.read_excel(uploaded_file)
@@ -3960,7 +4007,7 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
                 api['body'] = json_body
                 
                 # Update session state
-                formatted_json = json.dumps(json_body, indent=2, ensure_ascii=False)
+                formatted_json = _get_body_document(api_name).text(json_body)
                 body_json_key = f"original_body_json_{api_name}"
                 st.session_state[body_json_key] = formatted_json
                 st.session_state[f"json_body_{api_name}"] = formatted_json
@@ -4004,7 +4051,8 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
             }
             
         # Keep track of original JSON to detect changes
-        original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+        body_doc = _get_body_document(api_name)
+        original_json = body_doc.text(api['body'])
         body_json_key = f"original_body_json_{api_name}"
         
         if body_json_key not in st.session_state:
@@ -4017,8 +4065,8 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
                 try:
                     # Parse and reformat the current JSON
                     current_json = st.session_state.get(f"json_body_{api_name}", original_json)
-                    parsed = json.loads(current_json)
-                    formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                    parsed = body_doc.parse(current_json)
+                    formatted_json = body_doc.text(parsed)
                     
                     # Update the API body and session state
                     api['body'] = parsed
@@ -4046,7 +4094,7 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
 
         try:
             # Parse the JSON
-            parsed_body = json.loads(body_json)
+            parsed_body = body_doc.parse(body_json)
             api['body'] = parsed_body
             
             # Show subject codes count if applicable
@@ -4068,7 +4116,7 @@ def _render_excel_upload_section_ex(api_name, api, file_paths):
             
         # Show a preview of the parsed JSON structure if valid
         try:
-            parsed_preview = json.loads(body_json)
+            parsed_preview = body_doc.parse(body_json)
             if parsed_preview:
                 with st.expander("📋 JSON Structure Preview", expanded=False):
                     st.json(parsed_preview)
@@ -4125,36 +4173,8 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
     # Process uploaded file
     if uploaded_file is not None:
         try:
-            # Create upload_data directory if it doesn't exist
-            upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Generate unique filename with timestamp - clean up names to avoid path issues
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            username = st.session_state.get('username', 'unknown')
-            
-            # Clean username - remove any characters that might cause path issues
-            clean_username = ''.join(c for c in username if c.isalnum() or c in '-_').strip()
-            if not clean_username:
-                clean_username = 'unknown'
-            
-            # Clean API name - remove any characters that might cause path issues
-            clean_api_name = ''.join(c for c in api_name if c.isalnum() or c in '-_').strip()
-            if not clean_api_name:
-                clean_api_name = 'api'
-            
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            if not file_extension:
-                file_extension = '.xlsx'  # Default extension
-            
-            saved_filename = f"{clean_username}_{clean_api_name}_{timestamp}{file_extension}"
-            saved_file_path = os.path.join(upload_dir, saved_filename)
-            
-            # Save the uploaded file
-            with open(saved_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Keep a copy of the upload, re-uploading the same file only refreshes it
+            _store_upload(api_name, uploaded_file)
             
             # Read Excel file directly from uploaded file buffer, not from saved file
             df = pd.read_excel(uploaded_file)
@@ -4206,7 +4226,7 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
                 api['body'] = json_body
                 
                 # Update session state
-                formatted_json = json.dumps(json_body, indent=2, ensure_ascii=False)
+                formatted_json = _get_body_document(api_name).text(json_body)
                 body_json_key = f"original_body_json_{api_name}"
                 st.session_state[body_json_key] = formatted_json
                 st.session_state[f"json_body_{api_name}"] = formatted_json
@@ -4249,7 +4269,8 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
             }
             
         # Keep track of original JSON to detect changes
-        original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+        body_doc = _get_body_document(api_name)
+        original_json = body_doc.text(api['body'])
         body_json_key = f"original_body_json_{api_name}"
         
         if body_json_key not in st.session_state:
@@ -4262,8 +4283,8 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
                 try:
                     # Parse and reformat the current JSON
                     current_json = st.session_state.get(f"json_body_{api_name}", original_json)
-                    parsed = json.loads(current_json)
-                    formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                    parsed = body_doc.parse(current_json)
+                    formatted_json = body_doc.text(parsed)
                     
                     # Update the API body and session state
                     api['body'] = parsed
@@ -4291,7 +4312,7 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
 
         try:
             # Parse the JSON
-            parsed_body = json.loads(body_json)
+            parsed_body = body_doc.parse(body_json)
             api['body'] = parsed_body
             
             # Show student info count if applicable
@@ -4313,7 +4334,7 @@ def _render_excel_upload_section_student_subject(api_name, api, file_paths):
             
         # Show a preview of the parsed JSON structure if valid
         try:
-            parsed_preview = json.loads(body_json)
+            parsed_preview = body_doc.parse(body_json)
             if parsed_preview:
                 with st.expander("📋 JSON Structure Preview", expanded=False):
                     st.json(parsed_preview)
@@ -4335,6 +4356,7 @@ def _update_batch_mark_values(api_name, api, max_mark_value, min_mark_value):
     api['body']['maxMark'] = max_mark_value
     api['body']['minMark'] = min_mark_value
     api['body']['fixedMark'] = None
+    _get_body_document(api_name).touch()
     
     # Save to user data for persistence
     _save_current_user_data()
@@ -4350,6 +4372,7 @@ def _update_batch_fixed_mark_value(api_name, api, fixed_mark_value):
     api['body']['fixedMark'] = fixed_mark_value
     api['body']['maxMark'] = None
     api['body']['minMark'] = None
+    _get_body_document(api_name).touch()
 
     _save_current_user_data()
 
@@ -4442,6 +4465,7 @@ def _render_auto_mark_entry_section(api_name, api, file_paths):
                 api['body']['maxMark'] = max_mark
                 api['body']['minMark'] = min_mark
                 api['body']['fixedMark'] = None
+                _get_body_document(api_name).touch()
                 st.session_state[f"max_mark_value_{api_name}"] = max_mark
                 st.session_state[f"min_mark_value_{api_name}"] = min_mark
 
@@ -4466,6 +4490,7 @@ def _render_auto_mark_entry_section(api_name, api, file_paths):
                 api['body']['fixedMark'] = fixed_mark
                 api['body']['maxMark'] = None
                 api['body']['minMark'] = None
+                _get_body_document(api_name).touch()
                 st.session_state[f"fixed_mark_value_{api_name}"] = fixed_mark
 
             st.markdown("---")
@@ -4543,6 +4568,8 @@ def _render_auto_mark_entry_section(api_name, api, file_paths):
                 api['body'] = {}
 
             api['body']['semesterId'] = semester_id
+            # Body was edited in place above, so the manual editor must re-serialize
+            _get_body_document(api_name).touch()
 
             # Use the actual input values from the form, not session state fallbacks
             if mark_mode == "Fixed Mark":
@@ -4596,6 +4623,7 @@ It will make 3 API calls:
                     api['body']['maxMark'] = final_max_mark
                     api['body']['minMark'] = final_min_mark
                     api['body']['fixedMark'] = None
+                _get_body_document(api_name).touch()
                 
                 # Capture the latest subject IDs and student IDs from session state (which are updated by the widgets)
                 latest_subject_ids_input = st.session_state.get(f"subject_ids_{api_name}", "")
@@ -4630,7 +4658,8 @@ It will make 3 API calls:
                     'minMark': 0
                 }
             
-            original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+            body_doc = _get_body_document(api_name)
+            original_json = body_doc.text(api['body'])
             
             # Add helpful buttons for common JSON operations
             col1, col2, col3 = st.columns(3)
@@ -4647,8 +4676,8 @@ It will make 3 API calls:
             with col2:
                 if st.button("🔄 Format JSON", key=f"format_json_{api_name}"):
                     try:
-                        parsed = json.loads(st.session_state.get(f"json_body_manual_{api_name}", original_json))
-                        formatted = json.dumps(parsed, indent=2, ensure_ascii=False)
+                        parsed = body_doc.parse(st.session_state.get(f"json_body_manual_{api_name}", original_json))
+                        formatted = body_doc.text(parsed)
                         st.session_state[f"json_body_manual_{api_name}"] = formatted
                         st.rerun()
                     except:
@@ -4666,7 +4695,7 @@ It will make 3 API calls:
             )
             
             try:
-                parsed_body = json.loads(body_json)
+                parsed_body = body_doc.parse(body_json)
                 api['body'] = parsed_body
                 
                 # Validate required fields
@@ -4688,11 +4717,20 @@ It will make 3 API calls:
 
 def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_paths):
     """Handle batch processing for Auto Mark Entry API"""
-    
+
+    trace = Trace(f"batch {api_name}", **{
+        "api.name": api_name,
+        "environment": st.session_state.current_env,
+        "batch.size": len(subject_ids)
+    })
     total_ids = len(subject_ids)
     success_count = 0
     failed_count = 0
     results = []
+
+    # The whole batch shares one deadline, each item gets at most what is left of it
+    env_config = load_shared_environments_config().get(st.session_state.current_env, {})
+    deadline = Deadline(batch_deadline_seconds(api, env_config))
     
     # Create progress tracking
     progress_bar = st.progress(0)
@@ -4705,6 +4743,18 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
     
     # Process each subject ID
     for i, subject_id in enumerate(subject_ids, 1):
+        if deadline.expired():
+            skipped = subject_ids[i - 1:]
+            failed_count += len(skipped)
+            results.extend({
+                'subject_id': skipped_id,
+                'status': 'skipped',
+                'status_code': 'N/A',
+                'message': 'Batch deadline reached'
+            } for skipped_id in skipped)
+            st.warning(f"⏰ Batch deadline of {deadline.seconds:.0f}s reached, {len(skipped)} item(s) not sent")
+            break
+
         status_text.text(f"Processing {i}/{total_ids}: {subject_id}")
         progress_bar.progress(i / total_ids)
         
@@ -4717,20 +4767,24 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
         print(f"[DEBUG] Batch call {i} - batch_api['body']: {batch_api['body']}")
         
         try:
-            # Load cookies dynamically
-            _load_dynamic_cookies_for_request(batch_api)
-            
-            # Get current module and build URL
-            api_module = batch_api.get('module', 'EX')
-            base_url = get_current_base_url(st.session_state.current_env, api_module)
-            path = batch_api.get('path', '')
-            full_url = f"{base_url}{path}"
-            
-            # Update batch_api with full URL for the request
-            batch_api['url'] = full_url
-            
-            # Make the request
-            response = make_http_request(batch_api)
+            with trace.span(f"item {i}: {subject_id}") as item_span:
+                # Load cookies dynamically
+                with trace.span("load cookies"):
+                    _load_dynamic_cookies_for_request(batch_api)
+
+                # Get current module and build URL
+                api_module = batch_api.get('module', 'EX')
+                base_url = get_current_base_url(st.session_state.current_env, api_module)
+                path = batch_api.get('path', '')
+                full_url = f"{base_url}{path}"
+
+                # Update batch_api with full URL for the request
+                batch_api['url'] = full_url
+
+                # Make the request
+                response = _traced_http_request(trace, batch_api, deadline=deadline)
+                if not 200 <= response.status_code < 300:
+                    item_span.set_error(f"HTTP {response.status_code}")
             
             # Check response status
             if response.status_code >= 200 and response.status_code < 300:
@@ -4751,10 +4805,7 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
                     'message': f"Error: {response.status_code}"
                 })
                 st.error(f"❌ {i}/{total_ids}: {subject_id} - Failed (Status: {response.status_code})")
-            
-            # Small delay between requests to avoid overwhelming the server
-            time.sleep(0.5)
-            
+
         except Exception as e:
             failed_count += 1
             results.append({
@@ -4768,6 +4819,7 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
     # Complete
     progress_bar.progress(1.0)
     status_text.text("✅ Batch processing completed!")
+    _export_trace(trace)
     
     # Summary
     st.write("---")
@@ -4785,6 +4837,9 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
     with st.expander("📋 Detailed Results", expanded=True):
         results_df = pd.DataFrame(results)
         st.dataframe(results_df, use_container_width=True)
+
+    with st.expander("⏱️ Timing", expanded=False):
+        _render_trace_waterfall(trace.waterfall_rows())
     
     # Save to history if there were successes
     if success_count > 0:
@@ -4807,7 +4862,7 @@ def _handle_auto_mark_entry_batch(api_name, api, subject_ids, student_ids, file_
             f"{api_name} (Batch)",
             api,
             summary_response,
-            file_paths["API_HISTORY_FILE"]
+            file_paths
         )
 
 
@@ -4958,35 +5013,8 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
     # Process uploaded file
     if uploaded_file is not None:
         try:
-            # Create upload_data directory if it doesn't exist
-            upload_dir = os.path.join(os.path.dirname(__file__), "upload_data")
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Generate unique filename with timestamp
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            username = st.session_state.get('username', 'unknown')
-            
-            # Clean names for file path
-            clean_username = ''.join(c for c in username if c.isalnum() or c in '-_').strip()
-            if not clean_username:
-                clean_username = 'unknown'
-            
-            clean_api_name = ''.join(c for c in api_name if c.isalnum() or c in '-_').strip()
-            if not clean_api_name:
-                clean_api_name = 'allocate_api'
-            
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            if not file_extension:
-                file_extension = '.xlsx'
-            
-            saved_filename = f"{clean_username}_{clean_api_name}_{timestamp}{file_extension}"
-            saved_file_path = os.path.join(upload_dir, saved_filename)
-            
-            # Save the uploaded file
-            with open(saved_file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Keep a copy of the upload, re-uploading the same file only refreshes it
+            _store_upload(api_name, uploaded_file)
             
             # Read Excel file
             df = pd.read_excel(uploaded_file)
@@ -5048,7 +5076,7 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
                 api['body'] = json_body
                 
                 # Update session state
-                formatted_json = json.dumps(json_body, indent=2, ensure_ascii=False)
+                formatted_json = _get_body_document(api_name).text(json_body)
                 body_json_key = f"original_body_json_{api_name}"
                 st.session_state[body_json_key] = formatted_json
                 st.session_state[f"json_body_allocate_{api_name}"] = formatted_json
@@ -5091,7 +5119,8 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
             }
             
         # Keep track of original JSON to detect changes
-        original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+        body_doc = _get_body_document(api_name)
+        original_json = body_doc.text(api['body'])
         body_json_key = f"original_body_json_{api_name}"
         
         if body_json_key not in st.session_state:
@@ -5104,8 +5133,8 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
                 try:
                     # Parse and reformat the current JSON
                     current_json = st.session_state.get(f"json_body_allocate_{api_name}", original_json)
-                    parsed = json.loads(current_json)
-                    formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                    parsed = body_doc.parse(current_json)
+                    formatted_json = body_doc.text(parsed)
                     
                     # Update the API body and session state
                     api['body'] = parsed
@@ -5133,7 +5162,7 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
 
         try:
             # Parse and validate the JSON
-            parsed_body = json.loads(body_json)
+            parsed_body = body_doc.parse(body_json)
             api['body'] = parsed_body
             
             # Only update session state if JSON changed
@@ -5148,7 +5177,7 @@ def _render_excel_upload_section_allocate_student(api_name, api, file_paths):
             
         # Show a preview of the parsed JSON structure if valid
         try:
-            parsed_preview = json.loads(body_json)
+            parsed_preview = body_doc.parse(body_json)
             if parsed_preview:
                 with st.expander("📋 JSON Structure Preview", expanded=False):
                     st.json(parsed_preview)
@@ -5275,11 +5304,14 @@ def _render_body_section(api_name, api, file_paths):
             if current_env != "SIT" and ("statistic" in api_name.lower() or "ProcessingResult" in api.get('path', '')):
                 if 'courseCode' in api['body'] and api['body']['courseCode'] == "A0D":
                     api['body']['courseCode'] = ""  # Reset to empty for non-SIT
+                    _get_body_document(api_name).touch()
                 if 'admissionNumbers' in api['body'] and not api['body']['admissionNumbers']:
                     api['body']['admissionNumbers'] = ["ADM001", "ADM002"]  # Set default if empty
+                    _get_body_document(api_name).touch()
                 
             # Keep track of original JSON to detect changes
-            original_json = json.dumps(api['body'], indent=2, ensure_ascii=False)
+            body_doc = _get_body_document(api_name)
+            original_json = body_doc.text(api['body'])
             body_json_key = f"original_body_json_{api_name}"
             
             if body_json_key not in st.session_state:
@@ -5292,8 +5324,8 @@ def _render_body_section(api_name, api, file_paths):
                     try:
                         # Parse and reformat the current JSON
                         current_json = st.session_state.get(f"json_body_{api_name}", original_json)
-                        parsed = json.loads(current_json)
-                        formatted_json = json.dumps(parsed, indent=2, ensure_ascii=False)
+                        parsed = body_doc.parse(current_json)
+                        formatted_json = body_doc.text(parsed)
                         
                         # Update the API body and session state
                         api['body'] = parsed
@@ -5322,7 +5354,7 @@ def _render_body_section(api_name, api, file_paths):
 
             try:
                 # Parse the JSON
-                parsed_body = json.loads(body_json)
+                parsed_body = body_doc.parse(body_json)
                 api['body'] = parsed_body
                 
                 # Auto-save if JSON has changed and is valid
@@ -5342,7 +5374,7 @@ def _render_body_section(api_name, api, file_paths):
                 
             # Show a preview of the parsed JSON structure if valid
             try:
-                parsed_preview = json.loads(body_json)
+                parsed_preview = body_doc.parse(body_json)
                 if parsed_preview:
                     with st.expander("📋 JSON Structure Preview", expanded=False):
                         st.json(parsed_preview)
@@ -5378,12 +5410,7 @@ def _render_cookies_section(api, api_name, location="main"):
         # If user cookies are empty, use admin cookies
         if not user_cookies_string.strip():
             # Load admin cookies for display purposes
-            admin_cookies = {}
-            if os.path.exists(ADMIN_COOKIES_FILE):
-                try:
-                    admin_cookies = load_api_configs(ADMIN_COOKIES_FILE)
-                except:
-                    admin_cookies = {}
+            admin_cookies = load_shared_config(ADMIN_COOKIES_FILE)
             
             # Use admin cookies for current environment
             cookies_string = admin_cookies.get(st.session_state.current_env, "")
@@ -5514,6 +5541,14 @@ def _handle_save_button(api_name, api, file_paths, is_temp):
         st.rerun()
 
 
+def _is_statistic_api(api_name, api):
+    """True for Processing Result Statistic, whose responses are analyzed into Excel"""
+    url = api.get('url', '')
+    path = api.get('url_path', api.get('path', ''))
+    return ("/ProcessingResult/statistic" in (url or "") or "ProcessingResult/statistic" in (path or "")
+            or "Processing Result Statistic" in str(api_name))
+
+
 def _handle_send_button(api_name, api, file_paths):
     """Handle send request button click"""
     
@@ -5523,79 +5558,90 @@ def _handle_send_button(api_name, api, file_paths):
         _handle_dual_api_call(api_name, api, file_paths)
         return
     
+    # Closed and exported by _render_response_section once the response is drawn
+    trace = Trace(f"send {api_name}", **{
+        "api.name": api_name,
+        "environment": st.session_state.current_env,
+        "http.method": api.get('method', 'GET')
+    })
+    st.session_state[f"pending_trace_{api_name}"] = trace
+
     with st.spinner("Sending request..."):
         try:
-            # Build the full URL right before sending request
-            api_module = api.get('module', 'EX')
-            base_url = get_current_base_url(st.session_state.current_env, api_module)
-            
-            # Get the path - could be from path, url_path, or timer job specific
-            path = api.get("path", api.get("url_path", ""))
-            
-            # Special handling for Timer Job APIs - replace {timer_job_id} placeholder
-            if "{timer_job_id}" in path:
-                timer_job_id = api.get('timer_job_id', 'b7c1f0d0-3d15-4d41-bf07-7dfbf9cb15e3')
-                path = path.replace("{timer_job_id}", timer_job_id)
-            
-            # Build full URL
-            api['url'] = f"{base_url}{path}"
+            with trace.span("resolve url"):
+                # Build the full URL right before sending request
+                api_module = api.get('module', 'EX')
+                base_url = get_current_base_url(st.session_state.current_env, api_module)
+
+                # Get the path - could be from path, url_path, or timer job specific
+                path = api.get("path", api.get("url_path", ""))
+
+                # Special handling for Timer Job APIs - replace {timer_job_id} placeholder
+                if "{timer_job_id}" in path:
+                    timer_job_id = api.get('timer_job_id', 'b7c1f0d0-3d15-4d41-bf07-7dfbf9cb15e3')
+                    path = path.replace("{timer_job_id}", timer_job_id)
+
+                # Build full URL
+                api['url'] = f"{base_url}{path}"
             
             # Log the API request being sent
             print(f"[API REQUEST] {api.get('method', 'GET')} {api['url']}")
             
             # Dynamically load cookies right before sending request
-            _load_dynamic_cookies_for_request(api)
-            
-            start_time = time.time()
-            response = make_http_request(api)
-            end_time = time.time()
-
-            # Save response
-            st.session_state.api_responses[api_name] = {
-                "status_code": response.status_code,
-                "time": round((end_time - start_time) * 1000, 2),
-                "headers": dict(response.headers),
-                "content": get_response_content(response)
-            }
-
-            # Save to history
-            _save_to_history(api_name, api, st.session_state.api_responses[api_name], file_paths["API_HISTORY_FILE"])
-
-            # Update user data
-            _save_current_user_data()
+            with trace.span("load cookies"):
+                _load_dynamic_cookies_for_request(api)
+            
+            response, elapsed_ms, shared = _single_flight_http_request(trace, api)
+            if shared:
+                st.info("⏳ The same request was already being sent, showing its response instead of sending it again")
+
+            with trace.span("parse response"):
+                # Save response
+                st.session_state.api_responses[api_name] = {
+                    "status_code": response.status_code,
+                    "time": elapsed_ms,
+                    "headers": dict(response.headers),
+                    "content": get_response_content(response),
+                    "size": len(response.content),
+                    "wire_size": response.wire_size
+                }
+                if getattr(response, 'cache_status', None):
+                    st.session_state.api_responses[api_name]["cache"] = response.cache_status
+                # Keep the raw bytes of large responses for download instead of re-encoding them
+                if len(response.content) > RESPONSE_INLINE_LIMIT_BYTES:
+                    st.session_state.api_responses[api_name]["raw"] = response.content
+
+            # The send this one attached to records its own history entry
+            if not shared:
+                with trace.span("save history"):
+                    # Save to history
+                    _save_to_history(api_name, api, st.session_state.api_responses[api_name], file_paths)
+
+                    # Update user data
+                    _save_current_user_data()
 
             # Display success message
             st.success(f"Request completed in {st.session_state.api_responses[api_name]['time']} ms")
 
             # Special handling: Processing Result Statistic -> analyze and offer Excel download
-            is_stat_api = False
-            try:
-                url_lower = api.get('url', '')
-                path_lower = api.get('url_path', api.get('path', ''))
-                if url_lower and "/ProcessingResult/statistic" in url_lower:
-                    is_stat_api = True
-                if path_lower and "ProcessingResult/statistic" in path_lower:
-                    is_stat_api = True
-                if "Processing Result Statistic" in str(api_name):
-                    is_stat_api = True
-            except Exception:
-                is_stat_api = False
-
-            if is_stat_api:
-                # Parse JSON content
-                try:
-                    resp_json = response.json()
-                except Exception:
+            if _is_statistic_api(api_name, api):
+                # Analysis and export run in worker processes on the raw body, the parsed
+                # content above is only used to tell whether there is JSON to analyze
+                if isinstance(st.session_state.api_responses[api_name]["content"], (dict, list)):
                     try:
-                        resp_text = get_response_content(response)
-                        resp_json = json.loads(resp_text) if isinstance(resp_text, str) else resp_text
-                    except Exception:
-                        resp_json = None
-
-                if resp_json is not None:
-                    try:
-                        df_marks, df_summary = analyze_processing_result(resp_json)
-                        excel_bytes = export_dfs_to_excel_bytes(df_marks, df_summary)
+                        progress_bar = st.progress(0.0)
+                        status_text = st.empty()
+                        with trace.span("analyze statistic"):
+                            marks, summary = _await_analysis(
+                                submit_analysis(analyze_statistic_bytes, response.content),
+                                "Analyzing statistic", progress_bar, status_text, 0.0, 0.6)
+                        with trace.span("export excel"):
+                            excel_bytes = _await_analysis(
+                                submit_analysis(export_statistic_excel, marks, summary),
+                                "Writing Excel", progress_bar, status_text, 0.6, 1.0)
+                        df_marks, df_summary = unpack_frame(marks), unpack_frame(summary)
+                        progress_bar.empty()
+                        status_text.empty()
                         # Use courseCode from API body instead of username
                         course_code = api.get('body', {}).get('courseCode', 'unknown_course')
                         fname = f"statistic_{course_code}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
@@ -5615,11 +5661,174 @@ def _handle_send_button(api_name, api, file_paths):
             st.rerun()
         except Exception as e:
             st.error(f"Error: {str(e)}")
+            trace.root.set_error(str(e))
+            if api_name not in st.session_state.api_responses:
+                # No response will be rendered for this send, export right away
+                st.session_state.pop(f"pending_trace_{api_name}", None)
+                _export_trace(trace)
+
+
+def _await_analysis(future, label, progress_bar, status_text, start, end):
+    """Wait for an analysis pool job, moving the progress bar between start and end meanwhile"""
+    started = time.time()
+    while True:
+        try:
+            return future.result(timeout=ANALYSIS_POLL_SECONDS)
+        except FuturesTimeoutError:
+            elapsed = time.time() - started
+            status_text.text(f"{label}... {elapsed:.0f} s")
+            # The job reports no progress, so approach the end of the stage without reaching it
+            progress_bar.progress(start + (end - start) * elapsed / (elapsed + 5))
+
+
+def _send_to_env(api, env, user="", session=None, deadline=None, trace=None, span_name="http send"):
+    """Send a prepared request to env the way every send path does
+
+    A fresh cached GET ("cacheable": true) is returned right away. Otherwise
+    the request waits for a rate limit slot shared by all users of env
+    (bounded by the deadline), its timeouts from the API and environment
+    configs are clamped to what is left of the deadline, the circuit breaker
+    fails fast while the endpoint is down, and env stops getting compressed
+    bodies once it rejected an encoding. With a trace, body serialization,
+    the wait and the send get spans. Does not touch st.session_state.
+    """
+    session = session or get_http_session()
+    body = api.get('body')
+    body_bytes = None
+    if api.get('method', 'GET') != "GET" and body is not None and body != "":
+        with trace.span("serialize body") if trace else contextlib.nullcontext() as span:
+            body_bytes = json_dumps_bytes(body)
+            if span is not None:
+                span.set_attribute("http.request.body.size", len(body_bytes))
+
+    # Opt-in per API with "cacheable": true; a fresh cached GET needs no budget or breaker
+    cache = get_http_cache() if api.get('cacheable') and api.get('method', 'GET') == "GET" else None
+    if cache is not None:
+        with trace.span("cache lookup", **{"http.url": api['url']}) if trace else contextlib.nullcontext() as span:
+            cached = cache.fresh_response(api)
+            if span is not None:
+                span.set_attribute("http.cache", cached.cache_status if cached is not None else "stale or missing")
+        if cached is not None:
+            return cached
+
+    env_config = load_shared_environments_config().get(env, {})
+    timeouts = resolve_timeouts(api, env_config)
+    encoding = request_encoding_for(env, env_config, len(body_bytes)) if body_bytes else None
+    breaker = get_circuit_breaker(env, _endpoint_template(api))
+
+    # Every send to an environment shares one budget across all users of this server
+    limiter = get_rate_limiter(env)
+    with trace.span("rate limit wait") if trace else contextlib.nullcontext():
+        limiter.acquire(user, deadline.remaining() if deadline else None)
+    try:
+        if deadline is not None:
+            timeouts = deadline.clamp(timeouts)
+        send_span = trace.span(span_name, **{"http.method": api.get('method', 'GET'), "http.url": api['url']}) \
+            if trace else contextlib.nullcontext()
+        with send_span as span:
+            if span is not None:
+                span.set_attribute("http.timeout.total", timeouts.total)
+            # Raises CircuitOpenError without sending while the endpoint is known to be down
+            with breaker.attempt():
+                try:
+                    response = make_http_request(api, session, body_bytes, timeouts, encoding, cache)
+                except requests.exceptions.RequestException as e:
+                    breaker.record_failure(type(e).__name__)
+                    raise
+                breaker.record_response(response.status_code)
+            received_ns = time.time_ns()
+            _record_encoding_outcome(env, encoding, response)
+            if span is not None:
+                if cache is not None:
+                    span.set_attribute("http.cache", response.cache_status)
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("http.request.encoding", encoding or "identity")
+                span.set_attribute("http.request.wire_size", response.request_wire_size)
+                span.set_attribute("http.response.encoding", response.headers.get("Content-Encoding", "identity"))
+                span.set_attribute("http.response.body.size", len(response.content))
+                span.set_attribute("http.response.wire_size", response.wire_size)
+
+                # requests measures the time until the response headers were parsed
+                ttfb_ns = int(response.elapsed.total_seconds() * 1e9)
+                trace.add_span("ttfb", span.start_ns, span.start_ns + ttfb_ns, parent=span)
+                trace.add_span("download", span.start_ns + ttfb_ns, received_ns, parent=span)
+    finally:
+        limiter.release()
+    return response
+
+
+def _traced_http_request(trace, api, span_name="http send", deadline=None):
+    """_send_to_env for the current user and environment, with spans for the body, the wait and the send"""
+    return _send_to_env(api, st.session_state.current_env, st.session_state.get('username', ''),
+                        deadline=deadline, trace=trace, span_name=span_name)
+
+
+def _single_flight_http_request(trace, api, span_name="http send"):
+    """_traced_http_request, attached to an identical send already in flight instead of repeating it
+
+    Sends are identical when the same user sends the same method, URL,
+    params and body to the same environment, e.g. a double click on Run API
+    or a rerun while a slow POST is still running. Returns the response, the
+    time of the actual send in ms and whether it came from another send.
+    """
+    key = (st.session_state.get('username', ''), st.session_state.current_env,
+           request_fingerprint(api.get('method', 'GET'), api['url'], api.get('params'), api.get('body')))
+
+    def send():
+        start_time = time.time()
+        response = _traced_http_request(trace, api, span_name)
+        return response, round((time.time() - start_time) * 1000, 2)
+
+    start_ns = time.time_ns()
+    (response, elapsed_ms), shared = get_send_flights().do(key, send)
+    if shared:
+        trace.add_span("await in-flight send", start_ns, time.time_ns(), **{"http.coalesced": True,
+                                                                              "http.status_code": response.status_code})
+    return response, elapsed_ms, shared
+
+
+def _record_encoding_outcome(env, encoding, response):
+    """Stop compressing request bodies for env once it rejected an encoding"""
+    if encoding and getattr(response, 'encoding_rejected', False):
+        mark_encoding_rejected(env, encoding)
+
+
+def _endpoint_template(api):
+    """API path before placeholders are filled in, used to key circuit breakers"""
+    path = api.get('path') or api.get('url_path')
+    if path:
+        return path
+    return urlsplit(api.get('url', '')).path
+
+
+def _export_trace(trace):
+    """Export a finished trace to the active user's trace file and any configured collector"""
+    file_paths = st.session_state.get('file_paths') or {}
+    export_trace(trace, file_paths.get("TRACES_FILE"))
+
+
+def _render_trace_waterfall(rows):
+    """Flame-style waterfall of a trace's spans"""
+    df = pd.DataFrame(rows)
+    # Numbered labels keep repeated span names (batch items) on separate rows
+    df["Label"] = [f"{i + 1:02d} {'· ' * depth}{span.strip()}" for i, (depth, span) in enumerate(zip(df["Depth"], df["Span"]))]
+    chart = alt.Chart(df).mark_bar().encode(
+        x=alt.X("Start (ms):Q", title="ms since start"),
+        x2="End (ms):Q",
+        y=alt.Y("Label:N", sort=None, title=None),
+        color=alt.Color("Depth:O", legend=None),
+        tooltip=["Span", "Duration (ms)", "Start (ms)", "Error"]
+    ).properties(height=max(120, 22 * len(df)))
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(df[["Span", "Start (ms)", "Duration (ms)", "Error"]], use_container_width=True, hide_index=True)
 
 
 def _handle_dual_api_call(api_name, api, file_paths):
     """Handle the special dual API call for DEVAllocateStudent"""
-    
+
+    trace = Trace(f"dual {api_name}", **{"api.name": api_name, "environment": st.session_state.current_env})
+    st.session_state[f"pending_trace_{api_name}"] = trace
+
     with st.spinner("Executing dual API call sequence..."):
         try:
             # Extract data from the original API body
@@ -5662,6 +5871,7 @@ def _handle_dual_api_call(api_name, api, file_paths):
             
             course_responses = []
             total_course_time = 0
+            coalesced = []
             
             for course_code, student_ids in course_student_mapping.items():
                 # Remove duplicates while preserving order
@@ -5682,14 +5892,14 @@ def _handle_dual_api_call(api_name, api, file_paths):
                     "params": {}
                 }
                 
-                # Dynamically load cookies for the first API call
-                _load_dynamic_cookies_for_request(course_api_config)
-                
-                start_time_course = time.time()
-                response_course = make_http_request(course_api_config)
-                end_time_course = time.time()
+                with trace.span(f"step 1: course {course_code}", students=len(unique_student_ids)):
+                    # Dynamically load cookies for the first API call
+                    with trace.span("load cookies"):
+                        _load_dynamic_cookies_for_request(course_api_config)
+
+                    response_course, course_time, shared = _single_flight_http_request(trace, course_api_config)
+                    coalesced.append(shared)
                 
-                course_time = round((end_time_course - start_time_course) * 1000, 2)
                 total_course_time += course_time
                 
                 course_responses.append({
@@ -5747,11 +5957,9 @@ def _handle_dual_api_call(api_name, api, file_paths):
                 print("[DEBUG] WARNING: Step 2 has no cookies!")
                 st.warning("⚠️ No cookies loaded for Step 2 - this may cause authentication issues")
             
-            start_time_2 = time.time()
-            response_2 = make_http_request(subject_api_config)
-            end_time_2 = time.time()
-            
-            subject_time = round((end_time_2 - start_time_2) * 1000, 2)
+            with trace.span("step 2: subjects", students=len(subject_student_infos)):
+                response_2, subject_time, shared = _single_flight_http_request(trace, subject_api_config)
+            coalesced.append(shared)
             
             if response_2.status_code not in [200, 201, 202]:
                 st.error(f"Step 2 failed with status {response_2.status_code}: {get_response_content(response_2)}")
@@ -5785,11 +5993,15 @@ def _handle_dual_api_call(api_name, api, file_paths):
             
             st.session_state.api_responses[api_name] = combined_response
             
-            # Save to history
-            _save_to_history(api_name, api, combined_response, file_paths["API_HISTORY_FILE"])
-            
-            # Update user data
-            _save_current_user_data()
+            if all(coalesced):
+                st.info("⏳ The same calls were already being sent, showing their responses instead of sending them again")
+            else:
+                with trace.span("save history"):
+                    # Save to history
+                    _save_to_history(api_name, api, combined_response, file_paths)
+
+                    # Update user data
+                    _save_current_user_data()
             
             # Display final success message
             st.success(f"🎉 Dual API call completed successfully! Total time: {total_time} ms")
@@ -5809,11 +6021,11 @@ def _handle_dual_api_call(api_name, api, file_paths):
             st.error(f"Error in dual API call: {str(e)}")
 
 
-def _load_dynamic_cookies_for_request(api):
+def _load_dynamic_cookies_for_request(api, env=None):
     """Dynamically load cookies for API request based on current configuration"""
     # Check if we should use environment cookies
     cookie_choice = st.session_state.get('cookie_choice', 'Use Environment Cookies')
-    current_env = st.session_state.get('current_env', 'DEV')
+    current_env = env or st.session_state.get('current_env', 'DEV')
     
     print(f"[DEBUG] Loading cookies for {current_env} with choice: {cookie_choice}")
     
@@ -5824,13 +6036,8 @@ def _load_dynamic_cookies_for_request(api):
         
         # If user cookies are empty, dynamically load admin cookies
         if not user_cookies_string.strip():
-            # Load admin cookies fresh from file
-            admin_cookies = {}
-            if os.path.exists(ADMIN_COOKIES_FILE):
-                try:
-                    admin_cookies = load_api_configs(ADMIN_COOKIES_FILE)
-                except Exception as e:
-                    admin_cookies = {}
+            # Admin cookies come from the shared cache, re-read when the file changes
+            admin_cookies = load_shared_config(ADMIN_COOKIES_FILE)
             
             # Use admin cookies for current environment
             cookies_string = admin_cookies.get(current_env, "")
@@ -5857,6 +6064,482 @@ def _load_dynamic_cookies_for_request(api):
     return api.get('cookies', {})
 
 
+def _build_env_request(api, env):
+    """Copy an API configuration with the URL and cookies of the given environment"""
+    env_api = api.copy()
+    path = api.get("path", api.get("url_path", ""))
+    if "{timer_job_id}" in path:
+        timer_job_id = api.get('timer_job_id', 'b7c1f0d0-3d15-4d41-bf07-7dfbf9cb15e3')
+        path = path.replace("{timer_job_id}", timer_job_id)
+    env_api['url'] = f"{get_current_base_url(env, api.get('module', 'EX'))}{path}"
+    _load_dynamic_cookies_for_request(env_api, env)
+    return env_api
+
+
+def _send_prepared_request(api, session, env, user="", keep_raw=False, deadline=None):
+    """Send a fully prepared request to env and return it in the api_responses format
+
+    Goes through _send_to_env and does not touch st.session_state, so it is
+    safe to run in worker threads. With keep_raw the body is returned
+    unparsed under "raw", for callers that hand it to a worker process as is.
+    """
+    start_time = time.time()
+    try:
+        response = _send_to_env(api, env, user, session, deadline)
+    except Exception as e:
+        return {
+            "status_code": 0,
+            "time": round((time.time() - start_time) * 1000, 2),
+            "headers": {},
+            "content": {"error": str(e)},
+            "size": 0
+        }
+    end_time = time.time()
+    result = {
+        "status_code": response.status_code,
+        "time": round((end_time - start_time) * 1000, 2),
+        "headers": dict(response.headers),
+        "content": None if keep_raw else get_response_content(response),
+        "size": len(response.content),
+        "wire_size": response.wire_size
+    }
+    if getattr(response, 'cache_status', None):
+        result["cache"] = response.cache_status
+    if keep_raw:
+        result["raw"] = response.content
+    return result
+
+
+def _handle_multi_env_run(api_name, api, envs):
+    """Send the same request to several environments concurrently"""
+    # URLs and cookies come from session state, so resolve them before fanning out
+    env_requests = {env: _build_env_request(api, env) for env in envs}
+    session = get_http_session()
+    user = st.session_state.get('username', '')
+
+    with st.spinner(f"Sending request to {len(envs)} environment(s)..."):
+        with ThreadPoolExecutor(max_workers=len(envs)) as executor:
+            futures = {env: executor.submit(_send_prepared_request, env_api, session, env, user) for env, env_api in env_requests.items()}
+            responses = {env: future.result() for env, future in futures.items()}
+
+    st.session_state[f"env_compare_{api_name}"] = {
+        "envs": list(envs),
+        "responses": responses,
+        "diffs": {}
+    }
+
+
+def _render_multi_env_section(api_name, api):
+    """Render the run-on-several-environments action and the diff of the responses"""
+    with st.expander("🌐 Compare Across Environments", expanded=False):
+        if "DEVAllocateStudent" in api.get('path', '') or "DEVAllocateStudent" in api.get('url_path', ''):
+            st.info("Multi-step APIs cannot be compared across environments")
+            return
+
+        enabled_envs = get_enabled_environments()
+        current_env = st.session_state.get('current_env', 'SIT')
+        default_envs = [env for env in [current_env, "SIT", "UAT"] if env in enabled_envs]
+        selected_envs = st.multiselect(
+            "Environments",
+            enabled_envs,
+            default=list(dict.fromkeys(default_envs))[:2],
+            key=f"compare_envs_{api_name}",
+            help="The same request (body, params, headers) is sent to each environment at the same time"
+        )
+
+        if st.button(f"🚀 Run on {len(selected_envs)} Environment(s)", key=f"compare_run_{api_name}",
+                     disabled=len(selected_envs) < 2):
+            _handle_multi_env_run(api_name, api, selected_envs)
+
+        comparison = st.session_state.get(f"env_compare_{api_name}")
+        if not comparison:
+            return
+
+        responses = comparison["responses"]
+        st.dataframe(pd.DataFrame([
+            {
+                "Environment": env,
+                "Status": resp["status_code"],
+                "Time (ms)": resp["time"],
+                "Size": format_size(resp.get("size") or 0)
+            }
+            for env, resp in responses.items()
+        ]), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            baseline = st.selectbox("Baseline", comparison["envs"], key=f"compare_baseline_{api_name}")
+        with col2:
+            key_fields_input = st.text_input(
+                "Array key fields",
+                value=", ".join(DEFAULT_KEY_FIELDS),
+                key=f"compare_keys_{api_name}",
+                help="Array items are matched on the first of these fields that is unique on both sides"
+            )
+        key_fields = tuple(field.strip() for field in key_fields_input.split(",") if field.strip())
+
+        for env in comparison["envs"]:
+            if env == baseline:
+                continue
+            # Diffs are computed once per baseline/key choice and reused on reruns
+            diff_key = (baseline, env, key_fields)
+            if diff_key not in comparison["diffs"]:
+                comparison["diffs"][diff_key] = diff_json(
+                    responses[baseline]["content"], responses[env]["content"], key_fields
+                )
+            rows, total = comparison["diffs"][diff_key]
+
+            st.write(f"**{baseline} → {env}**")
+            if total == 0:
+                st.success("✅ Responses are identical")
+                continue
+            st.warning(f"{total} difference(s)")
+            if total > DIFF_ROW_LIMIT:
+                st.info(f"Showing first {DIFF_ROW_LIMIT} differences")
+            diff_df = pd.DataFrame(rows).rename(columns={"Left": baseline, "Right": env})
+            st.dataframe(diff_df, use_container_width=True, hide_index=True)
+
+
+def _concurrency_slider(env, key):
+    """Concurrent requests for a batch run, up to the environment's max_concurrent"""
+    limit = int(environment_limits(env)["max_concurrent"])
+    if limit <= 1:
+        # A slider cannot have equal bounds, and there is nothing to choose
+        st.caption(f"Requests are sent one at a time, the {env} limit is 1 concurrent request")
+        return 1
+    return st.slider("Concurrent requests", 1, limit, min(DEFAULT_MAX_PARALLEL, limit), key=key,
+                     help=f"Also capped by the {env} rate limit shared with other users")
+
+
+def _render_data_sweep_section(api_name, api, file_paths):
+    """Render the run-once-per-data-row action for any API"""
+    with st.expander("📊 Run with Data Set", expanded=False):
+        st.caption("Upload a CSV or Excel sheet with one row per request, bind its columns to "
+                   "body / params / path / headers fields, and send every row.")
+        uploaded_file = st.file_uploader("Parameter rows", type=['csv', 'xlsx', 'xls'],
+                                         key=f"sweep_file_{api_name}")
+        if uploaded_file is not None:
+            try:
+                df = read_data_set(uploaded_file.getvalue(), uploaded_file.name)
+            except SweepError as e:
+                st.error(f"❌ {e}")
+                df = None
+
+            if df is not None:
+                st.write(f"{len(df)} row(s), {len(df.columns)} column(s)")
+                st.dataframe(df.head(10), use_container_width=True, hide_index=True)
+
+                suggested = suggest_bindings(list(df.columns), api)
+                mapping = st.data_editor(
+                    pd.DataFrame([
+                        {"Column": column, "Target": suggested.get(column, ""), "Type": "auto"}
+                        for column in df.columns
+                    ]),
+                    column_config={
+                        "Column": st.column_config.TextColumn(disabled=True),
+                        "Target": st.column_config.TextColumn(
+                            help="e.g. body.subjectCode, body.items[0].id, params.page, path.timer_job_id, "
+                                 "headers.X-Request-Id; leave empty to ignore the column"
+                        ),
+                        "Type": st.column_config.SelectboxColumn(
+                            options=list(VALUE_TYPES), required=True,
+                            help="auto converts the cell to the type of the value the API already has there "
+                                 "(number, boolean, list or JSON), and keeps it as text otherwise"
+                        ),
+                    },
+                    hide_index=True,
+                    use_container_width=True,
+                    key=f"sweep_mapping_{api_name}_{uploaded_file.name}"
+                )
+
+                bindings = []
+                try:
+                    for entry in mapping.to_dict('records'):
+                        if str(entry.get("Target") or "").strip():
+                            bindings.append(make_binding(entry["Column"], entry["Target"], entry.get("Type") or "auto"))
+                except SweepError as e:
+                    st.error(f"❌ {e}")
+                    bindings = None
+
+                env = st.session_state.current_env
+                max_parallel = _concurrency_slider(env, f"sweep_parallel_{api_name}")
+
+                if bindings:
+                    with st.expander("📋 Request Preview (first row)", expanded=False):
+                        try:
+                            preview = bind_row(_build_sweep_request(api, env, bindings), bindings,
+                                               df.iloc[0].to_dict())
+                            st.json({key: preview.get(key) for key in ("url", "params", "headers", "body")
+                                     if preview.get(key) not in (None, "", {})})
+                        except SweepError as e:
+                            st.error(f"❌ {e}")
+
+                if st.button(f"🚀 Send {len(df)} Request(s)", key=f"sweep_run_{api_name}",
+                             type="primary", disabled=not bindings):
+                    _handle_data_sweep(api_name, api, env, bindings, df, max_parallel, file_paths)
+
+        _render_data_sweep_result(api_name)
+
+
+def _build_sweep_request(api, env, bindings):
+    """Prepared request for a sweep, keeping path placeholders that rows fill in"""
+    request = _build_env_request(api, env)
+    if any(binding.location == "path" for binding in bindings):
+        path = api.get("path", api.get("url_path", ""))
+        request['url'] = f"{get_current_base_url(env, api.get('module', 'EX'))}{path}"
+    return request
+
+
+def _batch_sender(api, env, keep_raw=False):
+    """Deadline of a batch run and a send for its worker threads
+
+    Each request gets at most what is left of the deadline and goes through
+    env's circuit breaker and rate limiter, so the send is safe to call
+    from any thread.
+    """
+    session = get_http_session()
+    user = st.session_state.get('username', '')
+    env_config = load_shared_environments_config().get(env, {})
+    deadline = Deadline(batch_deadline_seconds(api, env_config))
+
+    def send(request):
+        return _send_prepared_request(request, session, env, user, keep_raw=keep_raw, deadline=deadline)
+
+    return deadline, send
+
+
+def _finish_batch_trace(trace, result, span_name, noun):
+    """Add a span per item that was sent, mark the run failed if any did not pass and export it
+
+    Returns the result's summary.
+    """
+    for row, (start_ns, end_ns) in zip(result.rows, result.spans):
+        if row["Status"] == SKIPPED:
+            continue
+        span = trace.add_span(span_name(row), start_ns, end_ns, **{"http.status_code": row["HTTP"] or 0})
+        if row["Status"] != PASSED:
+            span.set_error(row["Message"])
+    summary = result.summary()
+    if summary[PASSED] < summary["total"]:
+        trace.root.set_error(f"{summary['total'] - summary[PASSED]} {noun}(s) did not pass")
+    _export_trace(trace)
+    return summary
+
+
+def _save_batch_history(history_name, api, summary, file_paths):
+    """One history entry holding a batch run's summary, when anything passed"""
+    if summary[PASSED] > 0:
+        _save_to_history(history_name, api, {
+            'status_code': 200,
+            'time': summary['wall_ms'],
+            'headers': {'Content-Type': 'application/json'},
+            'content': summary
+        }, file_paths)
+
+
+def _handle_data_sweep(api_name, api, env, bindings, df, max_parallel, file_paths):
+    """Send the API once per data set row and keep the results for display and export"""
+    request = _build_sweep_request(api, env, bindings)
+    deadline, send = _batch_sender(api, env)
+    rows = df.to_dict('records')
+    trace = Trace(f"sweep {api_name}", **{"api.name": api_name, "environment": env, "batch.size": len(rows)})
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    finished = []
+
+    def on_row_done(row):
+        finished.append(row["Row"])
+        progress_bar.progress(len(finished) / len(rows))
+        status_text.text(f"Processed {len(finished)}/{len(rows)}")
+
+    with st.spinner(f"Sending {len(rows)} request(s) to {env}..."):
+        result = run_sweep(request, bindings, rows, send, max_parallel, deadline, on_row_done)
+    progress_bar.progress(1.0)
+
+    summary = _finish_batch_trace(trace, result, lambda row: f"row {row['Row']}", "row")
+    # Exports are built once here, not on every rerun that shows the result
+    results_df = pd.DataFrame(result.rows)
+    st.session_state[f"sweep_result_{api_name}"] = {
+        "env": env,
+        "summary": summary,
+        "rows": result.rows,
+        "csv": results_df.to_csv(index=False).encode('utf-8-sig'),
+        "excel": export_df_to_excel_bytes(results_df, "Results"),
+        "waterfall": trace.waterfall_rows()
+    }
+    _save_batch_history(f"{api_name} (Data Set)", api, summary, file_paths)
+
+
+def _render_data_sweep_result(api_name):
+    """Summary, per-row table and downloads of the last data set run"""
+    outcome = st.session_state.get(f"sweep_result_{api_name}")
+    if not outcome:
+        return
+    summary = outcome["summary"]
+    st.write(f"**Last run on {outcome['env']}**")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Passed", f"{summary[PASSED]}/{summary['total']}")
+    with col2:
+        st.metric("Failed", summary[FAILED])
+    with col3:
+        st.metric("Skipped", summary[SKIPPED])
+    with col4:
+        st.metric("Wall Time", f"{summary['wall_ms']} ms", help=f"Average request: {summary['avg_ms']} ms")
+
+    st.dataframe(pd.DataFrame(outcome["rows"]), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Download CSV", data=outcome["csv"],
+                           file_name=f"{api_name}_results.csv", mime="text/csv",
+                           key=f"sweep_csv_{api_name}")
+    with col2:
+        st.download_button("📥 Download Excel", data=outcome["excel"],
+                           file_name=f"{api_name}_results.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                           key=f"sweep_excel_{api_name}")
+
+    with st.expander("⏱️ Timing", expanded=False):
+        _render_trace_waterfall(outcome["waterfall"])
+
+
+def _render_statistic_fanout_section(api_name, api, file_paths):
+    """Render the multi-course mode of Processing Result Statistic"""
+    with st.expander("📚 Multi-Course Statistic", expanded=False):
+        st.caption("Run the statistic for many courses at once. Long admission number lists are split "
+                   "into chunks, every response is analyzed as soon as it arrives, and all courses are "
+                   "merged into one Excel or Parquet export.")
+        body = api.get('body') if isinstance(api.get('body'), dict) else {}
+        col1, col2 = st.columns(2)
+        with col1:
+            course_text = st.text_area("Course codes", value=str(body.get('courseCode', '')), height=150,
+                                       key=f"fanout_courses_{api_name}", help="One per line or comma separated")
+        with col2:
+            admission_text = st.text_area("Admission numbers", value="\n".join(map(str, body.get('admissionNumbers', []))),
+                                          height=150, key=f"fanout_admissions_{api_name}",
+                                          help="Sent for every course; one per line or comma separated")
+
+        env = st.session_state.current_env
+        col1, col2 = st.columns(2)
+        with col1:
+            chunk_size = st.number_input("Admission numbers per request", min_value=1, value=STATISTIC_CHUNK_SIZE,
+                                         step=50, key=f"fanout_chunk_{api_name}")
+        with col2:
+            max_parallel = _concurrency_slider(env, f"fanout_parallel_{api_name}")
+
+        planned = None
+        try:
+            planned = plan_statistic_requests(body, parse_codes(course_text), parse_codes(admission_text),
+                                              int(chunk_size))
+            courses = len({item.course_code for item in planned})
+            st.write(f"{len(planned)} request(s) for {courses} course(s)")
+        except FanoutError as e:
+            st.info(str(e))
+
+        if st.button(f"🚀 Run {len(planned) if planned else 0} Request(s)", key=f"fanout_run_{api_name}",
+                     type="primary", disabled=not planned):
+            _handle_statistic_fanout(api_name, api, env, planned, max_parallel, file_paths)
+
+        _render_statistic_fanout_result(api_name)
+
+
+def _handle_statistic_fanout(api_name, api, env, planned, max_parallel, file_paths):
+    """Fan the statistic out over the planned courses and chunks, then export the merged analysis"""
+    request = _build_env_request(api, env)
+    deadline, send = _batch_sender(api, env, keep_raw=True)
+    trace = Trace(f"statistic fan-out {api_name}", **{"api.name": api_name, "environment": env,
+                                                        "batch.size": len(planned)})
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+
+    def on_progress(fetched, analyzed, total):
+        # Fetching and analyzing are each half of the bar before the export
+        progress_bar.progress(0.8 * (fetched + analyzed) / (2 * total))
+        status_text.text(f"Fetched {fetched}/{total}, analyzed {analyzed}/{total}")
+
+    with st.spinner(f"Sending {len(planned)} request(s) to {env}..."):
+        result = run_statistic_fanout(request, planned, send,
+                                      lambda raw: submit_analysis(analyze_statistic_bytes, raw),
+                                      max_parallel, deadline, on_progress)
+
+    excel_bytes = parquet_bytes = None
+    export_error = ""
+    if not result.df_summary.empty:
+        # A failed export must not lose the fetched and analyzed courses
+        try:
+            with trace.span("export"):
+                marks, summary = pack_frame(result.df_marks), pack_frame(result.df_summary)
+                parquet_future = submit_analysis(export_statistic_parquet, marks, summary)
+                excel_bytes = _await_analysis(submit_analysis(export_statistic_excel, marks, summary),
+                                              "Writing Excel", progress_bar, status_text, 0.8, 1.0)
+                parquet_bytes = parquet_future.result()
+        except Exception as e:
+            export_error = str(e) or type(e).__name__
+    progress_bar.progress(1.0)
+    status_text.empty()
+
+    summary = _finish_batch_trace(trace, result, lambda row: f"{row['Course']} {row['Chunk']}", "request")
+    if export_error:
+        summary["export_error"] = export_error
+    st.session_state[f"statistic_fanout_{api_name}"] = {
+        "env": env,
+        "summary": summary,
+        "rows": result.rows,
+        "excel": excel_bytes,
+        "parquet": parquet_bytes,
+        "summary_preview": result.df_summary.head(200),
+        "marks_preview": result.df_marks.head(500),
+        "stamp": datetime.datetime.now().strftime('%Y%m%d_%H%M%S'),
+        "waterfall": trace.waterfall_rows()
+    }
+    _save_batch_history(f"{api_name} (Multi-Course)", api, summary, file_paths)
+
+
+def _render_statistic_fanout_result(api_name):
+    """Summary, per-request table, merged previews and exports of the last multi-course run"""
+    outcome = st.session_state.get(f"statistic_fanout_{api_name}")
+    if not outcome:
+        return
+    summary = outcome["summary"]
+    st.write(f"**Last run on {outcome['env']}**")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Requests Passed", f"{summary[PASSED]}/{summary['total']}")
+    with col2:
+        st.metric("Courses", summary["courses"])
+    with col3:
+        st.metric("Students", summary["students"], help=f"{summary['mark_rows']} subject mark rows")
+    with col4:
+        st.metric("Wall Time", f"{summary['wall_ms']} ms")
+
+    st.dataframe(pd.DataFrame(outcome["rows"]), use_container_width=True, hide_index=True)
+
+    if summary.get("export_error"):
+        st.error(f"Failed to export the merged analysis: {summary['export_error']}")
+    if summary["students"]:
+        file_stem = f"statistic_{summary['courses']}_courses_{outcome['stamp']}"
+        col1, col2 = st.columns(2)
+        with col1:
+            if outcome["excel"] is not None:
+                st.download_button("📥 Download Excel", data=outcome["excel"], file_name=f"{file_stem}.xlsx",
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                   key=f"fanout_excel_{api_name}")
+        with col2:
+            if outcome["parquet"] is not None:
+                st.download_button("📥 Download Parquet", data=outcome["parquet"],
+                                   file_name=f"{file_stem}_parquet.zip", mime="application/zip",
+                                   key=f"fanout_parquet_{api_name}",
+                                   help="subject_marks.parquet and student_summary.parquet")
+        with st.expander("Preview - Student Summary", expanded=False):
+            st.dataframe(outcome["summary_preview"])
+        with st.expander("Preview - Subject Marks", expanded=False):
+            st.dataframe(outcome["marks_preview"])
+
+    with st.expander("⏱️ Timing", expanded=False):
+        _render_trace_waterfall(outcome["waterfall"])
+
+
 def _handle_delete_button(api_name, file_paths):
     """Handle delete API button click"""
     del st.session_state.apis[api_name]
@@ -5875,23 +6558,255 @@ def _handle_delete_button(api_name, file_paths):
     st.rerun()
 
 
+def _get_response_size(resp):
+    """Get the response body size in bytes, computing and caching it if missing"""
+    if resp.get('size') is None:
+        content = resp.get('content')
+        if isinstance(content, (dict, list)):
+            resp['size'] = len(json_dumps_bytes(content))
+        else:
+            resp['size'] = len(str(content).encode('utf-8')) if content is not None else 0
+    return resp['size']
+
+
+def _render_raw_download(api_name, resp, label="Download Raw Response"):
+    """Offer the raw response body as a download instead of rendering it"""
+    raw = resp.get('raw')
+    if raw is None:
+        content = resp.get('content')
+        raw = json_dumps_bytes(content) if isinstance(content, (dict, list)) else str(content).encode('utf-8')
+        resp['raw'] = raw
+    is_json = isinstance(resp.get('content'), (dict, list))
+    st.download_button(
+        label,
+        data=raw,
+        file_name=f"response_{''.join(c for c in api_name if c.isalnum() or c in '-_')}.{'json' if is_json else 'txt'}",
+        mime="application/json" if is_json else "text/plain",
+        key=f"download_raw_{api_name}"
+    )
+
+
+def _go_up_response_path(path_key):
+    """Move the response tree browser to the parent node"""
+    try:
+        parts = parse_json_path(st.session_state.get(path_key, "$"))
+        st.session_state[path_key] = format_json_path(parts[:-1])
+    except ValueError:
+        st.session_state[path_key] = "$"
+
+
+def _open_response_path(path_key, child_key):
+    """Move the response tree browser to the selected child node"""
+    st.session_state[path_key] = st.session_state.get(child_key, "$")
+
+
+def _render_json_tree(api_name, content):
+    """Render a large JSON value as a lazily expanded tree, one node and one page at a time"""
+    path_key = f"response_path_{api_name}"
+    if path_key not in st.session_state:
+        st.session_state[path_key] = "$"
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        path_text = st.text_input(
+            "JSON Path",
+            key=path_key,
+            help="Path of the node to inspect, e.g. $.data[0].studentStatistics"
+        )
+    with col2:
+        st.write("")
+        st.button(
+            "⬆️ Up",
+            key=f"response_path_up_{api_name}",
+            disabled=path_text.strip() in ("", "$"),
+            on_click=_go_up_response_path,
+            args=(path_key,)
+        )
+
+    try:
+        parts = parse_json_path(path_text)
+        node = get_node(content, parts)
+    except (ValueError, KeyError) as e:
+        st.error(f"❌ {str(e)}")
+        return
+
+    if not isinstance(node, (dict, list)):
+        st.write(f"**{type_name(node)}**")
+        if node is None:
+            st.text("null")
+        else:
+            st.json(node)
+        return
+
+    page = 0
+    if isinstance(node, list):
+        total_pages = page_count(node)
+        st.caption(f"Array with {len(node)} items")
+        if total_pages > 1:
+            page = st.number_input(
+                f"Page (of {total_pages}, {ARRAY_PAGE_SIZE} items per page)",
+                min_value=1,
+                max_value=total_pages,
+                value=1,
+                key=f"response_page_{api_name}_{format_json_path(parts)}"
+            ) - 1
+    else:
+        st.caption(f"Object with {len(node)} keys")
+
+    rows = summarize_children(node, parts, page)
+    if not rows:
+        st.info("Empty")
+        return
+    st.dataframe(pd.DataFrame(rows).drop(columns=["Path"]), use_container_width=True, hide_index=True)
+
+    # Drill into a child container
+    child_paths = [row["Path"] for row in rows if row["Type"] in ("object", "array")]
+    if child_paths:
+        child_key = f"response_child_{api_name}_{format_json_path(parts)}_{page}"
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.selectbox("Expand child", child_paths, key=child_key)
+        with col2:
+            st.write("")
+            st.button(
+                "Open",
+                key=f"response_open_{api_name}",
+                on_click=_open_response_path,
+                args=(path_key, child_key)
+            )
+
+    # Only the current page (or the small node itself) is sent to the browser
+    with st.expander("View as JSON", expanded=False):
+        if isinstance(node, list):
+            start = page * ARRAY_PAGE_SIZE
+            st.json(node[start:start + ARRAY_PAGE_SIZE])
+        elif len(rows) <= ARRAY_PAGE_SIZE and all(row["Type"] not in ("object", "array") for row in rows):
+            st.json(node)
+        else:
+            st.info("Open a child node to view it as JSON")
+
+
+def _get_response_index(api_name, content):
+    """Get the query index for a response, rebuilding it only when the response changes"""
+    index_key = f"response_index_{api_name}"
+    index = st.session_state.get(index_key)
+    if index is None or index.content is not content:
+        index = ResponseIndex(content)
+        st.session_state[index_key] = index
+        # Results of the previous response are no longer valid
+        st.session_state.pop(f"response_query_result_{api_name}", None)
+    return index
+
+
+def _render_response_query(api_name, content):
+    """Render the JSONPath/JMESPath query box over the stored response"""
+    with st.expander("🔎 Query Response", expanded=False):
+        index = _get_response_index(api_name, content)
+
+        languages = ["JSONPath", "JMESPath"] if jmespath is not None else ["JSONPath"]
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            expression = st.text_input(
+                "Expression",
+                key=f"response_query_{api_name}",
+                placeholder="$.data[0].studentStatistics[?(@.admissionNumber == 'ADM001')]",
+                help="JSONPath supports .key, ['key'], [n], [a:b], [*], ..key and [?(@.field == value)] filters"
+            )
+        with col2:
+            language = st.selectbox("Language", languages, key=f"response_query_lang_{api_name}")
+
+        largest = index.largest_arrays(5)
+        if largest:
+            st.caption("Largest arrays: " + ", ".join(f"`{path}` ({length})" for path, length in largest))
+
+        if not expression.strip():
+            return
+
+        # Reuse the result until the expression or the response changes
+        result_key = f"response_query_result_{api_name}"
+        cached = st.session_state.get(result_key)
+        if cached and cached[0] == (language, expression):
+            matches, elapsed_ms = cached[1], cached[2]
+        else:
+            try:
+                start_time = time.time()
+                matches = run_query(index, expression, language)
+                elapsed_ms = round((time.time() - start_time) * 1000, 2)
+            except ValueError as e:
+                st.error(f"❌ {str(e)}")
+                return
+            except Exception as e:
+                st.error(f"❌ Query failed: {str(e)}")
+                return
+            st.session_state[result_key] = ((language, expression), matches, elapsed_ms)
+
+        if not matches:
+            st.info(f"No matches ({elapsed_ms} ms)")
+            return
+
+        st.success(f"✅ {len(matches)} match(es) in {elapsed_ms} ms")
+        if len(matches) > QUERY_RESULT_ROW_LIMIT:
+            st.info(f"Showing first {QUERY_RESULT_ROW_LIMIT} of {len(matches)} matches")
+        st.dataframe(pd.DataFrame(matches_to_rows(matches)), use_container_width=True, hide_index=True)
+
+
 def _render_response_section(api_name):
-    """Render the response section"""
+    """Render the response section, closing the trace of the send that produced it"""
+    trace = st.session_state.pop(f"pending_trace_{api_name}", None)
+    if trace is None:
+        _render_response_content(api_name)
+    else:
+        try:
+            with trace.span("render response"):
+                _render_response_content(api_name)
+        finally:
+            _export_trace(trace)
+            if api_name in st.session_state.api_responses:
+                st.session_state.api_responses[api_name]['trace'] = trace.waterfall_rows()
+
+    resp = st.session_state.api_responses.get(api_name)
+    if resp and resp.get('trace'):
+        with st.expander("⏱️ Timing", expanded=False):
+            _render_trace_waterfall(resp['trace'])
+
+
+def _render_response_content(api_name):
+    """Render the response status, body, headers and request info"""
     if api_name in st.session_state.api_responses:
         resp = st.session_state.api_responses[api_name]
         st.subheader("Response")
 
+        response_size = _get_response_size(resp)
+        is_large = response_size > RESPONSE_INLINE_LIMIT_BYTES
+
         # Status and timing info
-        st.write(f"Status Code: {resp['status_code']} | Time: {resp['time']} ms")
+        size_text = format_size(response_size)
+        if resp.get('wire_size') and resp['wire_size'] != response_size:
+            encoding = next((value for key, value in resp['headers'].items() if key.lower() == 'content-encoding'), '')
+            size_text += f" ({format_size(resp['wire_size'])} on the wire, {encoding or 'identity'})"
+        st.write(f"Status Code: {resp['status_code']} | Time: {resp['time']} ms | Size: {size_text}")
+        if resp.get('cache'):
+            api = st.session_state.apis.get(api_name, {})
+            counts = get_http_cache().counts(api.get('url', ''))
+            st.caption(f"Cache: {resp['cache']} · {counts[HIT]} hit(s), {counts[REVALIDATED]} revalidated, "
+                       f"{counts[MISS]} miss(es) for this endpoint")
 
         # Response tabs
         tab1, tab2, tab3 = st.tabs(["Response Body", "Response Headers", "Request Info"])
 
         with tab1:
-            if isinstance(resp['content'], dict) or isinstance(resp['content'], list):
-                st.json(resp['content'])
+            if not is_large:
+                if isinstance(resp['content'], dict) or isinstance(resp['content'], list):
+                    st.json(resp['content'])
+                else:
+                    st.text(resp['content'])
             else:
-                st.text(resp['content'])
+                st.info(f"Response is {format_size(response_size)}, above the {format_size(RESPONSE_INLINE_LIMIT_BYTES)} inline limit. Browse it by path below or download the raw body.")
+                _render_raw_download(api_name, resp)
+                if isinstance(resp['content'], dict) or isinstance(resp['content'], list):
+                    _render_json_tree(api_name, resp['content'])
+                else:
+                    st.text(str(resp['content'])[:RESPONSE_INLINE_LIMIT_BYTES])
 
         with tab2:
             st.json(resp['headers'])
@@ -5900,6 +6815,7 @@ def _render_response_section(api_name):
             # Display request information
             if api_name in st.session_state.apis:
                 api = st.session_state.apis[api_name]
+                request_body = api.get('body', {}) if api.get('method') in ['POST', 'PUT', 'PATCH'] else None
                 request_info = {
                     "method": api.get('method', 'GET'),
                     "url": api.get('url', ''),
@@ -5907,22 +6823,49 @@ def _render_response_section(api_name):
                     "headers": api.get('headers', {}),
                     "cookies": api.get('cookies', {}),
                     "query_parameters": api.get('params', {}),
-                    "request_body": api.get('body', {}) if api.get('method') in ['POST', 'PUT', 'PATCH'] else None
+                    "request_body": request_body
                 }
+
+                # Large bodies are summarized, the editor already shows them in full
+                body_text = None
+                if request_body is not None:
+                    body_text = _get_body_document(api_name).text(request_body)
+                    if len(body_text) > RESPONSE_INLINE_LIMIT_BYTES:
+                        request_info["request_body"] = f"<{type_name(request_body)}, {format_size(len(body_text.encode('utf-8')))} - download below>"
+                    else:
+                        body_text = None
                 
                 # Remove None values for cleaner display
                 request_info = {k: v for k, v in request_info.items() if v is not None}
                 
                 st.json(request_info)
+                if body_text is not None:
+                    st.download_button(
+                        "Download Request Body",
+                        data=body_text,
+                        file_name="request_body.json",
+                        mime="application/json",
+                        key=f"download_request_body_{api_name}"
+                    )
             else:
                 st.warning("Request information not available")
 
+        if isinstance(resp['content'], dict) or isinstance(resp['content'], list):
+            _render_response_query(api_name, resp['content'])
 
-def _save_to_history(api_name, api_config, response, file_path):
-    """Save successful API calls to history"""
-    if 'api_history' not in st.session_state:
-        st.session_state.api_history = []
 
+def _get_history_store(file_paths=None):
+    """History store of the active user"""
+    file_paths = file_paths or st.session_state.file_paths
+    return get_history_store(
+        file_paths["API_HISTORY_DB"],
+        file_paths["HISTORY_BLOBS_DIR"],
+        file_paths["API_HISTORY_FILE"]
+    )
+
+
+def _save_to_history(api_name, api_config, response, file_paths):
+    """Save successful API calls to history"""
     # Create history entry
     history_entry = create_history_entry(
         api_name,
@@ -5931,13 +6874,8 @@ def _save_to_history(api_name, api_config, response, file_path):
         st.session_state.current_env
     )
 
-    # Add to history (limit to 50 entries)
-    st.session_state.api_history.insert(0, history_entry)
-    if len(st.session_state.api_history) > 50:
-        st.session_state.api_history = st.session_state.api_history[:50]
-
-    # Save history to file
-    save_api_history(st.session_state.api_history, file_path)
+    # Append to the user's history database
+    _get_history_store(file_paths).add(history_entry)
 
     # Update user data
     _save_current_user_data()
@@ -6041,71 +6979,210 @@ def display_api_tester(api_name, file_paths):
         # Action buttons
         _render_action_buttons(api_name, api, file_paths, is_temp)
 
+        # Same request on several environments, with a diff of the responses
+        _render_multi_env_section(api_name, api)
+
+        # Same request once per row of an uploaded data set
+        _render_data_sweep_section(api_name, api, file_paths)
+
+        # Statistic for many courses at once, merged into one export
+        if _is_statistic_api(api_name, api):
+            _render_statistic_fanout_section(api_name, api, file_paths)
+
     # Show response
     _render_response_section(api_name)
 
 
+def _reset_history_page():
+    """Go back to the first history page when a filter changes"""
+    st.session_state.history_page = 1
+
+
 def show_history():
     """Display API call history in sidebar for current user"""
-    if ('api_history' in st.session_state and st.session_state.api_history and 
-        st.session_state.get('show_main_app', False)):
-        username = st.session_state.get('username', 'Unknown')
-        st.sidebar.subheader(f"API History ({username})")
+    if not (st.session_state.get('show_main_app', False) and st.session_state.get('file_paths')):
+        return
 
-        # Create a dataframe for display
-        history_df = pd.DataFrame([
-            {
-                "Time": entry["timestamp"],
-                "API": entry["name"],
-                "Method": entry["method"],
-                "Path": entry.get("path", ""),
-                "Status": entry["status_code"],
-                "Env": entry["environment"]
-            }
-            for entry in st.session_state.api_history
-        ])
-
-        st.sidebar.dataframe(history_df, use_container_width=True)
-
-        # Allow loading from history
-        if st.sidebar.button("Load Selected API from History"):
-            selected_index = st.sidebar.number_input(
-                "Select history entry (0 is most recent)", 
-                0, 
-                len(st.session_state.api_history)-1 if st.session_state.api_history else 0,
-                0
-            )
+    store = _get_history_store()
+    username = st.session_state.get('username', 'Unknown')
+    st.sidebar.subheader(f"API History ({username})")
+
+    # Filters run as indexed SQL queries, only the visible page is loaded
+    search = st.sidebar.text_input("Search path / body", key="history_search", on_change=_reset_history_page)
+    col1, col2, col3 = st.sidebar.columns(3)
+    with col1:
+        name = st.selectbox("API", ["All"] + store.distinct("name"), key="history_name",
+                            on_change=_reset_history_page)
+    with col2:
+        environment = st.selectbox("Env", ["All"] + store.distinct("environment"), key="history_env",
+                                   on_change=_reset_history_page)
+    with col3:
+        status = st.selectbox("Status", list(STATUS_FILTERS.keys()), key="history_status",
+                              on_change=_reset_history_page)
+
+    filters = {
+        "search": search,
+        "name": None if name == "All" else name,
+        "environment": None if environment == "All" else environment,
+        "status": STATUS_FILTERS[status],
+    }
+    try:
+        total = store.count(**filters)
+    except Exception as e:
+        st.sidebar.error(f"Invalid search: {str(e)}")
+        return
 
-            if st.session_state.api_history:
-                entry = st.session_state.api_history[selected_index]
-                api_name = f"{entry['name']} (from history)"
+    if total == 0:
+        st.sidebar.info("No history entries")
+        return
 
-                # Get config from history
-                config = entry['config'].copy()
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    if st.session_state.get("history_page", 1) > pages:
+        st.session_state.history_page = pages
+    page = st.sidebar.number_input(f"Page (of {pages}, {total} entries)", 1, pages, key="history_page")
+    entries = store.query(**filters, limit=HISTORY_PAGE_SIZE, offset=(page - 1) * HISTORY_PAGE_SIZE)
+
+    # Create a dataframe for display
+    history_df = pd.DataFrame([
+        {
+            "Time": entry["timestamp"],
+            "API": entry["name"],
+            "Method": entry["method"],
+            "Path": entry.get("path", ""),
+            "Status": entry["status_code"],
+            "Env": entry["environment"]
+        }
+        for entry in entries
+    ])
+
+    st.sidebar.dataframe(history_df, use_container_width=True, hide_index=True)
+
+    # Allow loading from history
+    entry_labels = {entry["id"]: f"{entry['timestamp']} - {entry['name']}" for entry in entries}
+    selected_id = st.sidebar.selectbox(
+        "Select history entry",
+        list(entry_labels.keys()),
+        format_func=lambda entry_id: entry_labels[entry_id],
+        key="history_selected"
+    )
 
-                # Update URL based on current environment and module
-                if "path" in config:
-                    api_module = config.get('module', 'EX')  # Use saved module or default to EX
-                    config["url"] = f"{get_current_base_url(st.session_state.current_env, api_module)}{config['path']}"
+    if st.sidebar.button("Load Selected API from History"):
+        entry = store.get(selected_id)
+        if entry:
+            api_name = f"{entry['name']} (from history)"
 
-                st.session_state.apis[api_name] = config
-                st.session_state.current_api = api_name
+            # Get config from history
+            config = entry['config']
 
-                # Save and update user data
-                save_user_apis(st.session_state.apis, st.session_state.file_paths["USER_APIS_FILE"])
-                _save_current_user_data()
-                st.rerun()
+            # Update URL based on current environment and module
+            if "path" in config:
+                api_module = config.get('module', 'EX')  # Use saved module or default to EX
+                config["url"] = f"{get_current_base_url(st.session_state.current_env, api_module)}{config['path']}"
 
-        # Clear history option
-        if st.sidebar.button("Clear History"):
-            st.session_state.api_history = []
-            if save_api_history([], st.session_state.file_paths["API_HISTORY_FILE"]):
-                _save_current_user_data()
-                st.sidebar.success("History cleared!")
-            else:
-                st.sidebar.error("Failed to clear history")
+            st.session_state.apis[api_name] = config
+            st.session_state.current_api = api_name
+
+            # Restore the stored response so it can be inspected without re-sending
+            if entry.get('response') is not None:
+                st.session_state.api_responses[api_name] = {
+                    "status_code": entry['status_code'],
+                    "time": entry['time_ms'],
+                    "headers": {},
+                    "content": entry['response']
+                }
+
+            # Save and update user data
+            save_user_apis(st.session_state.apis, st.session_state.file_paths["USER_APIS_FILE"])
+            _save_current_user_data()
             st.rerun()
 
+    # Clear history option
+    if st.sidebar.button("Clear History"):
+        try:
+            store.clear()
+            st.sidebar.success("History cleared!")
+        except Exception:
+            st.sidebar.error("Failed to clear history")
+        st.rerun()
+
+
+def _arm_profiler():
+    """Button callback: profile the run after the one this click triggers"""
+    st.session_state.profile_next_run = st.session_state.profile_mode
+    st.session_state.profile_armed_run = True
+
+
+def _take_profile_request():
+    """Profiler mode requested for this run, if any"""
+    mode = st.session_state.get("profile_next_run")
+    if not mode or not st.session_state.get("is_admin", False) or not st.session_state.get("file_paths"):
+        return None
+    # The run triggered by the arming click itself is not the one to profile
+    if st.session_state.pop("profile_armed_run", False):
+        return None
+    del st.session_state["profile_next_run"]
+    return mode
+
+
+def _render_profiler_controls():
+    """Admin sidebar switch to profile the next script run, and the last result"""
+    st.sidebar.selectbox("Profiler", PROFILE_MODES, key="profile_mode",
+                         help="cProfile counts every call; Sampling keeps full stacks for a flame graph")
+    if st.session_state.get("profile_next_run"):
+        st.sidebar.info(f"🔬 The next run will be profiled ({st.session_state.profile_next_run})")
+    else:
+        st.sidebar.button("🔬 Profile next run", on_click=_arm_profiler, key="profile_next_run_button")
+
+    # A profiled run puts its own summary here once the page is done, in place of this one
+    slot = st.empty()
+    _profile_slot.set(slot)
+    summary = st.session_state.get("last_profile")
+    if summary:
+        with slot.container():
+            _render_last_profile(summary)
+
+
+def _render_last_profile(summary):
+    """Top functions of a profile and a download of the saved file"""
+    with st.expander(f"🔬 Last profile: {summary['duration_ms']} ms ({summary['mode']}, {summary['created']})"):
+        st.dataframe(pd.DataFrame(summary['rows']), use_container_width=True, hide_index=True)
+        file_path = summary['file_path']
+        if os.path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            st.download_button(
+                label="📥 Download profile",
+                data=data,
+                file_name=os.path.basename(file_path),
+                mime="application/json" if file_path.endswith(".json") else "application/octet-stream",
+                help="Open .prof files with snakeviz or pstats, .speedscope.json files at speedscope.app",
+                key=f"download_profile_{os.path.basename(file_path)}"
+            )
+
+
+def _run_page():
+    """One full script run"""
+    # Always show history for logged in users
+    show_history()
+
+    main()
+
+
+def _run_profiled_page(mode):
+    """Run the page under the profiler and show the summary where the last one was"""
+    username = st.session_state.get('username', 'user')
+    token = _profile_slot.set(None)
+    summary, error = profile_call(_run_page, mode, st.session_state.file_paths["PROFILES_DIR"], label=username)
+    slot = _profile_slot.get()
+    _profile_slot.reset(token)
+    st.session_state.last_profile = summary
+    if error is not None:
+        raise error
+    # Filled in without a rerun, which would throw away what the profiled run rendered
+    if slot is not None:
+        with slot.container():
+            _render_last_profile(summary)
+
 
 if __name__ == "__main__":
     st.set_page_config(
@@ -6115,7 +7192,8 @@ if __name__ == "__main__":
         initial_sidebar_state="expanded"
     )
 
-    # Always show history for logged in users
-    show_history()
-
-    main()
+    profile_mode = _take_profile_request()
+    if profile_mode:
+        _run_profiled_page(profile_mode)
+    else:
+        _run_page()
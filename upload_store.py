@@ -0,0 +1,229 @@
+"""Upload Store."""
+
+import datetime
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from blob_index import BlobIndex
+from content_encoding import encoding_available
+
+UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "upload_data")
+
+# Rows shown per page in the admin File Management tab
+UPLOAD_PAGE_SIZE = 20
+
+# Uploads not used for this long are removed
+UPLOAD_RETENTION_DAYS = 30
+
+# Oldest uploads are removed once the stored files exceed this many bytes
+UPLOAD_MAX_BYTES = 512 * 1024 * 1024
+
+# 1: loose files in upload_data imported into the index
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    api TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created TEXT NOT NULL,
+    last_used TEXT NOT NULL,
+    UNIQUE (user, api, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_user_created ON uploads (user, created);
+CREATE INDEX IF NOT EXISTS idx_uploads_last_used ON uploads (last_used);
+CREATE INDEX IF NOT EXISTS idx_uploads_hash ON uploads (hash);
+"""
+
+_LIST_COLUMNS = "id, user, api, filename, hash, size, stored_size, created, last_used"
+
+# username_apiname_YYYYMMDD_HHMMSS.ext, the names upload sections used to write
+_LEGACY_NAME = re.compile(r"^([^_]+)_(.+)_(\d{8}_\d{6})(\.\w+)$")
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_stores: Dict[str, "UploadStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime(_TIME_FORMAT)
+
+
+def _is_compressed(data: bytes) -> bool:
+    """True for zip containers (xlsx) and other formats that do not shrink further"""
+    return data[:4] == b"PK\x03\x04" or data[:2] == b"\x1f\x8b"
+
+
+class UploadStore(BlobIndex):
+    """Uploaded files of all users with a SQLite index.
+
+    File contents live in a content-addressed BlobStore, zstd-compressed when
+    the zstandard package is installed and the file is not already a zip
+    container such as xlsx. A user uploading the same file to the same API
+    again only refreshes last_used, and different users uploading the same
+    file share one blob. Uploads unused for longer than the retention period,
+    and the least recently used ones beyond the size cap, are removed on
+    every new upload.
+    """
+
+    table = "uploads"
+    hash_columns = ("hash",)
+
+    def __init__(self, root: str, retention_days: int = UPLOAD_RETENTION_DAYS,
+                 max_bytes: int = UPLOAD_MAX_BYTES):
+        """Open (and create or import loose files into) the index under root"""
+        self.root = root
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        super().__init__(os.path.join(root, "uploads.db"), os.path.join(root, "blobs"))
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._import_loose_files()
+
+    def _import_loose_files(self) -> None:
+        """Move timestamped files written before the index existed into the store"""
+        with self._lock:
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name)
+                if not os.path.isfile(path) or not name.endswith((".xlsx", ".xls", ".csv")):
+                    continue
+                match = _LEGACY_NAME.match(name)
+                if match:
+                    user, api, stamp, _ = match.groups()
+                    created = datetime.datetime.strptime(stamp, "%Y%m%d_%H%M%S").strftime(_TIME_FORMAT)
+                else:
+                    user, api = "other", ""
+                    created = datetime.datetime.fromtimestamp(os.path.getmtime(path)).strftime(_TIME_FORMAT)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self._insert(user, api, name, data, created)
+                os.remove(path)
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.commit()
+
+    def _insert(self, user: str, api: str, filename: str, data: bytes, created: str) -> Tuple[int, bool]:
+        """Store the blob and insert or refresh the row, without committing"""
+        compress = encoding_available("zstd") and not _is_compressed(data)
+        digest = self.blobs.put(data, compress=compress)
+        existing = self._conn.execute(
+            "SELECT id FROM uploads WHERE user = ? AND api = ? AND hash = ?", (user, api, digest)
+        ).fetchone()
+        if existing:
+            self._conn.execute("UPDATE uploads SET last_used = MAX(last_used, ?), filename = ? WHERE id = ?",
+                               (created, filename, existing[0]))
+            return existing[0], False
+        cursor = self._conn.execute(
+            "INSERT INTO uploads (user, api, filename, hash, size, stored_size, created, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (user, api, filename, digest, len(data), self.blobs.stored_size(digest), created, created)
+        )
+        return cursor.lastrowid, True
+
+    def put(self, user: str, api: str, filename: str, data: bytes) -> Dict[str, Any]:
+        """Keep an uploaded file, returning its row and whether it was new"""
+        with self._lock:
+            upload_id, created = self._insert(user, api, filename, data, _now())
+            self._commit(self._apply_retention())
+        return {"id": upload_id, "new": created}
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) FROM (SELECT MAX(stored_size) AS stored_size FROM uploads GROUP BY hash)"
+        ).fetchone()[0]
+
+    def _apply_retention(self) -> List[str]:
+        """Drop expired rows, then least recently used ones until under max_bytes"""
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retention_days)).strftime(_TIME_FORMAT)
+        orphans = self._delete_rows("last_used < ?", (cutoff,))
+        excess = self._stored_bytes() - self.max_bytes
+        if excess <= 0:
+            return orphans
+        # Walk from the least recently used upload; a blob is only freed once its last row goes
+        last_row = {row["hash"]: row["id"] for row in self._conn.execute(
+            "SELECT id, hash FROM uploads ORDER BY last_used, id")}
+        victims = []
+        for row in self._conn.execute("SELECT id, hash, stored_size FROM uploads ORDER BY last_used, id").fetchall():
+            if excess <= 0:
+                break
+            victims.append(row["id"])
+            if last_row[row["hash"]] == row["id"]:
+                excess -= row["stored_size"]
+        placeholders = ", ".join("?" * len(victims))
+        return orphans + self._delete_rows(f"id IN ({placeholders})", tuple(victims))
+
+    def apply_retention(self) -> int:
+        """Run retention now, returning how many stored files were freed"""
+        with self._lock:
+            return self._commit(self._apply_retention())
+
+    def totals(self) -> Dict[str, int]:
+        """Number of uploads, their combined size and the bytes actually stored"""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads").fetchone()
+            return {"files": row[0], "size": row[1], "stored_size": self._stored_bytes()}
+
+    def users(self) -> List[Dict[str, Any]]:
+        """Upload count and size per user"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user, COUNT(*) AS files, SUM(size) AS size, MAX(created) AS latest "
+                "FROM uploads GROUP BY user ORDER BY user"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, user: Optional[str] = None, limit: int = UPLOAD_PAGE_SIZE, offset: int = 0) -> List[Dict[str, Any]]:
+        """One page of uploads, newest first"""
+        where, params = ("WHERE user = ?", [user]) if user is not None else ("", [])
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_LIST_COLUMNS} FROM uploads {where} ORDER BY created DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def read(self, upload_id: int) -> Optional[bytes]:
+        """Contents of an upload, None if it does not exist"""
+        with self._lock:
+            row = self._conn.execute("SELECT hash FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+            return self.blobs.get(row[0]) if row else None
+
+    def delete(self, upload_id: int) -> None:
+        self._delete_where("id = ?", (upload_id,))
+
+    def delete_user(self, user: str) -> int:
+        """Delete every upload of a user, returning how many were removed"""
+        return self._delete_where("user = ?", (user,))
+
+    def delete_older_than(self, days: int) -> int:
+        """Delete uploads created more than days ago"""
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime(_TIME_FORMAT)
+        return self._delete_where("created < ?", (cutoff,))
+
+    def _delete_where(self, where: str, params: Tuple[Any, ...]) -> int:
+        with self._lock:
+            count = self._conn.execute(f"SELECT COUNT(*) FROM uploads WHERE {where}", params).fetchone()[0]
+            self._commit(self._delete_rows(where, params))
+        return count
+
+    def clear(self) -> None:
+        """Delete every upload and all stored files"""
+        with self._lock:
+            self._clear()
+
+
+def get_upload_store(root: str = UPLOAD_DIR) -> UploadStore:
+    """Shared UploadStore per directory"""
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = UploadStore(root)
+        return store
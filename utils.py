@@ -3,8 +3,29 @@
 import json
 import os
 import requests
+import sys
+import threading
 import time
-from typing import Dict, List, Any, Optional
+import types
+from typing import Dict, List, Any, Optional, Tuple
+
+from content_encoding import encode_body
+from http_cache import HTTPCache, cache_ttl
+from timeouts import DEFAULT_TIMEOUTS, DeadlineExceeded, Timeouts
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+# Bumped whenever saved per-user data needs a one-time migration
+USER_DATA_SCHEMA_VERSION = 1
+
+ENVIRONMENTS_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "environments_config.json")
+
+# Process-wide cache of shared config files: path -> (mtime_ns, data)
+_shared_config_cache: Dict[str, Tuple[int, Any]] = {}
+_shared_config_lock = threading.Lock()
 
 
 # Legacy get_base_url function removed - now using get_current_base_url with JSON config
@@ -12,7 +33,7 @@ from typing import Dict, List, Any, Optional
 
 def get_current_base_url(current_env: str, module: str = "EX") -> str:
     """Get the base URL for the current environment and module"""
-    environments = load_environments_config()
+    environments = load_shared_environments_config()
     if current_env in environments and environments[current_env].get('enabled', True):
         base_url = environments[current_env]['base_url']
         
@@ -31,7 +52,7 @@ def get_current_base_url(current_env: str, module: str = "EX") -> str:
         return base_url
 
     # Fallback: get from environments config (this will load from JSON or use hardcoded fallback)
-    environments = load_environments_config()
+    environments = load_shared_environments_config()
     
     if current_env in environments:
         base_url = environments[current_env]["base_url"]
@@ -51,7 +72,7 @@ def get_current_base_url(current_env: str, module: str = "EX") -> str:
 def load_environments_config() -> Dict[str, Any]:
     """Load environments configuration from JSON file"""
     try:
-        env_file_path = os.path.join(os.path.dirname(__file__), "environments_config.json")
+        env_file_path = ENVIRONMENTS_CONFIG_FILE
         if os.path.exists(env_file_path):
             return load_json_file(env_file_path)
         else:
@@ -100,18 +121,23 @@ def load_environments_config() -> Dict[str, Any]:
         }
 
 
+def load_shared_environments_config() -> Dict[str, Any]:
+    """Read-only environments configuration from the process-wide cache"""
+    environments = load_shared_config(ENVIRONMENTS_CONFIG_FILE)
+    return environments if environments else load_environments_config()
+
+
 def save_environments_config(environments: Dict[str, Any]) -> bool:
     """Save environments configuration to JSON file"""
     try:
-        env_file_path = os.path.join(os.path.dirname(__file__), "environments_config.json")
-        return save_json_file(environments, env_file_path)
+        return save_json_file(environments, ENVIRONMENTS_CONFIG_FILE)
     except Exception:
         return False
 
 
 def get_enabled_environments() -> List[str]:
     """Get list of enabled environment names"""
-    environments = load_environments_config()
+    environments = load_shared_environments_config()
     return [env_name for env_name, config in environments.items() if config.get('enabled', True)]
 
 
@@ -130,14 +156,24 @@ def get_user_specific_paths(username: str) -> Dict[str, str]:
         os.makedirs(user_dir)
 
     api_history_file = os.path.join(user_dir, "api_history.json")
+    api_history_db = os.path.join(user_dir, "api_history.db")
+    history_blobs_dir = os.path.join(user_dir, "blobs")
     user_cookies_file = os.path.join(user_dir, "cookies_config.json")
     user_apis_file = os.path.join(user_dir, "user_apis.json")
+    user_meta_file = os.path.join(user_dir, "user_meta.json")
+    traces_file = os.path.join(user_dir, "traces.jsonl")
+    profiles_dir = os.path.join(user_dir, "profiles")
 
     return {
         "API_CONFIG_FILE": api_config_file,
         "API_HISTORY_FILE": api_history_file,
+        "API_HISTORY_DB": api_history_db,
+        "HISTORY_BLOBS_DIR": history_blobs_dir,
         "COOKIES_CONFIG_FILE": user_cookies_file,
-        "USER_APIS_FILE": user_apis_file
+        "USER_APIS_FILE": user_apis_file,
+        "USER_META_FILE": user_meta_file,
+        "TRACES_FILE": traces_file,
+        "PROFILES_DIR": profiles_dir
     }
 
 
@@ -176,6 +212,38 @@ def cookies_string_to_dict(cookies_string: str) -> Dict[str, str]:
     return cookies_dict
 
 
+def json_dumps_pretty(data: Any) -> str:
+    """Serialize data as 2-space indented JSON, using orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            # Non-string keys, big ints, etc. - let the stdlib handle them
+            pass
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def json_dumps_bytes(data: Any) -> bytes:
+    """Serialize data as compact UTF-8 JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(text: str) -> Any:
+    """Parse JSON text, using orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Re-parse with the stdlib for its error messages and NaN support
+            pass
+    return json.loads(text)
+
+
 def load_json_file(file_path: str) -> Any:
     """Load data from JSON file"""
     try:
@@ -221,6 +289,109 @@ def load_api_configs(file_path: str) -> Dict[str, Any]:
         return {}
 
 
+def load_shared_config(file_path: str) -> Dict[str, Any]:
+    """Load a config file shared by all users through a process-wide cache
+
+    The file is re-read only when its modification time changes. The returned
+    object is shared between sessions and must be treated as read-only; use
+    load_api_configs for a private copy to edit.
+    """
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        return {}
+
+    cached = _shared_config_cache.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _shared_config_lock:
+        cached = _shared_config_cache.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        data = load_api_configs(file_path)
+        _shared_config_cache[file_path] = (mtime, data)
+        return data
+
+
+def clear_shared_config_cache() -> None:
+    """Drop every cached shared config so the next read goes to disk"""
+    with _shared_config_lock:
+        _shared_config_cache.clear()
+
+
+def shared_config_cache_info() -> List[Dict[str, Any]]:
+    """Cached shared config files with their estimated memory use"""
+    return [
+        {"File": os.path.basename(path), "Entries": len(data) if isinstance(data, dict) else None,
+         "Bytes": estimate_memory(data)}
+        for path, (_, data) in list(_shared_config_cache.items())
+    ]
+
+
+def estimate_memory(obj: Any) -> int:
+    """Approximate deep size of an object in bytes, counting shared objects once"""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, (types.ModuleType, type)) or callable(current):
+            continue
+        if hasattr(current, 'memory_usage') and hasattr(current, 'columns'):
+            # pandas DataFrame
+            total += int(current.memory_usage(deep=True).sum())
+            continue
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            stack.append(vars(current))
+    return total
+
+
+def migrate_user_data(file_paths: Dict[str, str], apis: Dict[str, Any]) -> bool:
+    """Bring a user's saved data up to USER_DATA_SCHEMA_VERSION, once per user
+
+    The version reached is recorded in the user's meta file so later loads skip
+    the migration. Returns True if the saved APIs were changed.
+    """
+    meta_file = file_paths["USER_META_FILE"]
+    try:
+        meta = load_json_file(meta_file) if os.path.exists(meta_file) else {}
+    except Exception:
+        meta = {}
+    version = meta.get("schema_version", 0)
+    if version >= USER_DATA_SCHEMA_VERSION:
+        return False
+
+    changed = False
+    if version < 1:
+        # Version 1: every API has a module, older ones default to EX
+        for api_config in apis.values():
+            if 'module' not in api_config:
+                api_config['module'] = 'EX'
+                changed = True
+    if changed:
+        save_user_apis(apis, file_paths["USER_APIS_FILE"])
+
+    meta["schema_version"] = USER_DATA_SCHEMA_VERSION
+    try:
+        save_json_file(meta, meta_file)
+    except Exception:
+        pass
+    return changed
+
+
 def save_api_config(configs: Dict[str, Any], file_path: str) -> bool:
     """Save API configurations to JSON file"""
     try:
@@ -246,16 +417,11 @@ def save_api_history(history: List[Dict[str, Any]], file_path: str) -> bool:
         return False
 
 
-def load_cookies_config(file_path: str, admin_file_path: Optional[str] = None) -> Dict[str, str]:
-    """Load cookies configurations with simple priority: user cookies (if not empty) > admin cookies > defaults"""
+def load_cookies_config(file_path: str) -> Dict[str, str]:
+    """Load the user's cookies for every enabled environment, empty where none are saved"""
     try:
         # Get all available environments
-        environments = load_environments_config()
-        
-        # Load admin cookies
-        admin_cookies = {}
-        if admin_file_path and os.path.exists(admin_file_path):
-            admin_cookies = load_json_file(admin_file_path)
+        environments = load_shared_environments_config()
         
         # Load user cookies (default to empty for all environments)
         user_cookies = {}
@@ -279,7 +445,7 @@ def load_cookies_config(file_path: str, admin_file_path: Optional[str] = None) -
         return result
     except Exception:
         # Simple fallback - all environments get empty cookies
-        environments = load_environments_config()
+        environments = load_shared_environments_config()
         return {env_name: "" for env_name, config in environments.items() if config.get('enabled', True)}
 
 
@@ -291,40 +457,105 @@ def save_cookies_config(configs: Dict[str, str], file_path: str) -> bool:
         return False
 
 
-def make_http_request(api: Dict[str, Any]) -> requests.Response:
-    """Make HTTP request based on API configuration"""
+# Chunk size used when reading response bodies under a total deadline
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+def _read_within_deadline(response: requests.Response, deadline: float) -> requests.Response:
+    """Download a streamed response body, giving up once the monotonic deadline passes"""
+    chunks = []
+    try:
+        for chunk in response.iter_content(_READ_CHUNK_BYTES):
+            chunks.append(chunk)
+            if time.monotonic() > deadline:
+                raise DeadlineExceeded(f"Response body not received within the total timeout ({response.url})")
+    except BaseException:
+        response.close()
+        raise
+    response._content = b"".join(chunks)
+    response._content_consumed = True
+    # Body bytes as received, before urllib3 undid any Content-Encoding
+    response.wire_size = response.raw.tell()
+    return response
+
+
+def make_http_request(api: Dict[str, Any], session: Optional[requests.Session] = None,
+                      body_bytes: Optional[bytes] = None,
+                      timeouts: Optional[Timeouts] = None,
+                      content_encoding: Optional[str] = None,
+                      cache: Optional[HTTPCache] = None) -> requests.Response:
+    """Make HTTP request based on API configuration
+
+    Pass a shared session to reuse its connection pool across requests, and
+    body_bytes to send a body that was already serialized as JSON. timeouts
+    bounds the connect and each read, and the whole request including the body
+    download; it defaults to DEFAULT_TIMEOUTS so no send can hang forever.
+
+    content_encoding ("gzip" or "zstd") compresses the JSON body; a server
+    that answers 415 gets the plain body once more and the response is marked
+    with encoding_rejected. The returned response carries request_wire_size
+    and wire_size, the body sizes actually sent and received.
+
+    With a cache, a GET revalidates the stored response with If-None-Match /
+    If-Modified-Since and a 304 returns the stored body; the response is
+    marked with cache_status. Fresh entries are served by the caller, before
+    any rate limiting, with cache.fresh_response.
+    """
+    client = session or requests
     method = api['method']
     url = api['url']
     headers = api.get('headers', {})
     params = api.get('params', {})
     cookies = api.get('cookies', {})
     body = api.get('body', {})
-    
+
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    deadline = time.monotonic() + timeouts.total
+    send_kwargs = {"params": params, "cookies": cookies, "timeout": timeouts.for_requests(), "stream": True}
+
+    if method not in ("GET", "POST", "PUT", "DELETE", "PATCH"):
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    cache_entry = None
+    if cache is not None and method == "GET":
+        cache_key = cache.key(api)
+        cache_entry = cache.get(cache_key)
+        if cache_entry is not None:
+            headers = {**headers, **cache_entry.conditional_headers()}
+
     if method == "GET":
-        return requests.get(url, headers=headers, params=params, cookies=cookies)
-    elif method == "POST":
-        # Check if body is empty string (for timer job APIs)
-        if body == "":
-            return requests.post(url, headers=headers, data="", params=params, cookies=cookies)
-        else:
-            return requests.post(url, headers=headers, json=body, params=params, cookies=cookies)
-    elif method == "PUT":
-        if body == "":
-            return requests.put(url, headers=headers, data="", params=params, cookies=cookies)
-        else:
-            return requests.put(url, headers=headers, json=body, params=params, cookies=cookies)
-    elif method == "DELETE":
-        if body == "":
-            return requests.delete(url, headers=headers, data="", params=params, cookies=cookies)
-        else:
-            return requests.delete(url, headers=headers, json=body, params=params, cookies=cookies)
-    elif method == "PATCH":
-        if body == "":
-            return requests.patch(url, headers=headers, data="", params=params, cookies=cookies)
-        else:
-            return requests.patch(url, headers=headers, json=body, params=params, cookies=cookies)
+        response = client.request(method, url, headers=headers, **send_kwargs)
+    elif body == "":
+        # Empty string body (for timer job APIs)
+        response = client.request(method, url, headers=headers, data="", **send_kwargs)
+    elif body_bytes is not None or content_encoding:
+        if body_bytes is None:
+            body_bytes = json_dumps_bytes(body)
+        headers = dict(headers)
+        if not any(key.lower() == 'content-type' for key in headers):
+            headers['Content-Type'] = 'application/json'
+        data = body_bytes
+        if content_encoding:
+            data = encode_body(body_bytes, content_encoding)
+            headers['Content-Encoding'] = content_encoding
+        response = client.request(method, url, headers=headers, data=data, **send_kwargs)
+
+        if content_encoding and response.status_code == 415:
+            response.close()
+            del headers['Content-Encoding']
+            data = body_bytes
+            response = client.request(method, url, headers=headers, data=data, **send_kwargs)
+            response.encoding_rejected = True
+        response.request_wire_size = len(data)
     else:
-        raise ValueError(f"Unsupported HTTP method: {method}")
+        response = client.request(method, url, headers=headers, json=body, **send_kwargs)
+
+    if not hasattr(response, 'request_wire_size'):
+        response.request_wire_size = len(response.request.body or b"")
+    response = _read_within_deadline(response, deadline)
+    if cache is not None and method == "GET":
+        response = cache.update(cache_key, cache_entry, response, cache_ttl(api))
+    return response
 
 
 def get_response_content(response: requests.Response) -> Any:
@@ -348,6 +579,7 @@ def create_history_entry(api_name: str, api_config: Dict[str, Any], response: Di
         "status_code": response['status_code'],
         "time_ms": response['time'],
         "config": api_config,
+        "response": response.get('content'),
     }
 
 